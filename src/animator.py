@@ -2,10 +2,12 @@ from typing import Dict, List, Tuple, Any
 
 from json import load
 
+import numpy as np
 from arcade import Texture, load_texture, Sprite, SpriteList
 from arcade.resources import resolve_resource_path
 
 from src.clock import Clock
+from src.ecs import World, SpriteSync
 
 
 def _load_from_src(_animation_src: str, _animation_name: str):
@@ -87,74 +89,101 @@ class Animator:
         pass
 
 
-class TempAnimator(Sprite):
-
-    def __init__(self, x: float, y: float, dx: float, dy: float,
-                 animation_data: Dict[str, Any], animation_frames: List[Dict[str, Any]],
-                 loop_count: int = 1, scale_xy: Tuple[float, float] = (1.0, 1.0),):
-        super().__init__()
-        self.scale_xy = scale_xy
-
-        self.position = x, y
-        self.velocity = dx, dy
-
-        self._anim_data: Dict[str, Any] = animation_data
-        self._anim_frames: List[Dict[str, Any]] = animation_frames
-
-        self._texture = self._anim_frames[0]['texture']
-
-        self._frame = 0
-        self._next_frame = 0
-        self._last_frame_t = Clock.time
-        self._loops = loop_count
-
-    def update(self) -> None:
-        self.position = (self.position[0] + self.velocity[0] * Clock.delta_time,
-                         self.position[1] + self.velocity[1] * Clock.delta_time)
-
-    def update_animation(self, delta_time: float = 1 / 60) -> None:
-        if Clock.length(self._last_frame_t) >= self._anim_frames[self._frame]['duration']/1000:
-            self._frame = self._next_frame
-
-            _old_scale = self.scale_xy
-            self.scale_xy = (1.0, 1.0)
-            self.texture = self._anim_frames[self._frame]['texture']
-            self.scale_xy = _old_scale
-
-            self._next_frame += 1
-            self._last_frame_t = Clock.time
-
-            if self._next_frame >= len(self._anim_frames):
-                self._loops -= 1
-                if self._loops <= 0:
-                    self.remove_from_sprite_lists()
-                    return
-                self._next_frame = 0
-
-
 class TempAnimatorManager:
+    """
+    Short lived animations, particles, each an entity of a World drawn through one SpriteSync. Every frame of every
+    loaded animation is in one list, an animation being its start and length in it, so stepping them all is a few
+    numpy calls however many there are.
+    """
 
     def __init__(self):
-        self._animators: SpriteList = SpriteList()
+        self._world: World = World()
+        self._world.register("position", np.float64, (2,))
+        self._world.register("velocity", np.float64, (2,))
+        self._world.register("scale", np.float64, (2,))
+        self._world.register("animation", np.int32)
+        self._world.register("texture", np.int32)
+        self._world.register("frame", np.int32)
+        self._world.register("next_frame", np.int32)
+        self._world.register("frame_time", np.float64)
+        self._world.register("loops", np.int32)
 
         self._anims: Dict[str, Dict[str, Any]] = dict()
         self._frames: Dict[str, List[Dict[str, Any]]] = dict()
 
+        self._ids: Dict[str, int] = dict()
+        self._textures: List[Texture] = []
+        self._durations: np.ndarray = np.zeros(0)
+        self._starts: np.ndarray = np.zeros(0, dtype=np.int32)
+        self._lengths: np.ndarray = np.zeros(0, dtype=np.int32)
+
+        self._sync: SpriteSync = SpriteSync(self._world, self._textures, _scale="scale")
+
     def load(self, _animation_src: str, _animation_name: str):
         self._anims, self._frames = _load_from_src(_animation_src, _animation_name)
 
+        self._ids, _durations, _starts, _lengths = dict(), [], [], []
+        self._textures.clear()
+        for _name, _frames in self._frames.items():
+            self._ids[_name] = len(_starts)
+            _starts.append(len(self._textures))
+            _lengths.append(len(_frames))
+            self._textures.extend(_frame['texture'] for _frame in _frames)
+            _durations.extend(_frame['duration'] / 1000 for _frame in _frames)
+        self._durations = np.array(_durations, dtype=np.float64)
+        self._starts = np.array(_starts, dtype=np.int32)
+        self._lengths = np.array(_lengths, dtype=np.int32)
+        self._world.clear()
+
     def animate(self):
-        for _temp in tuple(self._animators.sprite_list):
-            _temp.update_animation(Clock.delta_time)
+        _time = Clock.time
+        _ended = []
+        for _archetype in self._world.query("animation", "frame", "next_frame", "frame_time", "loops", "texture"):
+            _animation, _frame, _frame_time = _archetype["animation"], _archetype["frame"], _archetype["frame_time"]
+            _start = self._starts[_animation]
+            _due = np.nonzero(_time - _frame_time >= self._durations[_start + _frame])[0]
+            if not len(_due):
+                continue
+
+            _next_frame, _loops = _archetype["next_frame"], _archetype["loops"]
+            _frame[_due] = _next_frame[_due]
+            _archetype["texture"][_due] = _start[_due] + _frame[_due]
+            _next_frame[_due] += 1
+            _frame_time[_due] = _time
+
+            _wrapped = _due[_next_frame[_due] >= self._lengths[_animation[_due]]]
+            _loops[_wrapped] -= 1
+            _next_frame[_wrapped] = 0
+            _ended.append(_archetype.entities[_wrapped[_loops[_wrapped] <= 0]])
+        for _entities in _ended:
+            if len(_entities):
+                self._world.destroy_many(_entities)
 
     def update(self):
-        self._animators.update_animation(Clock.delta_time)
+        for _archetype in self._world.query("position", "velocity"):
+            _archetype["position"] += _archetype["velocity"] * Clock.delta_time
 
     def draw(self):
-        self._animators.draw(pixelated=True)
+        self._sync.draw()
 
     def add_new(self, _animation: str, x: float, y: float, dx: float = 0.0, dy: float = 0.0,
                 loop_count: int = 1, scale: Tuple[float, float] = (1.0, 1.0)):
-        _animator = TempAnimator(x, y, dx, dy, self._anims[_animation], self._frames[_animation],
-                                 loop_count, scale)
-        self._animators.append(_animator)
\ No newline at end of file
+        _id = self._ids[_animation]
+        self._world.create(position=(x, y), velocity=(dx, dy), scale=scale, animation=_id,
+                           texture=self._starts[_id], frame=0, next_frame=0, frame_time=Clock.time, loops=loop_count)
+
+    @property
+    def count(self) -> int:
+        return len(self._world)
+
+    @property
+    def world(self) -> World:
+        return self._world
+
+    @property
+    def sync(self) -> SpriteSync:
+        return self._sync
+
+    @property
+    def sprites(self) -> SpriteList:
+        return self._sync.sprites
@@ -0,0 +1,204 @@
+from typing import Dict, List, Set, Tuple, Iterable
+from math import floor
+from threading import Lock
+
+import numpy as np
+from arcade import Sprite, SpriteList, Texture, load_texture
+
+from src.room_cache import RoomData, FLIPPED_HORIZONTALLY, FLIPPED_VERTICALLY, FLIPPED_DIAGONALLY, GID_MASK
+
+# Tile textures shared by every room, keyed by the tile's source image region and flip flags
+_textures: Dict[Tuple[str, int, int, int, int, int], Texture] = dict()
+
+
+def tile_texture(_data: RoomData, _gid: int) -> Texture:
+    _image, _x, _y, _width, _height = _data.tile(_gid)
+    _key = (_data.image_path(_image), _x, _y, _width, _height, _gid & ~GID_MASK)
+    if _key not in _textures:
+        _textures[_key] = load_texture(_key[0], x=_x, y=_y, width=_width, height=_height,
+                                       flipped_horizontally=bool(_gid & FLIPPED_HORIZONTALLY),
+                                       flipped_vertically=bool(_gid & FLIPPED_VERTICALLY),
+                                       flipped_diagonally=bool(_gid & FLIPPED_DIAGONALLY))
+    return _textures[_key]
+
+
+class ChunkedLayer:
+    """
+    The sprites of a room layer split into square chunks by their centre, each with its own SpriteList. Every
+    chunk keeps the bounds of its sprites, so a sprite hanging over the edge of its chunk is still drawn when only
+    the neighbouring chunk is on screen.
+    """
+    c_chunk_size: int = 512
+
+    def __init__(self, _sprites: Iterable[Sprite], _chunk_size: int = None):
+        self._chunk_size: int = _chunk_size or self.c_chunk_size
+
+        self._chunks: Dict[Tuple[int, int], SpriteList] = dict()
+        self._bounds: Dict[Tuple[int, int], List[float]] = dict()
+        for _sprite in _sprites:
+            _half_width, _half_height = _sprite.width / 2, _sprite.height / 2
+            _key = (floor(_sprite.center_x / self._chunk_size), floor(_sprite.center_y / self._chunk_size))
+            if _key not in self._chunks:
+                self._chunks[_key] = SpriteList(lazy=True)
+                self._bounds[_key] = [_sprite.center_x, _sprite.center_y, _sprite.center_x, _sprite.center_y]
+            self._chunks[_key].append(_sprite)
+
+            _bounds = self._bounds[_key]
+            _bounds[0] = min(_bounds[0], _sprite.center_x - _half_width)
+            _bounds[1] = min(_bounds[1], _sprite.center_y - _half_height)
+            _bounds[2] = max(_bounds[2], _sprite.center_x + _half_width)
+            _bounds[3] = max(_bounds[3], _sprite.center_y + _half_height)
+
+        # Drawn bottom row first, left to right, so the order doesn't depend on the order sprites were added in
+        self._order: List[Tuple[int, int]] = sorted(self._chunks.keys(), key=lambda _key: (_key[1], _key[0]))
+        self._initialized: Set[Tuple[int, int]] = set()
+
+    def __len__(self):
+        return sum(len(_chunk) for _chunk in self._chunks.values())
+
+    def chunk(self, _key: Tuple[int, int]) -> SpriteList:
+        return self._chunks[_key]
+
+    def release(self):
+        """
+        Frees the sprites of chunks which can be built again, nothing for a layer made from sprites.
+        """
+        pass
+
+    def visible(self, _left: float, _bottom: float, _right: float, _top: float) -> List[Tuple[int, int]]:
+        """
+        The chunks whose sprites overlap the rectangle, in draw order.
+        """
+        _visible = []
+        for _key in self._order:
+            _chunk_left, _chunk_bottom, _chunk_right, _chunk_top = self._bounds[_key]
+            if _chunk_left < _right and _chunk_right > _left and _chunk_bottom < _top and _chunk_top > _bottom:
+                _visible.append(_key)
+        return _visible
+
+    def prepare(self, _rect: Tuple[float, float, float, float] = None) -> List[Tuple[int, int]]:
+        """
+        Makes the sprites of the chunks overlapping _rect, or of every chunk, and returns the ones which still
+        need their GL buffers. Safe to call off the main thread.
+        """
+        _pending = []
+        for _key in self._order if _rect is None else self.visible(*_rect):
+            self.chunk(_key)
+            if _key not in self._initialized:
+                _pending.append(_key)
+        return _pending
+
+    def initialize_chunk(self, _key: Tuple[int, int]):
+        # Only chunks which still have sprites, a released chunk is left for draw to make again
+        _chunk = self._chunks.get(_key, None)
+        if _chunk is not None and _key not in self._initialized:
+            _chunk.initialize()
+            self._initialized.add(_key)
+
+    def initialize(self):
+        for _key in tuple(self._chunks.keys()):
+            self.initialize_chunk(_key)
+
+    def draw(self, _rect: Tuple[float, float, float, float] = None, **kwargs) -> Tuple[int, int]:
+        """
+        Draws the chunks overlapping _rect, or every chunk without one. Returns how many chunks and sprites were
+        submitted.
+        """
+        _keys = self._order if _rect is None else self.visible(*_rect)
+        _sprites = 0
+        for _key in _keys:
+            _chunk = self.chunk(_key)
+            _chunk.draw(**kwargs)
+            self._initialized.add(_key)
+            _sprites += len(_chunk)
+        return len(_keys), _sprites
+
+    @property
+    def keys(self) -> List[Tuple[int, int]]:
+        return self._order
+
+    @property
+    def chunks(self) -> Dict[Tuple[int, int], SpriteList]:
+        """
+        The chunks which currently have sprites.
+        """
+        return self._chunks
+
+    @property
+    def bounds(self) -> Dict[Tuple[int, int], List[float]]:
+        return self._bounds
+
+    @property
+    def chunk_size(self):
+        return self._chunk_size
+
+
+class TileLayer(ChunkedLayer):
+    """
+    A tile layer kept as the GID array of its RoomData rather than sprites. The sprites of a chunk are only made
+    when the chunk is first drawn, and are dropped again by release() when the room is left.
+    """
+
+    def __init__(self, _data: RoomData, _layer: str, _chunk_size: int = None):
+        self._chunk_size: int = _chunk_size or self.c_chunk_size
+        self._data: RoomData = _data
+        self._chunks: Dict[Tuple[int, int], SpriteList] = dict()
+        self._initialized: Set[Tuple[int, int]] = set()
+        # Chunks are made by the loader threads while warming the room as well as by draw
+        self._lock: Lock = Lock()
+
+        # Row 0 is the bottom of the room, the same as world coordinates
+        self._gids: np.ndarray = np.frombuffer(_data.layer(_layer), dtype=np.uint32).reshape(_data.height,
+                                                                                              _data.width)[::-1]
+        _rows, _columns = np.nonzero(self._gids)
+        _gids = self._gids[_rows, _columns]
+
+        _sizes = {int(_gid): tile_texture(_data, int(_gid)) for _gid in np.unique(_gids)}
+        _widths = np.array([_sizes[int(_gid)].width for _gid in _gids], dtype=np.float64)
+        _heights = np.array([_sizes[int(_gid)].height for _gid in _gids], dtype=np.float64)
+        _lefts = _columns * _data.tile_width
+        _bottoms = _rows * _data.tile_height
+        _key_x = np.floor((_lefts + _widths / 2) / self._chunk_size).astype(np.int64)
+        _key_y = np.floor((_bottoms + _heights / 2) / self._chunk_size).astype(np.int64)
+
+        # The cells of each chunk and the bounds of their tiles
+        self._cells: Dict[Tuple[int, int], Tuple[np.ndarray, np.ndarray]] = dict()
+        self._bounds: Dict[Tuple[int, int], List[float]] = dict()
+        for _kx, _ky in set(zip(_key_x.tolist(), _key_y.tolist())):
+            _in = (_key_x == _kx) & (_key_y == _ky)
+            self._cells[(_kx, _ky)] = (_columns[_in], _rows[_in])
+            self._bounds[(_kx, _ky)] = [float(_lefts[_in].min()), float(_bottoms[_in].min()),
+                                        float((_lefts[_in] + _widths[_in]).max()),
+                                        float((_bottoms[_in] + _heights[_in]).max())]
+
+        self._order: List[Tuple[int, int]] = sorted(self._cells.keys(), key=lambda _key: (_key[1], _key[0]))
+
+    def __len__(self):
+        return sum(len(_columns) for _columns, _rows in self._cells.values())
+
+    def chunk(self, _key: Tuple[int, int]) -> SpriteList:
+        _chunk = self._chunks.get(_key, None)
+        if _chunk is not None:
+            return _chunk
+
+        with self._lock:
+            if _key in self._chunks:
+                return self._chunks[_key]
+            _sprites = SpriteList(lazy=True)
+            _columns, _rows = self._cells[_key]
+            for _column, _row in zip(_columns.tolist(), _rows.tolist()):
+                _sprite = Sprite(texture=tile_texture(self._data, int(self._gids[_row, _column])))
+                _sprite.center_x = _column * self._data.tile_width + _sprite.width / 2
+                _sprite.center_y = _row * self._data.tile_height + _sprite.height / 2
+                _sprites.append(_sprite)
+            self._chunks[_key] = _sprites
+            return _sprites
+
+    def release(self):
+        with self._lock:
+            self._chunks.clear()
+            self._initialized.clear()
+
+    @property
+    def gids(self) -> np.ndarray:
+        return self._gids
@@ -1,6 +1,21 @@
+from typing import Tuple
+
+
 class GlobalClock:
+    """
+    Game time advances in fixed steps of c_fixed_step, so the simulation gives the same result however fast frames
+    are drawn. advance() banks the real time of a frame and returns how many steps to run, and alpha is how far
+    the leftover time is into the next step, for drawing between the last two simulated states.
+    """
+    c_fixed_step: float = 1 / 120
+    # More steps than this in one frame are dropped, so a slow frame slows the game down instead of snowballing
+    c_max_steps: int = 8
 
     def __init__(self):
+        self._accumulator: float = 0.0
+        self._alpha: float = 0.0
+        self._dropped_steps: int = 0
+
         self._time: float = 0.0
         self._const_time: float = 0.0
         self._frame_time: int = 0
@@ -17,6 +32,45 @@ class GlobalClock:
         self._const_time += delta_time
         self._time += delta_time * self._tick_speed * self._ticking
 
+    def advance(self, delta_time: float) -> int:
+        """
+        Adds the real time of a frame and returns how many fixed steps to tick through.
+        """
+        self._accumulator += delta_time
+        _steps = int(self._accumulator // self.c_fixed_step)
+        if _steps > self.c_max_steps:
+            self._dropped_steps += _steps - self.c_max_steps
+            _steps = self.c_max_steps
+            self._accumulator %= self.c_fixed_step
+        else:
+            self._accumulator -= _steps * self.c_fixed_step
+        self._alpha = self._accumulator / self.c_fixed_step
+        return _steps
+
+    def restart(self, _frame: int = 0, _time: float = 0.0, _const_time: float = 0.0):
+        """
+        Puts the clock back to a frame and time, so a replay starts from the same clock as its recording.
+        """
+        self._frame_time = _frame
+        self._time = _time
+        self._const_time = _const_time
+        self._delta_time = 0.0
+        self._accumulator = 0.0
+        self._alpha = 0.0
+
+    def snapshot(self) -> Tuple[float, float, float, float, float, float, int, int, bool]:
+        return (self._accumulator, self._alpha, self._time, self._const_time, self._delta_time, self._tick_speed,
+                self._frame_time, self._dropped_steps, self._ticking)
+
+    def restore(self, _accumulator: float, _alpha: float, _time: float, _const_time: float, _delta_time: float,
+                _tick_speed: float, _frame: int, _dropped_steps: int, _ticking: bool):
+        """
+        Puts every counter back as a snapshot had it, unlike restart() the step in progress is kept too.
+        """
+        self._accumulator, self._alpha, self._time, self._const_time = _accumulator, _alpha, _time, _const_time
+        self._delta_time, self._tick_speed = _delta_time, _tick_speed
+        self._frame_time, self._dropped_steps, self._ticking = _frame, _dropped_steps, _ticking
+
     def length(self, time: float):
         return self._time - time
 
@@ -55,6 +109,14 @@ class GlobalClock:
     def delta_const_time(self):
         return self._delta_time
 
+    @property
+    def alpha(self):
+        return self._alpha
+
+    @property
+    def dropped_steps(self):
+        return self._dropped_steps
+
     @property
     def tick_speed(self):
         return self._tick_speed
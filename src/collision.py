@@ -0,0 +1,597 @@
+from typing import Any, Callable, Dict, Hashable, List, Optional, Tuple, Union
+from math import ceil, floor, inf
+
+import numpy as np
+
+from src.clock import Clock
+from src.room_cache import RoomData
+from src.util import DEBUG, PROFILE, TILE_SIZE
+
+GROUND: int = 1
+ONE_WAY: int = 2
+SPIKES: int = 4
+SPAWN: int = 8
+
+LAYER_FLAGS: Dict[str, int] = {"ground": GROUND, "one_way": ONE_WAY, "spikes": SPIKES, "spawn_zones": SPAWN}
+
+
+class Tile:
+    """
+    A single solid cell of a CollisionGrid. It has the same edge properties as a tile sprite, so the player
+    states can keep reading .top, .left etc. from whatever they collided with.
+    """
+    __slots__ = ('column', 'row', 'left', 'bottom', 'right', 'top')
+
+    def __init__(self, _column: int, _row: int, _size: float, _depth: float = None):
+        self.column = _column
+        self.row = _row
+        self.left = _column * _size
+        self.right = self.left + _size
+        self.top = (_row + 1) * _size
+        self.bottom = self.top - (_depth or _size)
+
+    def __repr__(self):
+        return f"Tile({self.column}, {self.row})"
+
+    def __eq__(self, other):
+        return isinstance(other, Tile) and self.column == other.column and self.row == other.row
+
+    def __hash__(self):
+        return hash((self.column, self.row))
+
+    @property
+    def center_x(self):
+        return (self.left + self.right) / 2
+
+    @property
+    def center_y(self):
+        return (self.bottom + self.top) / 2
+
+    @property
+    def width(self):
+        return self.right - self.left
+
+    @property
+    def height(self):
+        return self.top - self.bottom
+
+
+class Contact:
+    """
+    The result of a sweep: how far along the move the box first touches something (0 when it started overlapping),
+    the normal of the face it touched, and the tile that face belongs to.
+    """
+    __slots__ = ('time', 'normal_x', 'normal_y', 'tile')
+
+    def __init__(self, _time: float, _normal_x: int, _normal_y: int, _tile: Tile):
+        self.time = _time
+        self.normal_x = _normal_x
+        self.normal_y = _normal_y
+        self.tile = _tile
+
+    def __repr__(self):
+        return f"Contact({self.time:.3f}, ({self.normal_x}, {self.normal_y}), {self.tile})"
+
+
+def _sweep(_rects, _tile_size: float, _left: float, _bottom: float, _right: float, _top: float,
+           _dx: float, _dy: float) -> Optional[Contact]:
+    """
+    Swept AABB against (column, row, last column, last row, flag) rectangles of cells. Solves the entry and exit
+    time of each axis, so nothing between the start and end of the move is skipped. Like the overlap queries,
+    a box which only ends up touching a face doesn't hit it.
+    """
+    _best, _best_key = None, None
+    for _column, _row, _last_column, _last_row, _flag in _rects:
+        _rect_left, _rect_right = _column * _tile_size, (_last_column + 1) * _tile_size
+        _rect_top = (_last_row + 1) * _tile_size
+        _rect_bottom = _rect_top - CollisionGrid.c_one_way_depth if _flag == ONE_WAY else _row * _tile_size
+
+        if _dx > 0.0:
+            _entry_x, _exit_x = (_rect_left - _right) / _dx, (_rect_right - _left) / _dx
+        elif _dx < 0.0:
+            _entry_x, _exit_x = (_rect_right - _left) / _dx, (_rect_left - _right) / _dx
+        elif _left < _rect_right and _right > _rect_left:
+            _entry_x, _exit_x = -inf, inf
+        else:
+            continue
+
+        if _dy > 0.0:
+            _entry_y, _exit_y = (_rect_bottom - _top) / _dy, (_rect_top - _bottom) / _dy
+        elif _dy < 0.0:
+            _entry_y, _exit_y = (_rect_top - _bottom) / _dy, (_rect_bottom - _top) / _dy
+        elif _bottom < _rect_top and _top > _rect_bottom:
+            _entry_y, _exit_y = -inf, inf
+        else:
+            continue
+
+        _entry, _exit = max(_entry_x, _entry_y), min(_exit_x, _exit_y)
+        if _entry >= _exit or _entry >= 1.0 or _exit <= 0.0:
+            continue
+
+        if _entry < 0.0:
+            # Already overlapping, the normal is along the axis it would take the least to push out on
+            _time = 0.0
+            _push_x = min(_right - _rect_left, _rect_right - _left)
+            _push_y = min(_top - _rect_bottom, _rect_top - _bottom)
+            if _push_x < _push_y:
+                _normal_x, _normal_y = (1 if _left + _right > _rect_left + _rect_right else -1), 0
+            else:
+                _normal_x, _normal_y = 0, (1 if _bottom + _top > _rect_bottom + _rect_top else -1)
+        elif _entry_x > _entry_y:
+            _time, _normal_x, _normal_y = _entry, (-1 if _dx > 0.0 else 1), 0
+        else:
+            _time, _normal_x, _normal_y = _entry, 0, (-1 if _dy > 0.0 else 1)
+
+        # The cell of the rectangle that was touched, picked the same way as first_hit when several are
+        _box_left, _box_top = _left + _dx * _time, _top + _dy * _time
+        if _time > 0.0 and _normal_y:
+            _cell_row = _last_row if _normal_y > 0 else _row
+        else:
+            _cell_row = max(min(_last_row, ceil(_box_top / _tile_size) - 1), _row)
+        if _time > 0.0 and _normal_x:
+            _cell_column = _last_column if _normal_x > 0 else _column
+        else:
+            _cell_column = min(max(_column, floor(_box_left / _tile_size)), _last_column)
+
+        _key = (_time, -_cell_row, _cell_column, _flag != GROUND)
+        if _best_key is None or _key < _best_key:
+            _best_key = _key
+            _best = (_time, _normal_x, _normal_y, _cell_column, _cell_row, _flag)
+
+    if _best is None:
+        return None
+    _time, _normal_x, _normal_y, _cell_column, _cell_row, _flag = _best
+    _depth = CollisionGrid.c_one_way_depth if _flag == ONE_WAY else None
+    return Contact(_time, _normal_x, _normal_y, Tile(_cell_column, _cell_row, _tile_size, _depth))
+
+
+def _slabs(_low: np.ndarray, _high: np.ndarray, _rect_low: np.ndarray, _rect_high: np.ndarray,
+           _delta: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    # Entry and exit time along one axis for arrays of boxes, the same cases as _sweep
+    with np.errstate(divide='ignore', invalid='ignore'):
+        _entry = np.where(_delta > 0.0, (_rect_low - _high) / _delta, (_rect_high - _low) / _delta)
+        _exit = np.where(_delta > 0.0, (_rect_high - _low) / _delta, (_rect_low - _high) / _delta)
+    _overlap = (_low < _rect_high) & (_high > _rect_low)
+    _still = _delta == 0.0
+    _entry = np.where(_still, np.where(_overlap, -inf, inf), _entry)
+    _exit = np.where(_still, np.where(_overlap, inf, -inf), _exit)
+    return _entry, _exit
+
+
+class CollisionGrid:
+    """
+    Dense occupancy grid of a room. Each cell holds the flags of every collision layer with a tile there, and row
+    0 is the bottom of the room so cell coordinates match world coordinates.
+
+    Like the sprite hit boxes, a box only touching the edge of a tile does not overlap it. One way tiles are only
+    solid in a band at their top, the same as the opaque part of their texture.
+    """
+    c_one_way_depth: float = 4.0
+
+    def __init__(self, _data: RoomData, _tile_size: float = TILE_SIZE):
+        self._tile_size = _tile_size
+        self._width = _data.width
+        self._height = _data.height
+
+        self._cells: np.ndarray = np.zeros((self._height, self._width), dtype=np.uint8)
+        for _layer, _flag in LAYER_FLAGS.items():
+            if _layer not in _data.tile_layers:
+                continue
+            _gids = np.frombuffer(_data.layer(_layer), dtype=np.uint32).reshape(self._height, self._width)
+            self._cells[_gids[::-1] != 0] |= _flag
+
+    def cell_range(self, _left: float, _bottom: float, _right: float, _top: float) -> Tuple[int, int, int, int]:
+        """
+        The first and last column and row touched by the box, clipped to the grid. An empty range has the first
+        index after the last.
+        """
+        _size = self._tile_size
+        _c0 = max(floor(_left / _size), 0)
+        _c1 = min(ceil(_right / _size) - 1, self._width - 1)
+        _r0 = max(floor(_bottom / _size), 0)
+        _r1 = min(ceil(_top / _size) - 1, self._height - 1)
+        return _c0, _c1, _r0, _r1
+
+    def _solid_cells(self, _c0: int, _c1: int, _r0: int, _r1: int,
+                     _bottom: float, _top: float, _mask: int) -> Tuple[np.ndarray, np.ndarray]:
+        # Rows and columns (relative to _r0, _c0) of the cells the box hits, taking the one way bands into account
+        _flags = self._cells[_r0:_r1 + 1, _c0:_c1 + 1] & _mask
+        _rows, _columns = np.nonzero(_flags)
+        if not len(_rows) or not _mask & ONE_WAY:
+            return _rows, _columns
+
+        _band_only = _flags[_rows, _columns] == ONE_WAY
+        if _band_only.any():
+            _cell_top = (_r0 + _rows + 1) * self._tile_size
+            _in_band = (_bottom < _cell_top) & (_top > _cell_top - self.c_one_way_depth)
+            _keep = ~_band_only | _in_band
+            _rows, _columns = _rows[_keep], _columns[_keep]
+        return _rows, _columns
+
+    def _tile(self, _column: int, _row: int, _mask: int) -> Tile:
+        if self._cells[_row, _column] & _mask & (GROUND | ONE_WAY) == ONE_WAY:
+            return Tile(_column, _row, self._tile_size, self.c_one_way_depth)
+        return Tile(_column, _row, self._tile_size)
+
+    def overlaps(self, _left: float, _bottom: float, _right: float, _top: float, _mask: int) -> bool:
+        _c0, _c1, _r0, _r1 = self.cell_range(_left, _bottom, _right, _top)
+        if _c0 > _c1 or _r0 > _r1:
+            return False
+        _rows, _columns = self._solid_cells(_c0, _c1, _r0, _r1, _bottom, _top, _mask)
+        return bool(len(_rows))
+
+    def first_hit(self, _left: float, _bottom: float, _right: float, _top: float, _mask: int) -> Optional[Tile]:
+        """
+        The highest solid tile overlapping the box, leftmost first when a row has several.
+        """
+        _c0, _c1, _r0, _r1 = self.cell_range(_left, _bottom, _right, _top)
+        if _c0 > _c1 or _r0 > _r1:
+            return None
+
+        _rows, _columns = self._solid_cells(_c0, _c1, _r0, _r1, _bottom, _top, _mask)
+        if not len(_rows):
+            return None
+
+        _index = np.lexsort((_columns, -_rows))[0]
+        return self._tile(_c0 + int(_columns[_index]), _r0 + int(_rows[_index]), _mask)
+
+    def first_along(self, _left: float, _bottom: float, _right: float, _top: float,
+                    _dx: float, _dy: float, _mask: int) -> Optional[Tile]:
+        """
+        The first solid tile met when the box moves by (_dx, _dy) along a single axis. Returns the nearest column
+        (topmost tile in it) for horizontal moves and the nearest row (leftmost tile in it) for vertical ones.
+        """
+        _left, _right = min(_left, _left + _dx), max(_right, _right + _dx)
+        _bottom, _top = min(_bottom, _bottom + _dy), max(_top, _top + _dy)
+        _c0, _c1, _r0, _r1 = self.cell_range(_left, _bottom, _right, _top)
+        if _c0 > _c1 or _r0 > _r1:
+            return None
+
+        _rows, _columns = self._solid_cells(_c0, _c1, _r0, _r1, _bottom, _top, _mask)
+        if not len(_rows):
+            return None
+
+        if _dx:
+            _near = _columns if _dx > 0 else -_columns
+            _index = np.lexsort((-_rows, _near))[0]
+        else:
+            _near = _rows if _dy > 0 else -_rows
+            _index = np.lexsort((_columns, _near))[0]
+        return self._tile(_c0 + int(_columns[_index]), _r0 + int(_rows[_index]), _mask)
+
+    def sweep(self, _left: float, _bottom: float, _right: float, _top: float,
+              _dx: float, _dy: float, _mask: int) -> Optional[Contact]:
+        """
+        The first tile the box touches while moving by (_dx, _dy), see _sweep.
+        """
+        _c0, _c1, _r0, _r1 = self.cell_range(min(_left, _left + _dx), min(_bottom, _bottom + _dy),
+                                             max(_right, _right + _dx), max(_top, _top + _dy))
+        if _c0 > _c1 or _r0 > _r1:
+            return None
+
+        _flags = self._cells[_r0:_r1 + 1, _c0:_c1 + 1] & _mask
+        _rows, _columns = np.nonzero(_flags)
+        _rects = []
+        for _row, _column in zip((_rows + _r0).tolist(), (_columns + _c0).tolist()):
+            _flag = ONE_WAY if self._cells[_row, _column] & _mask & (GROUND | ONE_WAY) == ONE_WAY else GROUND
+            _rects.append((_column, _row, _column, _row, _flag))
+        return _sweep(_rects, self._tile_size, _left, _bottom, _right, _top, _dx, _dy)
+
+    def sweep_many(self, _left: np.ndarray, _bottom: np.ndarray, _right: np.ndarray, _top: np.ndarray,
+                   _dx: np.ndarray, _dy: np.ndarray, _mask) -> Tuple[np.ndarray, np.ndarray, np.ndarray,
+                                                                     np.ndarray, np.ndarray]:
+        """
+        sweep for arrays of boxes at once, _mask can be one mask or one per box. Returns whether each box hit
+        something, its time of impact, and the column, row and one way band flag of the tile it hit. Picks the
+        same tile as sweep: earliest first, then highest, then leftmost.
+        """
+        _size = self._tile_size
+        _count = len(_left)
+        _mask = np.broadcast_to(np.asarray(_mask, dtype=np.uint8), (_count,))
+        _c0 = np.maximum(np.floor(np.minimum(_left, _left + _dx) / _size), 0).astype(np.int64)
+        _c1 = np.minimum(np.ceil(np.maximum(_right, _right + _dx) / _size) - 1, self._width - 1).astype(np.int64)
+        _r0 = np.maximum(np.floor(np.minimum(_bottom, _bottom + _dy) / _size), 0).astype(np.int64)
+        _r1 = np.minimum(np.ceil(np.maximum(_top, _top + _dy) / _size) - 1, self._height - 1).astype(np.int64)
+
+        _time = np.full(_count, inf)
+        _columns = np.zeros(_count, dtype=np.int64)
+        _rows = np.zeros(_count, dtype=np.int64)
+        _one_way = np.zeros(_count, dtype=bool)
+        if not _count:
+            return _time < inf, _time, _columns, _rows, _one_way
+
+        # Every box tries the same window of cells relative to its first one, wide enough for the largest move
+        for _i in range(max(int((_c1 - _c0).max()) + 1, 0)):
+            for _j in range(max(int((_r1 - _r0).max()) + 1, 0)):
+                _column, _row = _c0 + _i, _r0 + _j
+                _valid = (_column <= _c1) & (_row <= _r1)
+                _flags = np.zeros(_count, dtype=np.uint8)
+                _flags[_valid] = self._cells[_row[_valid], _column[_valid]] & _mask[_valid]
+                _valid &= _flags != 0
+                if not _valid.any():
+                    continue
+
+                _band = _flags & (GROUND | ONE_WAY) == ONE_WAY
+                _rect_left = _column * _size
+                _rect_top = (_row + 1) * _size
+                _rect_bottom = np.where(_band, _rect_top - self.c_one_way_depth, _row * _size)
+                _entry_x, _exit_x = _slabs(_left, _right, _rect_left, _rect_left + _size, _dx)
+                _entry_y, _exit_y = _slabs(_bottom, _top, _rect_bottom, _rect_top, _dy)
+                _entry, _exit = np.maximum(_entry_x, _entry_y), np.minimum(_exit_x, _exit_y)
+
+                _hit = _valid & (_entry < _exit) & (_entry < 1.0) & (_exit > 0.0)
+                _at = np.maximum(_entry, 0.0)
+                _better = _hit & ((_at < _time) | ((_at == _time) & ((_row > _rows) |
+                                                                    ((_row == _rows) & (_column < _columns)))))
+                _time[_better] = _at[_better]
+                _columns[_better] = _column[_better]
+                _rows[_better] = _row[_better]
+                _one_way[_better] = _band[_better]
+        return _time < inf, _time, _columns, _rows, _one_way
+
+    def flags(self, _column: int, _row: int) -> int:
+        if 0 <= _column < self._width and 0 <= _row < self._height:
+            return int(self._cells[_row, _column])
+        return 0
+
+    @property
+    def cells(self) -> np.ndarray:
+        return self._cells
+
+    @property
+    def tile_size(self):
+        return self._tile_size
+
+    @property
+    def width(self):
+        return self._width
+
+    @property
+    def height(self):
+        return self._height
+
+
+class CollisionMesh:
+    """
+    The collision layers of a room as the greedy meshed rectangles stored in its RoomData, bucketed so a query only
+    tests the few rectangles near it. Queries clip the rectangle they hit back to the cell a CollisionGrid would
+    return, so both give the same tiles.
+    """
+    c_bucket_size: int = 8
+
+    def __init__(self, _data: RoomData, _tile_size: float = TILE_SIZE):
+        self._tile_size = _tile_size
+        self._width = _data.width
+        self._height = _data.height
+
+        # (column, row, last column, last row, flag), ground before the rest so it wins ties on a shared cell
+        self._rects: List[Tuple[int, int, int, int, int]] = []
+        for _layer, _flag in LAYER_FLAGS.items():
+            self._rects.extend((*_rect, _flag) for _rect in _data.colliders(_layer))
+
+        self._buckets: Dict[Tuple[int, int], List[Tuple[int, int, int, int, int]]] = {}
+        _size = self.c_bucket_size
+        for _rect in self._rects:
+            for _bx in range(_rect[0] // _size, _rect[2] // _size + 1):
+                for _by in range(_rect[1] // _size, _rect[3] // _size + 1):
+                    self._buckets.setdefault((_bx, _by), []).append(_rect)
+
+    def cell_range(self, _left: float, _bottom: float, _right: float, _top: float) -> Tuple[int, int, int, int]:
+        _size = self._tile_size
+        return floor(_left / _size), ceil(_right / _size) - 1, floor(_bottom / _size), ceil(_top / _size) - 1
+
+    def _candidates(self, _c0: int, _c1: int, _r0: int, _r1: int, _mask: int) -> List[Tuple[int, int, int, int, int]]:
+        # Every rectangle in _mask with a cell in the range
+        _size = self.c_bucket_size
+        _seen = set()
+        for _bx in range(_c0 // _size, _c1 // _size + 1):
+            for _by in range(_r0 // _size, _r1 // _size + 1):
+                for _rect in self._buckets.get((_bx, _by), ()):
+                    _column, _row, _last_column, _last_row, _flag = _rect
+                    if (_flag & _mask and _last_column >= _c0 and _column <= _c1 and _last_row >= _r0 and
+                            _row <= _r1):
+                        _seen.add(_rect)
+        return list(_seen)
+
+    def _hits(self, _left: float, _bottom: float, _right: float, _top: float, _mask: int):
+        # The part of each rectangle the box hits as (first column, last column, first row, last row, flag)
+        _c0, _c1, _r0, _r1 = self.cell_range(_left, _bottom, _right, _top)
+        if _c0 > _c1 or _r0 > _r1:
+            return []
+
+        _hits = []
+        for _column, _row, _last_column, _last_row, _flag in self._candidates(_c0, _c1, _r0, _r1, _mask):
+            if _flag == ONE_WAY:
+                # One way rectangles are single rows which are only solid in a band at their top
+                _cell_top = (_row + 1) * self._tile_size
+                if not (_bottom < _cell_top and _top > _cell_top - CollisionGrid.c_one_way_depth):
+                    continue
+
+            _hits.append((max(_column, _c0), min(_last_column, _c1), max(_row, _r0), min(_last_row, _r1), _flag))
+        return _hits
+
+    def _tile(self, _column: int, _row: int, _flag: int) -> Tile:
+        if _flag == ONE_WAY:
+            return Tile(_column, _row, self._tile_size, CollisionGrid.c_one_way_depth)
+        return Tile(_column, _row, self._tile_size)
+
+    def overlaps(self, _left: float, _bottom: float, _right: float, _top: float, _mask: int) -> bool:
+        return bool(self._hits(_left, _bottom, _right, _top, _mask))
+
+    def first_hit(self, _left: float, _bottom: float, _right: float, _top: float, _mask: int) -> Optional[Tile]:
+        """
+        The highest solid tile overlapping the box, leftmost first when a row has several.
+        """
+        _hits = self._hits(_left, _bottom, _right, _top, _mask)
+        if not _hits:
+            return None
+        _c0, _c1, _r0, _r1, _flag = min(_hits, key=lambda _hit: (-_hit[3], _hit[0], _hit[4] != GROUND))
+        return self._tile(_c0, _r1, _flag)
+
+    def first_along(self, _left: float, _bottom: float, _right: float, _top: float,
+                    _dx: float, _dy: float, _mask: int) -> Optional[Tile]:
+        """
+        The first solid tile met when the box moves by (_dx, _dy) along a single axis, see CollisionGrid.first_along.
+        """
+        _left, _right = min(_left, _left + _dx), max(_right, _right + _dx)
+        _bottom, _top = min(_bottom, _bottom + _dy), max(_top, _top + _dy)
+        _hits = self._hits(_left, _bottom, _right, _top, _mask)
+        if not _hits:
+            return None
+
+        if _dx > 0:
+            _c0, _c1, _r0, _r1, _flag = min(_hits, key=lambda _hit: (_hit[0], -_hit[3], _hit[4] != GROUND))
+            return self._tile(_c0, _r1, _flag)
+        if _dx < 0:
+            _c0, _c1, _r0, _r1, _flag = min(_hits, key=lambda _hit: (-_hit[1], -_hit[3], _hit[4] != GROUND))
+            return self._tile(_c1, _r1, _flag)
+        if _dy > 0:
+            _c0, _c1, _r0, _r1, _flag = min(_hits, key=lambda _hit: (_hit[2], _hit[0], _hit[4] != GROUND))
+            return self._tile(_c0, _r0, _flag)
+        _c0, _c1, _r0, _r1, _flag = min(_hits, key=lambda _hit: (-_hit[3], _hit[0], _hit[4] != GROUND))
+        return self._tile(_c0, _r1, _flag)
+
+    def sweep(self, _left: float, _bottom: float, _right: float, _top: float,
+              _dx: float, _dy: float, _mask: int) -> Optional[Contact]:
+        """
+        The first tile the box touches while moving by (_dx, _dy), see _sweep.
+        """
+        _c0, _c1, _r0, _r1 = self.cell_range(min(_left, _left + _dx), min(_bottom, _bottom + _dy),
+                                             max(_right, _right + _dx), max(_top, _top + _dy))
+        if _c0 > _c1 or _r0 > _r1:
+            return None
+        return _sweep(self._candidates(_c0, _c1, _r0, _r1, _mask), self._tile_size,
+                      _left, _bottom, _right, _top, _dx, _dy)
+
+    @property
+    def rects(self) -> List[Tuple[int, int, int, int, int]]:
+        return self._rects
+
+    @property
+    def tile_size(self):
+        return self._tile_size
+
+    @property
+    def width(self):
+        return self._width
+
+    @property
+    def height(self):
+        return self._height
+
+
+class QueryCache:
+    """
+    Remembers the answers to collision queries by their shape. The tiles of a room never move, so the same query
+    always gets the same answer, but answers are only kept for the frame they were asked on and the one after. A
+    query asked again in the same step, or by a player who hasn't moved since the last one, isn't worked out again.
+
+    Hits and misses are only counted when the cache is counted, by default in a debug or profiled run. Counting
+    costs each query an extra attribute write, which a release build doesn't pay for stats nothing shows.
+    """
+    c_counted: bool = DEBUG or PROFILE is not None
+
+    def __init__(self, _counted: bool = None):
+        self._frame: int = Clock.frame
+        self._current: Dict[Hashable, Any] = dict()
+        self._previous: Dict[Hashable, Any] = dict()
+
+        self._counted: bool = self.c_counted if _counted is None else _counted
+        self._hits: int = 0
+        self._misses: int = 0
+
+    def get(self, _key: Hashable, _query: Callable[[], Any]) -> Any:
+        if Clock.frame != self._frame:
+            self._previous = self._current if Clock.frame == self._frame + 1 else dict()
+            self._current = dict()
+            self._frame = Clock.frame
+
+        if _key in self._current:
+            if self._counted:
+                self._hits += 1
+            return self._current[_key]
+        if _key in self._previous:
+            if self._counted:
+                self._hits += 1
+            _result = self._current[_key] = self._previous[_key]
+            return _result
+
+        if self._counted:
+            self._misses += 1
+        _result = self._current[_key] = _query()
+        return _result
+
+    def clear(self):
+        self._current, self._previous = dict(), dict()
+        self._hits = self._misses = 0
+
+    @property
+    def counted(self) -> bool:
+        return self._counted
+
+    @counted.setter
+    def counted(self, _counted: bool):
+        self._counted = _counted
+
+    @property
+    def hits(self):
+        return self._hits
+
+    @property
+    def misses(self):
+        return self._misses
+
+    @property
+    def hit_rate(self) -> float:
+        _total = self._hits + self._misses
+        return self._hits / _total if _total else 0.0
+
+
+class CollisionLayer:
+    """
+    A view of a CollisionGrid or CollisionMesh limited to some of its layers, this is what the player hitbox queries.
+    With a QueryCache, repeated queries are answered from it.
+    """
+
+    def __init__(self, _grid: Union[CollisionGrid, CollisionMesh], _mask: int, _cache: QueryCache = None):
+        self._grid = _grid
+        self._mask = _mask
+        self._cache: Optional[QueryCache] = _cache
+
+    def overlaps(self, _left: float, _bottom: float, _right: float, _top: float) -> bool:
+        if self._cache is None:
+            return self._grid.overlaps(_left, _bottom, _right, _top, self._mask)
+        return self._cache.get((self._mask, 0, _left, _bottom, _right, _top),
+                               lambda: self._grid.overlaps(_left, _bottom, _right, _top, self._mask))
+
+    def first_hit(self, _left: float, _bottom: float, _right: float, _top: float) -> Optional[Tile]:
+        if self._cache is None:
+            return self._grid.first_hit(_left, _bottom, _right, _top, self._mask)
+        return self._cache.get((self._mask, 1, _left, _bottom, _right, _top),
+                               lambda: self._grid.first_hit(_left, _bottom, _right, _top, self._mask))
+
+    def first_along(self, _left: float, _bottom: float, _right: float, _top: float,
+                    _dx: float, _dy: float) -> Optional[Tile]:
+        if self._cache is None:
+            return self._grid.first_along(_left, _bottom, _right, _top, _dx, _dy, self._mask)
+        return self._cache.get((self._mask, 2, _left, _bottom, _right, _top, _dx, _dy),
+                               lambda: self._grid.first_along(_left, _bottom, _right, _top, _dx, _dy, self._mask))
+
+    def sweep(self, _left: float, _bottom: float, _right: float, _top: float,
+              _dx: float, _dy: float) -> Optional[Contact]:
+        if self._cache is None:
+            return self._grid.sweep(_left, _bottom, _right, _top, _dx, _dy, self._mask)
+        return self._cache.get((self._mask, 3, _left, _bottom, _right, _top, _dx, _dy),
+                               lambda: self._grid.sweep(_left, _bottom, _right, _top, _dx, _dy, self._mask))
+
+    @property
+    def grid(self):
+        return self._grid
+
+    @property
+    def mask(self):
+        return self._mask
+
+    @property
+    def cache(self) -> Optional[QueryCache]:
+        return self._cache
@@ -0,0 +1,419 @@
+from typing import Any, Dict, FrozenSet, List, Optional, Tuple
+
+import numpy as np
+from arcade import Sprite, SpriteList, Texture
+
+# An entity id is its generation above its index, so an id kept after the entity was destroyed never matches the
+# entity which reuses the index
+c_index_bits: int = 32
+c_index_mask: int = (1 << c_index_bits) - 1
+
+
+class Archetype:
+    """
+    Every entity with exactly one set of components. Each component is a column with a row per entity, packed so
+    the rows of the entities are always the first count rows and a system works on whole slices of them.
+    """
+    c_capacity: int = 16
+
+    def __init__(self, _components: FrozenSet[str], _schema: Dict[str, Tuple[np.dtype, Tuple[int, ...]]]):
+        self._components: FrozenSet[str] = _components
+        self._count: int = 0
+        self._capacity: int = self.c_capacity
+        self._columns: Dict[str, np.ndarray] = {_name: np.zeros((self._capacity, *_schema[_name][1]),
+                                                                dtype=_schema[_name][0]) for _name in _components}
+        self._entities: np.ndarray = np.zeros(self._capacity, dtype=np.int64)
+
+    def __repr__(self):
+        return f"Archetype({', '.join(sorted(self._components))}: {self._count})"
+
+    def __getitem__(self, _name: str) -> np.ndarray:
+        return self._columns[_name][:self._count]
+
+    def __setitem__(self, _name: str, _value: Any):
+        self._columns[_name][:self._count] = _value
+
+    def __len__(self):
+        return self._count
+
+    def _reserve(self, _count: int):
+        if _count <= self._capacity:
+            return
+        while self._capacity < _count:
+            self._capacity *= 2
+        for _name, _column in self._columns.items():
+            _grown = np.zeros((self._capacity, *_column.shape[1:]), dtype=_column.dtype)
+            _grown[:self._count] = _column[:self._count]
+            self._columns[_name] = _grown
+        _entities = np.zeros(self._capacity, dtype=np.int64)
+        _entities[:self._count] = self._entities[:self._count]
+        self._entities = _entities
+
+    def add(self, _entities: np.ndarray, _values: Dict[str, Any]) -> int:
+        """
+        Appends a row for each of _entities, each component set from _values which is broadcast over the rows.
+        Returns the first of the new rows.
+        """
+        _first, _count = self._count, len(_entities)
+        self._reserve(_first + _count)
+        self._entities[_first:_first + _count] = _entities
+        for _name, _column in self._columns.items():
+            _column[_first:_first + _count] = _values[_name]
+        self._count += _count
+        return _first
+
+    def append(self, _entity: int, _values: Dict[str, Any]) -> int:
+        _row = self._count
+        self._reserve(_row + 1)
+        self._entities[_row] = _entity
+        for _name, _column in self._columns.items():
+            _column[_row] = _values[_name]
+        self._count += 1
+        return _row
+
+    def remove(self, _row: int) -> int:
+        """
+        Removes a row by moving the last row into it, and returns the entity which moved or -1 if it was the last.
+        """
+        _last = self._count - 1
+        self._count = _last
+        if _row == _last:
+            return -1
+        for _column in self._columns.values():
+            _column[_row] = _column[_last]
+        self._entities[_row] = self._entities[_last]
+        return int(self._entities[_row])
+
+    def remove_rows(self, _rows: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Removes many rows at once, keeping the order of the rest. Returns the entities which moved and their rows.
+        """
+        _keep = np.ones(self._count, dtype=bool)
+        _keep[_rows] = False
+        _kept = np.nonzero(_keep)[0]
+        _first = int(_rows.min())
+        _moved = _kept[_kept > _first]
+        _to = np.arange(_first, _first + len(_moved))
+        for _column in self._columns.values():
+            _column[_to] = _column[_moved]
+        self._entities[_to] = self._entities[_moved]
+        self._count = len(_kept)
+        return self._entities[_to], _to
+
+    def row(self, _row: int) -> Dict[str, Any]:
+        return {_name: _column[_row].copy() for _name, _column in self._columns.items()}
+
+    @property
+    def components(self) -> FrozenSet[str]:
+        return self._components
+
+    @property
+    def entities(self) -> np.ndarray:
+        return self._entities[:self._count]
+
+    @property
+    def capacity(self) -> int:
+        return self._capacity
+
+
+class World:
+    """
+    Entities and their components, stored by archetype. Components are registered once with a dtype and a
+    shape, a position is ("position", np.float64, (2,)) and a frame counter ("frame", np.int32). query() hands back
+    the archetypes holding every asked for component, so a system runs once per archetype over its columns.
+
+    Creating or destroying many entities at once with create_many and destroy_many costs a handful of numpy calls
+    whatever the count, one at a time each is a few dictionary lookups.
+    """
+    c_capacity: int = 64
+    # Fewer entities than this are destroyed one at a time, cheaper than sorting them out in bulk
+    c_bulk_count: int = 16
+
+    def __init__(self):
+        self._schema: Dict[str, Tuple[np.dtype, Tuple[int, ...]]] = dict()
+        self._archetypes: List[Archetype] = []
+        self._by_components: Dict[FrozenSet[str], int] = dict()
+        self._queries: Dict[FrozenSet[str], List[Archetype]] = dict()
+
+        # Per entity index, its generation, which archetype it is in and at which row, -1 when it is free
+        self._generations: np.ndarray = np.zeros(self.c_capacity, dtype=np.int64)
+        self._archetype_of: np.ndarray = np.full(self.c_capacity, -1, dtype=np.int32)
+        self._rows: np.ndarray = np.zeros(self.c_capacity, dtype=np.int64)
+        self._free: List[int] = []
+        self._used: int = 0
+
+    def register(self, _name: str, _dtype=np.float64, _shape: Tuple[int, ...] = ()):
+        self._schema[_name] = (np.dtype(_dtype), tuple(_shape))
+
+    def _archetype(self, _components: FrozenSet[str]) -> int:
+        _id = self._by_components.get(_components)
+        if _id is None:
+            _unknown = _components - self._schema.keys()
+            if _unknown:
+                raise KeyError(f"components {', '.join(sorted(_unknown))} were never registered")
+            _id = self._by_components[_components] = len(self._archetypes)
+            self._archetypes.append(Archetype(_components, self._schema))
+            self._queries = dict()
+        return _id
+
+    def _reserve(self, _count: int):
+        _capacity = len(self._generations)
+        if _count <= _capacity:
+            return
+        while _capacity < _count:
+            _capacity *= 2
+        _extra = _capacity - len(self._generations)
+        self._generations = np.concatenate((self._generations, np.zeros(_extra, dtype=np.int64)))
+        self._archetype_of = np.concatenate((self._archetype_of, np.full(_extra, -1, dtype=np.int32)))
+        self._rows = np.concatenate((self._rows, np.zeros(_extra, dtype=np.int64)))
+
+    def create(self, **_values) -> int:
+        if self._free:
+            _index = self._free.pop()
+        else:
+            _index = self._used
+            self._reserve(_index + 1)
+            self._used += 1
+        _id = self._archetype(frozenset(_values))
+        _entity = int(self._generations[_index]) << c_index_bits | _index
+        self._rows[_index] = self._archetypes[_id].append(_entity, _values)
+        self._archetype_of[_index] = _id
+        return _entity
+
+    def create_many(self, _count: int, **_values) -> np.ndarray:
+        """
+        Makes _count entities with the components named in _values, each value broadcast over the new entities.
+        Returns their ids.
+        """
+        _reused = min(_count, len(self._free))
+        _indices = np.empty(_count, dtype=np.int64)
+        if _reused:
+            _indices[:_reused] = self._free[-_reused:]
+            del self._free[-_reused:]
+        _new = _count - _reused
+        self._reserve(self._used + _new)
+        _indices[_reused:] = np.arange(self._used, self._used + _new)
+        self._used += _new
+
+        _id = self._archetype(frozenset(_values))
+        _entities = (self._generations[_indices] << c_index_bits) | _indices
+        _first = self._archetypes[_id].add(_entities, _values)
+        self._archetype_of[_indices] = _id
+        self._rows[_indices] = np.arange(_first, _first + _count)
+        return _entities
+
+    def alive(self, _entity: int) -> bool:
+        _index = _entity & c_index_mask
+        return (_index < self._used and self._archetype_of[_index] >= 0 and
+                self._generations[_index] == _entity >> c_index_bits)
+
+    def _locate(self, _entity: int) -> Tuple[Archetype, int]:
+        if not self.alive(_entity):
+            raise KeyError(f"entity {_entity} is not alive")
+        _index = _entity & c_index_mask
+        return self._archetypes[self._archetype_of[_index]], int(self._rows[_index])
+
+    def destroy(self, _entity: int):
+        _archetype, _row = self._locate(_entity)
+        _moved = _archetype.remove(_row)
+        if _moved >= 0:
+            self._rows[_moved & c_index_mask] = _row
+        self._free_index(_entity & c_index_mask)
+
+    def _free_index(self, _index):
+        self._generations[_index] += 1
+        self._archetype_of[_index] = -1
+        if np.ndim(_index):
+            self._free.extend(_index.tolist())
+        else:
+            self._free.append(int(_index))
+
+    def destroy_many(self, _entities: np.ndarray):
+        """
+        Destroys every live entity of _entities, ids which are stale or repeated are skipped.
+        """
+        if len(_entities) <= self.c_bulk_count:
+            for _entity in np.asarray(_entities).tolist():
+                if self.alive(_entity):
+                    self.destroy(_entity)
+            return
+        _entities = np.unique(np.asarray(_entities, dtype=np.int64))
+        _indices = _entities & c_index_mask
+        _valid = _indices < self._used
+        _entities, _indices = _entities[_valid], _indices[_valid]
+        _live = (self._archetype_of[_indices] >= 0) & (self._generations[_indices] == _entities >> c_index_bits)
+        _indices = _indices[_live]
+        if not len(_indices):
+            return
+
+        _archetypes = self._archetype_of[_indices]
+        for _id in np.unique(_archetypes).tolist():
+            _moved, _rows = self._archetypes[_id].remove_rows(self._rows[_indices[_archetypes == _id]])
+            self._rows[_moved & c_index_mask] = _rows
+        self._free_index(_indices)
+
+    def get(self, _entity: int, _name: str) -> Any:
+        _archetype, _row = self._locate(_entity)
+        return _archetype[_name][_row]
+
+    def set(self, _entity: int, _name: str, _value: Any):
+        _archetype, _row = self._locate(_entity)
+        _archetype[_name][_row] = _value
+
+    def has(self, _entity: int, _name: str) -> bool:
+        return _name in self._locate(_entity)[0].components
+
+    def add_components(self, _entity: int, **_values):
+        """
+        Gives an entity more components, or new values for ones it has, moving it to the archetype it now fits.
+        """
+        self._move(_entity, _values, ())
+
+    def remove_components(self, _entity: int, *_names: str):
+        self._move(_entity, dict(), _names)
+
+    def _move(self, _entity: int, _add: Dict[str, Any], _remove: Tuple[str, ...]):
+        _archetype, _row = self._locate(_entity)
+        _values = _archetype.row(_row)
+        _values.update(_add)
+        for _name in _remove:
+            _values.pop(_name, None)
+
+        _id = self._archetype(frozenset(_values))
+        if self._archetypes[_id] is _archetype:
+            for _name, _value in _add.items():
+                _archetype[_name][_row] = _value
+            return
+        _moved = _archetype.remove(_row)
+        if _moved >= 0:
+            self._rows[_moved & c_index_mask] = _row
+        _index = _entity & c_index_mask
+        self._rows[_index] = self._archetypes[_id].add(np.array([_entity], dtype=np.int64), _values)
+        self._archetype_of[_index] = _id
+
+    def query(self, *_names: str) -> List[Archetype]:
+        """
+        The archetypes with every component in _names which have any entities.
+        """
+        _key = frozenset(_names)
+        _matches = self._queries.get(_key)
+        if _matches is None:
+            _matches = self._queries[_key] = [_archetype for _archetype in self._archetypes
+                                              if _key <= _archetype.components]
+        return [_archetype for _archetype in _matches if _archetype._count]
+
+    def count(self, *_names: str) -> int:
+        return sum(len(_archetype) for _archetype in self.query(*_names))
+
+    def clear(self):
+        for _archetype in self._archetypes:
+            if len(_archetype):
+                self.destroy_many(_archetype.entities.copy())
+
+    def __len__(self):
+        return self._used - len(self._free)
+
+    @property
+    def archetypes(self) -> List[Archetype]:
+        return self._archetypes
+
+
+class SpriteSync:
+    """
+    Draws the entities with a position and a texture component through one SpriteList. Once a frame sync() makes
+    the list as long as there are such entities and writes the rows of each archetype into the sprites in order,
+    so entities aren't tied to a sprite and destroying one never searches the list. A texture component is an
+    index into _textures.
+
+    Positions are written straight into the list's position buffer, one numpy assignment an archetype, so the
+    sprites' own positions aren't kept and they are only for drawing. The buffer is private to arcade, so when a
+    SpriteList doesn't have it each sprite's position is set instead. Textures and scales are set on a sprite when
+    they change.
+    """
+
+    def __init__(self, _world: World, _textures: List[Texture], _position: str = "position",
+                 _texture: str = "texture", _scale: Optional[str] = None):
+        self._world: World = _world
+        self._textures: List[Texture] = _textures
+        self._position: str = _position
+        self._texture: str = _texture
+        self._scale: Optional[str] = _scale
+
+        self._sprites: SpriteList = SpriteList(lazy=True)
+        self._buffered: bool = (hasattr(self._sprites, "_sprite_pos_data") and
+                                hasattr(self._sprites, "_sprite_pos_changed"))
+        # Per sprite, its slot in the list's buffers and the texture and scale it was last given
+        self._slots: np.ndarray = np.zeros(0, dtype=np.int64)
+        self._shown: np.ndarray = np.zeros(0, dtype=np.int64)
+        self._scales: np.ndarray = np.zeros((0, 2))
+
+    def _resize(self, _count: int):
+        _kept = min(_count, len(self._sprites))
+        while len(self._sprites) > _count:
+            self._sprites.pop()
+        while len(self._sprites) < _count:
+            _sprite = Sprite(texture=self._textures[0])
+            _sprite.scale_xy = (1.0, 1.0)
+            self._sprites.append(_sprite)
+        _slots = self._sprites.sprite_slot
+        self._slots = np.array([_slots[_sprite] for _sprite in self._sprites.sprite_list], dtype=np.int64)
+        self._shown = np.concatenate((self._shown[:_kept], np.zeros(_count - _kept, dtype=np.int64)))
+        self._scales = np.concatenate((self._scales[:_kept], np.ones((_count - _kept, 2))))
+
+    def sync(self):
+        _archetypes = self._world.query(self._position, self._texture)
+        _count = sum(len(_archetype) for _archetype in _archetypes)
+        if _count != len(self._sprites):
+            self._resize(_count)
+        if not _count:
+            return
+
+        # The buffer is reallocated when the list grows, so the view is taken again every time
+        if self._buffered:
+            _positions = np.frombuffer(self._sprites._sprite_pos_data, dtype=np.float32).reshape(-1, 2)
+        _sprites, _first = self._sprites.sprite_list, 0
+        for _archetype in _archetypes:
+            _last = _first + len(_archetype)
+            if self._buffered:
+                _positions[self._slots[_first:_last]] = _archetype[self._position]
+            else:
+                for _sprite, _position in zip(_sprites[_first:_last], _archetype[self._position].tolist()):
+                    _sprite.position = _position
+
+            _indices = _archetype[self._texture]
+            for _row in np.nonzero(self._shown[_first:_last] != _indices)[0].tolist():
+                _sprites[_first + _row].texture = self._textures[_indices[_row]]
+            self._shown[_first:_last] = _indices
+
+            if self._scale is not None:
+                _scales = _archetype[self._scale]
+                for _row in np.nonzero((self._scales[_first:_last] != _scales).any(axis=1))[0].tolist():
+                    _sprites[_first + _row].scale_xy = tuple(_scales[_row].tolist())
+                self._scales[_first:_last] = _scales
+            _first = _last
+        if self._buffered:
+            self._sprites._sprite_pos_changed = True
+
+    def draw(self):
+        self.sync()
+        self._sprites.draw(pixelated=True)
+
+    @property
+    def sprites(self) -> SpriteList:
+        return self._sprites
+
+    @property
+    def positions(self) -> np.ndarray:
+        """
+        Where each sprite is drawn, in the order of the list.
+        """
+        if not self._buffered:
+            return np.array([_sprite.position for _sprite in self._sprites.sprite_list], dtype=np.float32)
+        return np.frombuffer(self._sprites._sprite_pos_data, dtype=np.float32).reshape(-1, 2)[self._slots]
+
+    @property
+    def buffered(self) -> bool:
+        """
+        Whether positions are written straight into the list's buffer, rather than set on each sprite.
+        """
+        return self._buffered
@@ -0,0 +1,391 @@
+from typing import Any, Dict, List, Tuple, Type
+from math import ceil, floor, pi
+
+import numpy as np
+from arcade import SpriteList
+
+from src.clock import Clock
+from src.room_cache import FLIPPED_HORIZONTALLY
+from src.util import TILE_SIZE
+
+IDLE, MOVE, HURT, DEAD = range(4)
+
+
+class EnemyType:
+    """
+    What every enemy of a type does, as class constants and a classmethod moving all of them at once. Enemies of a
+    type are next to each other in the arrays, so update gets a slice and works on views of it.
+
+    The base type stands still, it is also used for types the game doesn't know.
+    """
+    c_health: int = 3
+    c_contact_damage: int = 1
+    c_speed: float = 0.0
+    c_state: int = IDLE
+
+    # Steps the enemy flinches for after being hit, it can't be hit again or move until it's over
+    c_hurt_frames: int = 24
+    # Animation frames and how many steps each is shown for
+    c_frames: int = 1
+    c_frame_steps: int = 12
+
+    @classmethod
+    def extents(cls, _properties: Dict[str, Any]) -> Tuple[float, float]:
+        """
+        How far from where it was placed the enemy may go, left or down and right or up, from its Tiled properties.
+        """
+        return 0.0, 0.0
+
+    @classmethod
+    def update(cls, _enemies: "Enemies", _slice: slice):
+        pass
+
+
+class Boar(EnemyType):
+    """
+    Trots back and forth, trot_left and trot_right are how far it goes either side of where it was placed.
+    """
+    c_health: int = 5
+    c_speed: float = 4.0 * TILE_SIZE
+    c_state: int = MOVE
+    c_frames: int = 4
+    c_frame_steps: int = 10
+
+    @classmethod
+    def extents(cls, _properties: Dict[str, Any]) -> Tuple[float, float]:
+        return float(_properties.get('trot_left', 0.0)), float(_properties.get('trot_right', 0.0))
+
+    @classmethod
+    def update(cls, _enemies: "Enemies", _slice: slice):
+        _x, _direction = _enemies.x[_slice], _enemies.direction[_slice]
+        _moving = _enemies.state[_slice] == MOVE
+        _x += _moving * _direction * (cls.c_speed * Clock.c_fixed_step)
+
+        _low = _enemies.home_x[_slice] - _enemies.low[_slice]
+        _high = _enemies.home_x[_slice] + _enemies.high[_slice]
+        _direction[_x <= _low] = 1.0
+        _direction[_x >= _high] = -1.0
+        np.clip(_x, _low, _high, out=_x)
+        _enemies.vel_x[_slice] = _moving * _direction * cls.c_speed
+
+
+class Hornet(EnemyType):
+    """
+    Hovers up and down around where it was placed, max_dist tiles either way.
+    """
+    c_health: int = 2
+    c_state: int = MOVE
+    c_frames: int = 2
+    c_frame_steps: int = 4
+    c_period: int = 240
+
+    @classmethod
+    def extents(cls, _properties: Dict[str, Any]) -> Tuple[float, float]:
+        _reach = float(_properties.get('max_dist', 1.0)) * TILE_SIZE
+        return _reach, _reach
+
+    @classmethod
+    def update(cls, _enemies: "Enemies", _slice: slice):
+        _moving = _enemies.state[_slice] == MOVE
+        # Each hornet is out of step with the others by its index
+        _phase = (Clock.frame + np.arange(_slice.start, _slice.stop) * 37) * (2.0 * pi / cls.c_period)
+        _y = _enemies.home_y[_slice] + _enemies.high[_slice] * np.sin(_phase)
+        _enemies.vel_y[_slice] = (_y - _enemies.y[_slice]) / Clock.c_fixed_step * _moving
+        _enemies.y[_slice] = np.where(_moving, _y, _enemies.y[_slice])
+
+
+class Snake(EnemyType):
+    c_health: int = 3
+    c_frames: int = 2
+    c_frame_steps: int = 30
+
+
+class Nest(EnemyType):
+    c_health: int = 8
+    c_contact_damage: int = 0
+
+
+ENEMY_TYPES: Dict[str, Type[EnemyType]] = {"boar": Boar, "hornet": Hornet, "snake": Snake, "nest": Nest}
+
+
+class Enemies:
+    """
+    Every enemy of a room, made from the objects of its enemies layer. Each component (position, velocity,
+    health, state, animation frame, ...) is one numpy array with an entry per enemy, sorted by type so update runs
+    each type once over its slice rather than each enemy on its own.
+
+    A broadphase of the live enemies, sorted by the c_cell_size cell their middle is in, is rebuilt after each
+    update and answers the box queries of the player's attacks and contact damage. Sprites are only touched when
+    drawing.
+    """
+    c_cell_size: float = 4 * TILE_SIZE
+    # Below this many live enemies sorting them into cells costs more than checking every one
+    c_scan_count: int = 32
+
+    def __init__(self, _objects: List[Dict[str, Any]], _px_width: float, _px_height: float,
+                 _sprites: SpriteList = None):
+        # Only tile objects are enemies, the same objects the sprites were made from
+        _objects = [_object for _object in _objects if _object['gid']]
+        _names = [_object['properties'].get('type', "") for _object in _objects]
+        _order = sorted(range(len(_objects)), key=lambda _index: _names[_index])
+
+        self._types: List[Type[EnemyType]] = []
+        self._slices: List[slice] = []
+        _type_ids = []
+        for _position, _index in enumerate(_order):
+            if not _position or _names[_index] != _names[_order[_position - 1]]:
+                self._types.append(ENEMY_TYPES.get(_names[_index], EnemyType))
+                self._slices.append(slice(_position, _position))
+            self._slices[-1] = slice(self._slices[-1].start, _position + 1)
+            _type_ids.append(len(self._types) - 1)
+        self._type: np.ndarray = np.array(_type_ids, dtype=np.uint8)
+
+        _objects = [_objects[_index] for _index in _order]
+        self._names: List[str] = [_names[_index] for _index in _order]
+        self._sprites: SpriteList = _sprites
+        self._sprite_order: List[int] = _order
+
+        _count = len(_objects)
+        self._half_width: np.ndarray = np.array([_object['width'] / 2 for _object in _objects], dtype=np.float64)
+        self._half_height: np.ndarray = np.array([_object['height'] / 2 for _object in _objects], dtype=np.float64)
+        self._home_x: np.ndarray = np.array([_object['x'] for _object in _objects], dtype=np.float64) + self._half_width
+        self._home_y: np.ndarray = _px_height - np.array([_object['y'] for _object in _objects],
+                                                         dtype=np.float64) + self._half_height
+        self._x: np.ndarray = self._home_x.copy()
+        self._y: np.ndarray = self._home_y.copy()
+        self._vel_x: np.ndarray = np.zeros(_count)
+        self._vel_y: np.ndarray = np.zeros(_count)
+        self._direction: np.ndarray = np.array([-1.0 if _object['gid'] & FLIPPED_HORIZONTALLY else 1.0
+                                                for _object in _objects])
+
+        _types = [self._types[_id] for _id in _type_ids]
+        _extents = [_type.extents(_object['properties']) for _type, _object in zip(_types, _objects)]
+        self._low: np.ndarray = np.array([_extent[0] for _extent in _extents], dtype=np.float64)
+        self._high: np.ndarray = np.array([_extent[1] for _extent in _extents], dtype=np.float64)
+
+        # A health of -1 in Tiled is the health of the type
+        self._health: np.ndarray = np.array([_object['properties'].get('health', -1) for _object in _objects],
+                                            dtype=np.int32)
+        _default = np.array([_type.c_health for _type in _types], dtype=np.int32)
+        self._health[self._health < 0] = _default[self._health < 0]
+        self._state: np.ndarray = np.array([_type.c_state for _type in _types], dtype=np.uint8)
+        self._state_frame: np.ndarray = np.full(_count, Clock.frame, dtype=np.int64)
+        self._frame: np.ndarray = np.zeros(_count, dtype=np.int32)
+        self._contact_damage: np.ndarray = np.array([_type.c_contact_damage for _type in _types], dtype=np.int32)
+        # The constants of each enemy's type, so the steps every type shares run once over all of them
+        self._rest_state: np.ndarray = self._state.copy()
+        self._hurt_frames: np.ndarray = np.array([_type.c_hurt_frames for _type in _types], dtype=np.int64)
+        self._frame_steps: np.ndarray = np.array([_type.c_frame_steps for _type in _types], dtype=np.int64)
+        self._frames: np.ndarray = np.array([_type.c_frames for _type in _types], dtype=np.int64)
+        # Only the types which move need their update called
+        self._movers: List[Tuple[Type[EnemyType], slice]] = [(_type, _slice) for _type, _slice
+                                                             in zip(self._types, self._slices)
+                                                             if _type.update.__func__ is not EnemyType.update.__func__]
+
+        self._columns: int = max(1, ceil(_px_width / self.c_cell_size))
+        self._rows: int = max(1, ceil(_px_height / self.c_cell_size))
+        self._live: np.ndarray = np.zeros(0, dtype=np.int64)
+        self._left = self._right = self._bottom = self._top = self._x
+        self._cell_keys: np.ndarray = None
+        self._cell_order: np.ndarray = None
+        self._reach: Tuple[float, float] = (0.0, 0.0)
+        self._kill()
+
+    def __len__(self):
+        return len(self._x)
+
+    def update(self):
+        """
+        One fixed step of every enemy: the end of flinches, each type's movement, animation frames and the
+        broadphase.
+        """
+        if not len(self._live):
+            return
+        _frame = Clock.frame
+        _elapsed = _frame - self._state_frame
+        _recovered = (self._state == HURT) & (_elapsed >= self._hurt_frames)
+        if _recovered.any():
+            self._state[_recovered] = self._rest_state[_recovered]
+            self._state_frame[_recovered] = _frame
+            _elapsed[_recovered] = 0
+
+        for _type, _slice in self._movers:
+            _type.update(self, _slice)
+        self._frame[:] = _elapsed // self._frame_steps % self._frames
+        if self._movers:
+            self._index()
+
+    def _kill(self):
+        # Called when enemies die, the live ones and how far they reach only change then
+        self._live = np.nonzero(self._state != DEAD)[0]
+        # How far past its cell an enemy can reach, so a query looks in every cell one could overlap it from
+        self._reach = ((float(self._half_width[self._live].max()), float(self._half_height[self._live].max()))
+                       if len(self._live) else (0.0, 0.0))
+        self._index()
+
+    def _index(self):
+        # The bounds of every enemy are kept for the queries until the next update moves them
+        self._left, self._right = self._x - self._half_width, self._x + self._half_width
+        self._bottom, self._top = self._y - self._half_height, self._y + self._half_height
+        if len(self._live) < self.c_scan_count:
+            self._cell_keys = self._cell_order = None
+            return
+        _size, _live = self.c_cell_size, self._live
+        _columns = np.clip((self._x[_live] // _size).astype(np.int64), 0, self._columns - 1)
+        _rows = np.clip((self._y[_live] // _size).astype(np.int64), 0, self._rows - 1)
+        _keys = _rows * self._columns + _columns
+        _order = np.argsort(_keys, kind='stable')
+        self._cell_keys, self._cell_order = _keys[_order], _live[_order]
+
+    def query(self, _left: float, _bottom: float, _right: float, _top: float) -> np.ndarray:
+        """
+        The indices of the live enemies overlapping the box, as of the last update. Only touching an edge is not
+        overlapping, as with the sprite hit boxes.
+        """
+        if self._cell_keys is None:
+            _candidates = self._live
+        else:
+            _candidates = self._cells(_left, _bottom, _right, _top)
+        if not len(_candidates):
+            return _candidates
+
+        _hit = ((self._left[_candidates] < _right) & (self._right[_candidates] > _left) &
+                (self._bottom[_candidates] < _top) & (self._top[_candidates] > _bottom))
+        return _candidates[_hit]
+
+    def _cells(self, _left: float, _bottom: float, _right: float, _top: float) -> np.ndarray:
+        # The live enemies in every cell an enemy overlapping the box could be in
+        _size, (_reach_x, _reach_y) = self.c_cell_size, self._reach
+        _c0 = min(max(floor((_left - _reach_x) / _size), 0), self._columns - 1)
+        _c1 = min(max(floor((_right + _reach_x) / _size), 0), self._columns - 1)
+        _r0 = min(max(floor((_bottom - _reach_y) / _size), 0), self._rows - 1)
+        _r1 = min(max(floor((_top + _reach_y) / _size), 0), self._rows - 1)
+
+        _rows = np.arange(_r0, _r1 + 1, dtype=np.int64) * self._columns
+        _starts = np.searchsorted(self._cell_keys, _rows + _c0, 'left')
+        _ends = np.searchsorted(self._cell_keys, _rows + _c1, 'right')
+        return np.concatenate([self._cell_order[_start:_end] for _start, _end in zip(_starts, _ends)])
+
+    def hit(self, _sprite) -> np.ndarray:
+        """
+        The live enemies overlapping the bounds of a sprite's hit box.
+        """
+        return self.query(_sprite.left, _sprite.bottom, _sprite.right, _sprite.top)
+
+    def contact_damage(self, _left: float, _bottom: float, _right: float, _top: float) -> int:
+        """
+        The damage of every live enemy touching the box, enemies flinching from a hit don't hurt.
+        """
+        _touching = self.query(_left, _bottom, _right, _top)
+        if not len(_touching):
+            return 0
+        return int(self._contact_damage[_touching[self._state[_touching] != HURT]].sum())
+
+    def damage(self, _indices: np.ndarray, _amount: int) -> np.ndarray:
+        """
+        Hits the enemies at _indices which aren't already flinching, and returns the ones which were hit. Those
+        left without health die and are taken out of the broadphase.
+        """
+        _indices = _indices[(self._state[_indices] != HURT) & (self._state[_indices] != DEAD)]
+        if not len(_indices):
+            return _indices
+        self._health[_indices] -= _amount
+        self._state[_indices] = np.where(self._health[_indices] > 0, HURT, DEAD)
+        self._state_frame[_indices] = Clock.frame
+        self._vel_x[_indices] = self._vel_y[_indices] = 0.0
+        if (self._state[_indices] == DEAD).any():
+            self._kill()
+        return _indices
+
+    def sync(self):
+        """
+        Moves the sprites to the enemies and hides the dead ones, only needed before drawing.
+        """
+        if self._sprites is None:
+            return
+        _x, _y, _alive = self._x.tolist(), self._y.tolist(), (self._state != DEAD).tolist()
+        for _index, _sprite_index in enumerate(self._sprite_order):
+            _sprite = self._sprites[_sprite_index]
+            _sprite.position = _x[_index], _y[_index]
+            _sprite.visible = _alive[_index]
+
+    def draw(self):
+        if self._sprites is None:
+            return
+        self.sync()
+        self._sprites.draw(pixelated=True)
+
+    def type_name(self, _index: int) -> str:
+        return self._names[_index]
+
+    @property
+    def sprites(self) -> SpriteList:
+        return self._sprites
+
+    @property
+    def types(self) -> List[Type[EnemyType]]:
+        return self._types
+
+    @property
+    def slices(self) -> List[slice]:
+        return self._slices
+
+    @property
+    def alive(self) -> np.ndarray:
+        return self._state != DEAD
+
+    @property
+    def x(self) -> np.ndarray:
+        return self._x
+
+    @property
+    def y(self) -> np.ndarray:
+        return self._y
+
+    @property
+    def vel_x(self) -> np.ndarray:
+        return self._vel_x
+
+    @property
+    def vel_y(self) -> np.ndarray:
+        return self._vel_y
+
+    @property
+    def half_width(self) -> np.ndarray:
+        return self._half_width
+
+    @property
+    def half_height(self) -> np.ndarray:
+        return self._half_height
+
+    @property
+    def direction(self) -> np.ndarray:
+        return self._direction
+
+    @property
+    def home_x(self) -> np.ndarray:
+        return self._home_x
+
+    @property
+    def home_y(self) -> np.ndarray:
+        return self._home_y
+
+    @property
+    def low(self) -> np.ndarray:
+        return self._low
+
+    @property
+    def high(self) -> np.ndarray:
+        return self._high
+
+    @property
+    def health(self) -> np.ndarray:
+        return self._health
+
+    @property
+    def state(self) -> np.ndarray:
+        return self._state
+
+    @property
+    def frame(self) -> np.ndarray:
+        return self._frame
@@ -6,7 +6,10 @@ from src.input import Input, Button
 from src.views.splash_view import SplashView
 from src.views.primary_game_view import PrimaryGameView
 
-from src.util import DEBUG
+from src.worldmap import Map
+from src.replay import InputRecorder
+from src.profiler import Profiler
+from src.util import DEBUG, RECORD, PROFILE, STATE_STATS
 
 
 class EngineWindow(Window):
@@ -16,8 +19,19 @@ class EngineWindow(Window):
         atlas = self.ctx.default_atlas
         self.game_view = PrimaryGameView()
         Input.get_button("ESCAPE").register_press_observer(self.call_close)
+        # Starts with the first step of the game view, so it can be replayed from a new player in the start room
+        self._recorder: InputRecorder = None
+        # Clock.frame only moves on in fixed_update, so a short first frame can't be told apart by the frame
+        self._splash_shown: bool = False
 
     def call_close(self, button: Button):
+        if self._recorder is not None:
+            self._recorder.save(RECORD)
+        if PROFILE:
+            Profiler.save(PROFILE)
+        if STATE_STATS:
+            self.game_view.player.p_state_switch.stats.save(STATE_STATS)
+        Map.shutdown()
         self.close()
 
     def on_mouse_press(self, x: int, y: int, button: int, modifiers: int):
@@ -36,16 +50,34 @@ class EngineWindow(Window):
         self.show_view(self.game_view)
 
     def on_update(self, delta_time: float):
-        if not Clock.frame:
+        if not self._splash_shown:
+            self._splash_shown = True
             self.show_view(SplashView())
 
-        Clock.tick(delta_time)
-        Input.p_key_held()
+        # The view's on_update still runs once a frame after this, for things which follow the drawn state
+        for _ in range(Clock.advance(delta_time)):
+            self.fixed_update()
 
         # TODO: remove all debug code
         if DEBUG:
             while Clock.frame < 1024:
-                Clock.tick(delta_time)
+                Clock.tick(Clock.c_fixed_step)
+
+    def fixed_update(self):
+        _recording = RECORD and self.current_view is self.game_view
+        if _recording:
+            if self._recorder is None:
+                self._recorder = InputRecorder(Map.c_start, self.game_view.player)
+            self._recorder.capture()
+
+        with Profiler.scope("step"):
+            Clock.tick(Clock.c_fixed_step)
+            Input.p_key_held()
+            if self.current_view is not None and hasattr(self.current_view, "on_fixed_update"):
+                self.current_view.on_fixed_update(Clock.c_fixed_step)
+
+        if _recording:
+            self._recorder.hash_step(self.game_view.player)
 
     def on_draw(self):
         pass
@@ -0,0 +1,179 @@
+from typing import Optional, Tuple
+from os import path
+from time import perf_counter
+
+from arcade.resources import add_resource_handle, resolve_resource_path
+
+from src.clock import Clock
+from src.input import Input
+from src.worldmap import Map, Room
+from src.player.player import PlayerCharacter
+from src.replay import InputRecorder, InputReplayer
+from src.snapshot import Snapshotter, SnapshotRing
+from src.profiler import Profiler
+
+c_root = path.dirname(path.dirname(path.abspath(__file__)))
+
+
+class HeadlessEngine:
+    """
+    Runs the game logic without a window or GL context: a room loaded from its .tmj, the player, Input and the
+    Clock, stepped at the fixed rate of the clock as fast as the CPU allows. Input is fed through press() and
+    release() with arcade key symbols, the same as EngineWindow passes them on.
+    """
+
+    def __init__(self, _start: Tuple[str, str] = None, _position: Tuple[float, float] = None,
+                 _replay: InputReplayer = None):
+        add_resource_handle("assets", path.join(c_root, "resources"))
+        add_resource_handle("data", path.join(c_root, "data"))
+        Input.process_buttons(resolve_resource_path(":data:/buttons_axis_defaults.json"))
+
+        if _replay is not None:
+            _start, _position = _replay.start, _replay.position
+        _start = _start or Map.c_start
+        self._start: Tuple[str, str] = _start
+        # Only the start room is queued, any room the player walks into is loaded when it is asked for
+        Map.initialise(_start, _parsers=0, _budget=1, _headless=True)
+        Map.set_room(Map.get(*_start))
+
+        self._player = PlayerCharacter()
+        if _position is not None:
+            self._player.p_data.pos = _position
+            self._player.p_data.set_last_ground_instant()
+
+        self._recorder: Optional[InputRecorder] = None
+        self._snapshots: Optional[SnapshotRing] = None
+        self._replayer: Optional[InputReplayer] = _replay
+        if _replay is not None:
+            _replay.restart()
+
+    def press(self, _key: int):
+        Input.p_key_press(_key)
+
+    def release(self, _key: int):
+        Input.p_key_release(_key)
+
+    def step(self, _steps: int = 1):
+        """
+        Runs _steps fixed steps, each the same as one EngineWindow.fixed_update with the game view shown.
+        """
+        for _ in range(_steps):
+            if self._replayer is not None:
+                self._replayer.apply()
+            if self._recorder is not None:
+                self._recorder.capture()
+
+            with Profiler.scope("step"):
+                Clock.tick(Clock.c_fixed_step)
+                Input.p_key_held()
+                with Profiler.scope("enemies"):
+                    Map.current.enemies.update()
+                self._player.update()
+
+            if self._recorder is not None:
+                self._recorder.hash_step(self._player)
+            if self._snapshots is not None:
+                self._snapshots.push()
+            if self._replayer is not None:
+                self._replayer.check(self._player)
+
+    def run(self, _seconds: float) -> int:
+        """
+        Steps through _seconds of game time and returns how many steps that took.
+        """
+        _steps = round(_seconds / Clock.c_fixed_step)
+        self.step(_steps)
+        return _steps
+
+    def record(self) -> InputRecorder:
+        """
+        Starts recording the input of every following step.
+        """
+        self._recorder = InputRecorder(self._start, self._player)
+        return self._recorder
+
+    def keep_snapshots(self, _capacity: int = None) -> SnapshotRing:
+        """
+        Snapshots the game after every following step, keeping the last _capacity to rewind to.
+        """
+        _snapshotter = Snapshotter(self._player)
+        self._snapshots = SnapshotRing(_snapshotter) if _capacity is None else SnapshotRing(_snapshotter, _capacity)
+        self._snapshots.push()
+        return self._snapshots
+
+    def rewind(self, _steps: int) -> int:
+        """
+        Puts the game back _steps steps, and returns the frame it is now on.
+        """
+        return self._snapshots.rewind(_steps)
+
+    def replay(self) -> Optional[int]:
+        """
+        Steps through the whole replay the engine was made with. Returns the first frame out of sync with the
+        recording, None if every step matched.
+        """
+        self.step(self._replayer.steps - (Clock.frame - self._replayer.start_frame))
+        return self._replayer.mismatch
+
+    def shutdown(self):
+        Map.shutdown()
+
+    @property
+    def player(self) -> PlayerCharacter:
+        return self._player
+
+    @property
+    def room(self) -> Room:
+        return Map.current
+
+    @property
+    def snapshots(self) -> Optional[SnapshotRing]:
+        return self._snapshots
+
+    @property
+    def frame(self) -> int:
+        return Clock.frame
+
+
+if __name__ == '__main__':
+    from argparse import ArgumentParser
+
+    from src.collision import QueryCache
+
+    _parser = ArgumentParser(description="Steps the player in a room without a window and reports the tick rate.")
+    _parser.add_argument("--room", nargs=2, default=Map.c_start, metavar=("REGION", "ROOM"))
+    _parser.add_argument("--steps", type=int, default=10000)
+    _parser.add_argument("--replay", help="an input log to play back and check, in place of --room and --steps")
+    _parser.add_argument("--profile", help="time the stages of each step, and write the times to this .csv or .json")
+    _parser.add_argument("--state-stats", help="count the player's state transitions, and write them to this .json")
+    _args = _parser.parse_args()
+    if _args.profile:
+        Profiler.enable()
+    QueryCache.c_counted = True
+
+    _replayer = InputReplayer.load(_args.replay) if _args.replay else None
+    _engine = HeadlessEngine(_replay=_replayer) if _args.replay else HeadlessEngine(tuple(_args.room))
+    if _args.state_stats:
+        _engine.player.p_state_switch.enable_stats()
+    _start = perf_counter()
+    if _args.replay:
+        _mismatch = _engine.replay()
+        _steps = _replayer.steps
+    else:
+        _engine.step(_args.steps)
+        _mismatch, _steps = None, _args.steps
+    _time = perf_counter() - _start
+
+    print(f"{_steps} steps in {_time:.2f}s, {_steps / _time:.0f} steps/s "
+          f"({_steps * Clock.c_fixed_step / _time:.0f}x real time), player at {_engine.player.position}")
+    _queries = _engine.room.queries
+    print(f"collision queries: {_queries.hits} of {_queries.hits + _queries.misses} cached ({_queries.hit_rate:.0%})")
+    if _args.replay:
+        print("replay in sync" if _mismatch is None else f"replay out of sync from frame {_mismatch}")
+    if _args.profile:
+        for _name, _summary in Profiler.summaries().items():
+            print(f"{_name:<20} p50 {_summary['p50']:7.1f}us  p95 {_summary['p95']:7.1f}us  p99 {_summary['p99']:7.1f}us")
+        Profiler.save(_args.profile)
+    if _args.state_stats:
+        _engine.player.p_state_switch.stats.save(_args.state_stats)
+    _engine.shutdown()
@@ -1,4 +1,4 @@
-from typing import Dict, Set, Tuple
+from typing import Dict, List, Sequence, Set, Tuple
 from json import load
 
 from data.arcade_keys_str_id import Keyboard, Mouse, GameController
@@ -62,6 +62,15 @@ class Button:
     def held(self, length):
         return self.press_time and length >= self.press_time
 
+    def snapshot(self) -> Tuple[float, float, int]:
+        return self._pressed, self._press_time, self._press_frame
+
+    def restore(self, _pressed: float, _press_time: float, _press_frame: int):
+        """
+        Puts the button back as a snapshot had it, without telling the observers.
+        """
+        self._pressed, self._press_time, self._press_frame = _pressed, _press_time, _press_frame
+
     # Observable events
 
     def p_on_press(self, value: float = 1.0):
@@ -138,6 +147,9 @@ class Axis:
     def register_observer(self, observer_call):
         self._observers.add(observer_call)
 
+    def restore(self, _value: float):
+        self._value = _value
+
     # de-register observers
     def deregister_observer(self, observer_call):
         self._observers.discard(observer_call)
@@ -162,6 +174,9 @@ class InputPoll:
         self._axes_map: Dict[str, Tuple[str, int]] = dict()  # Takes the key name and returns the axis name
 
         self._held_buttons: Set[Button] = set()
+        # Names of the bound keys and mouse buttons currently down, in the order they were bound in
+        self._bound_keys: Tuple[str, ...] = tuple()
+        self._held_keys: Set[str] = set()
 
     def process_buttons(self, data_src):
         json_data: Dict[str, dict] = load(open(data_src))
@@ -175,6 +190,40 @@ class InputPoll:
         self._axes_map = {key: (axis, 1 if _sign == "+" else -1)
                           for axis, signs in axis_data.items() for _sign, keys in signs.items() for key in keys}
 
+        self._bound_keys = tuple(dict.fromkeys((*self._button_map, *self._axes_map)))
+        self._held_keys = set()
+
+    def snapshot_format(self) -> str:
+        """
+        The struct format of snapshot(), which is fixed once the buttons are processed.
+        """
+        return 'ddq' * len(self._buttons) + f'{len(self._axes)}d{len(self._bound_keys)}?{len(self._buttons)}?'
+
+    def snapshot(self) -> List:
+        """
+        Every button as pressed, press time and frame, every axis' value, then which bound keys and which buttons are
+        held, as flags in the order they were bound in.
+        """
+        _values = []
+        for _button in self._buttons.values():
+            _values.extend(_button.snapshot())
+        _values.extend([_axis.value for _axis in self._axes.values()])
+        _values.extend([_key in self._held_keys for _key in self._bound_keys])
+        _values.extend([_button in self._held_buttons for _button in self._buttons.values()])
+        return _values
+
+    def restore(self, _values: Sequence):
+        _offset = 0
+        for _button in self._buttons.values():
+            _button.restore(_values[_offset], _values[_offset + 1], _values[_offset + 2])
+            _offset += 3
+        for _axis in self._axes.values():
+            _axis.restore(_values[_offset])
+            _offset += 1
+        self._held_keys = {_key for _key, _held in zip(self._bound_keys, _values[_offset:]) if _held}
+        _offset += len(self._bound_keys)
+        self._held_buttons = {_button for _button, _held in zip(self._buttons.values(), _values[_offset:]) if _held}
+
     def update_buttons(self, new_map):
         raise NotImplementedError()
 
@@ -193,8 +242,16 @@ class InputPoll:
         for _button in self._held_buttons:
             _button.p_on_hold()
 
+    def _hold_key(self, _name, _held):
+        if self._key_button(_name) or self._key_axis(_name):
+            if _held:
+                self._held_keys.add(_name)
+            else:
+                self._held_keys.discard(_name)
+
     def p_key_press(self, key):
         _key_name = Keyboard.key_id.get(key, None)
+        self._hold_key(_key_name, True)
         if self._key_button(_key_name):
             _button = self._buttons[self._button_map[_key_name]]
             _button.p_on_press(1.0)
@@ -206,6 +263,7 @@ class InputPoll:
 
     def p_key_release(self, key):
         _key_name = Keyboard.key_id.get(key, None)
+        self._hold_key(_key_name, False)
         if self._key_button(_key_name):
             _button = self._buttons[self._button_map[_key_name]]
             _button.p_on_release()
@@ -217,6 +275,7 @@ class InputPoll:
 
     def p_mouse_press(self, button):
         _button_name: str | None = Mouse.key_id.get(button, None)
+        self._hold_key(_button_name, True)
         if self._key_button(_button_name):
             self._buttons[self._button_map[_button_name]].p_on_press(1.0)
 
@@ -226,6 +285,7 @@ class InputPoll:
 
     def p_mouse_release(self, button):
         _button_name: str | None = Mouse.key_id.get(button, None)
+        self._hold_key(_button_name, False)
         if self._key_button(_button_name):
             self._buttons[self._button_map[_button_name]].p_on_release()
 
@@ -243,5 +303,13 @@ class InputPoll:
     def get_axis(self, axis):
         return self._axes[axis]
 
+    @property
+    def bound_keys(self) -> Tuple[str, ...]:
+        return self._bound_keys
+
+    @property
+    def held_keys(self) -> Set[str]:
+        return self._held_keys
+
 
 Input: InputPoll = InputPoll()
@@ -0,0 +1,418 @@
+from typing import Dict, List, Optional, Tuple
+from os import path, makedirs, replace, fdopen, remove
+from tempfile import mkstemp
+from heapq import heappush, heappop
+from math import floor, inf
+
+import numpy as np
+
+from src.collision import GROUND, ONE_WAY, SPIKES
+from src.room_cache import RoomData
+from src.util import TILE_SIZE, cache_root
+
+WALK, FALL, JUMP = range(3)
+EDGE_NAMES: Tuple[str, ...] = ("walk", "fall", "jump")
+
+
+class NavGraph:
+    """
+    Where an agent can stand in a room and how it gets from one place to another. A node is a column and row the
+    agent can stand in, free of ground and spikes for c_height tiles with ground or a one way tile under it. Walk
+    edges join neighbouring nodes, fall edges step off a ledge and jump edges leave a node with c_jump_speed.
+
+    Fall and jump edges come from simulating the arcs with the movement constants, gravity while rising is the
+    lighter c_jump_gravity as when the jump is held. Each arc is launched at a few horizontal speeds and the node it
+    lands on, if any, is the end of the edge. Edges cost the seconds they take, so A* finds the quickest path.
+
+    Like the room cache it does not import arcade.
+    """
+    # The player's, see PlayerData
+    c_jump_speed: float = 12.0 * TILE_SIZE
+    c_max_vel: float = 8.0 * TILE_SIZE
+    c_jump_gravity: float = 22.0 * TILE_SIZE
+    c_base_gravity: float = 32.0 * TILE_SIZE
+
+    # Size of the agent, a column wide and c_height tiles tall, its box is a little narrower so it fits in gaps
+    c_height: int = 2
+    c_half_width: float = 0.4 * TILE_SIZE
+    # Horizontal launch speeds of the arcs, as fractions of c_max_vel in the direction of the arc
+    c_launch_speeds: Tuple[float, ...] = (0.0, 0.5, 1.0)
+    c_max_air_time: float = 2.0
+    c_step: float = 1.0 / 120.0
+
+    def __init__(self, _width: int, _height: int, _tile_size: float, _columns: np.ndarray, _rows: np.ndarray,
+                 _offsets: np.ndarray, _targets: np.ndarray, _costs: np.ndarray, _kinds: np.ndarray,
+                 _launch: np.ndarray):
+        self._width: int = _width
+        self._height: int = _height
+        self._tile_size: float = _tile_size
+
+        self._columns: np.ndarray = _columns
+        self._rows: np.ndarray = _rows
+        self._index: np.ndarray = np.full((_height, _width), -1, dtype=np.int32)
+        self._index[_rows, _columns] = np.arange(len(_columns), dtype=np.int32)
+
+        # Edges of node n are offsets[n] to offsets[n + 1]
+        self._offsets: np.ndarray = _offsets
+        self._targets: np.ndarray = _targets
+        self._costs: np.ndarray = _costs
+        self._kinds: np.ndarray = _kinds
+        self._launch: np.ndarray = _launch
+
+        # The search walks python lists, indexing numpy arrays one element at a time is slower
+        self._offset_list: List[int] = _offsets.tolist()
+        self._target_list: List[int] = _targets.tolist()
+        self._cost_list: List[float] = _costs.tolist()
+        self._x_list: List[float] = ((_columns + 0.5) * _tile_size).tolist()
+
+    @classmethod
+    def build(cls, _cells: np.ndarray, _tile_size: float = TILE_SIZE) -> "NavGraph":
+        """
+        The graph over a grid of collision flags, as in CollisionGrid.cells with row 0 at the bottom.
+        """
+        _height, _width = _cells.shape
+        _blocked = (_cells & (GROUND | SPIKES)) != 0
+        _floor = (_cells & (GROUND | ONE_WAY)) != 0
+
+        # Cells the agent fits in standing on its bottom row, anything above the room is open
+        _clear = ~_blocked
+        for _k in range(1, cls.c_height):
+            _clear[:-_k] &= ~_blocked[_k:]
+        _standable = _clear.copy()
+        _standable[0] = False
+        _standable[1:] &= _floor[:-1]
+
+        _rows, _columns = np.nonzero(_standable)
+        _rows, _columns = _rows.astype(np.int32), _columns.astype(np.int32)
+        _index = np.full((_height, _width), -1, dtype=np.int32)
+        _index[_rows, _columns] = np.arange(len(_rows), dtype=np.int32)
+
+        _edges: Dict[Tuple[int, int, int], Tuple[float, float]] = dict()
+
+        def _add(_from: int, _to: int, _kind: int, _cost: float, _vel: float):
+            _key = (_from, _to, _kind)
+            if _from != _to and (_key not in _edges or _cost < _edges[_key][0]):
+                _edges[_key] = (_cost, _vel)
+
+        # Walking along a surface
+        _walk_cost = _tile_size / cls.c_max_vel
+        for _direction in (-1, 1):
+            _next = _columns + _direction
+            _inside = (_next >= 0) & (_next < _width)
+            _to = np.full(len(_rows), -1, dtype=np.int32)
+            _to[_inside] = _index[_rows[_inside], _next[_inside]]
+            for _from in np.nonzero(_to >= 0)[0].tolist():
+                _add(_from, int(_to[_from]), WALK, _walk_cost, _direction * cls.c_max_vel)
+
+        # Arcs: every node jumps both ways at each launch speed, and steps off each side it has no floor on
+        _starts, _xs, _bottoms, _vel_x, _vel_y, _extra, _kinds = [], [], [], [], [], [], []
+        _centres = (_columns + 0.5) * _tile_size
+        _node_bottoms = _rows * _tile_size
+        _nodes = np.arange(len(_rows), dtype=np.int32)
+        for _direction in (-1, 1):
+            for _speed in cls.c_launch_speeds:
+                if _speed == 0.0 and _direction > 0:
+                    continue
+                _starts.append(_nodes)
+                _xs.append(_centres)
+                _bottoms.append(_node_bottoms)
+                _vel_x.append(np.full(len(_rows), _direction * _speed * cls.c_max_vel))
+                _vel_y.append(np.full(len(_rows), cls.c_jump_speed))
+                _extra.append(np.zeros(len(_rows)))
+                _kinds.append(np.full(len(_rows), JUMP, dtype=np.uint8))
+
+            _next = _columns + _direction
+            _inside = (_next >= 0) & (_next < _width)
+            _beside = (_rows[_inside], _next[_inside])
+            _off = _nodes[_inside][_clear[_beside] & (_index[_beside] < 0)]
+            for _speed in cls.c_launch_speeds:
+                _starts.append(_off)
+                _xs.append((_columns[_off] + _direction + 0.5) * _tile_size)
+                _bottoms.append(_node_bottoms[_off])
+                _vel_x.append(np.full(len(_off), _direction * _speed * cls.c_max_vel))
+                _vel_y.append(np.zeros(len(_off)))
+                _extra.append(np.full(len(_off), _walk_cost))
+                _kinds.append(np.full(len(_off), FALL, dtype=np.uint8))
+
+        _starts = np.concatenate(_starts)
+        _launch = np.concatenate(_vel_x)
+        _landed, _times, _landed_x = cls._simulate(_cells, _tile_size, _index, np.concatenate(_xs),
+                                                   np.concatenate(_bottoms), _launch.copy(), np.concatenate(_vel_y))
+        # Landing on the edge of a tile counts as walking on to the middle of it, so no edge is quicker than the
+        # horizontal distance at c_max_vel and the A* heuristic stays admissible
+        _snap = np.abs((_columns[np.maximum(_landed, 0)] + 0.5) * _tile_size - _landed_x) / cls.c_max_vel
+        _costs, _kinds = np.concatenate(_extra) + _times + _snap, np.concatenate(_kinds)
+        for _arc in np.nonzero(_landed >= 0)[0].tolist():
+            _add(int(_starts[_arc]), int(_landed[_arc]), int(_kinds[_arc]), float(_costs[_arc]), float(_launch[_arc]))
+
+        # Sorted by node into compressed rows
+        _keys = sorted(_edges)
+        _from = np.array([_key[0] for _key in _keys], dtype=np.int32)
+        _offsets = np.searchsorted(_from, np.arange(len(_rows) + 1)).astype(np.int32)
+        return cls(_width, _height, _tile_size, _columns, _rows, _offsets,
+                   np.array([_key[1] for _key in _keys], dtype=np.int32),
+                   np.array([_edges[_key][0] for _key in _keys], dtype=np.float32),
+                   np.array([_key[2] for _key in _keys], dtype=np.uint8),
+                   np.array([_edges[_key][1] for _key in _keys], dtype=np.float32))
+
+    @classmethod
+    def _simulate(cls, _cells: np.ndarray, _tile_size: float, _index: np.ndarray, _x: np.ndarray, _bottom: np.ndarray,
+                  _vel_x: np.ndarray, _vel_y: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Flies every arc at once, stopping against walls and ceilings as the player does. Returns the node each
+        lands on, -1 for arcs which hit spikes, leave the room or stay in the air too long, the time in the air and
+        where it came down.
+        """
+        _height, _width = _cells.shape
+        # Padded with an open row above the room, which every row over it reads, and a column either side
+        _padded = np.zeros((_height + 1, _width + 2), dtype=_cells.dtype)
+        _padded[:_height, 1:-1] = _cells
+        _half, _box_height, _step = cls.c_half_width, cls.c_height * _tile_size, cls.c_step
+
+        def _hits(_x: np.ndarray, _bottom: np.ndarray, _mask: int) -> np.ndarray:
+            _c0 = np.floor((_x - _half) / _tile_size).astype(np.int64) + 1
+            _c1 = np.floor((_x + _half) / _tile_size).astype(np.int64) + 1
+            _r0 = np.floor(_bottom / _tile_size).astype(np.int64)
+            _r1 = np.ceil((_bottom + _box_height) / _tile_size).astype(np.int64) - 1
+            _hit = np.zeros(len(_x), dtype=bool)
+            for _k in range(cls.c_height + 1):
+                _row = np.minimum(np.minimum(_r0 + _k, _r1), _height)
+                _hit |= ((_padded[_row, _c0] | _padded[_row, _c1]) & _mask) != 0
+            return _hit
+
+        _count = len(_x)
+        _landed = np.full(_count, -1, dtype=np.int32)
+        _times = np.zeros(_count)
+        _landed_x = np.zeros(_count)
+        _alive = np.arange(_count)
+        _x, _bottom, _vel_x, _vel_y = _x.astype(np.float64), _bottom.astype(np.float64), _vel_x, _vel_y
+        # Arcs starting inside ground or spikes never leave
+        _free = ~_hits(_x, _bottom, GROUND | SPIKES)
+        _alive, _x, _bottom, _vel_x, _vel_y = _alive[_free], _x[_free], _bottom[_free], _vel_x[_free], _vel_y[_free]
+
+        for _tick in range(1, int(cls.c_max_air_time / _step) + 1):
+            if not len(_alive):
+                break
+            _vel_y = _vel_y - np.where(_vel_y > 0.0, cls.c_jump_gravity, cls.c_base_gravity) * _step
+
+            _next_x = _x + _vel_x * _step
+            _wall = _hits(_next_x, _bottom, GROUND)
+            _next_x[_wall] = _x[_wall]
+            _vel_x = np.where(_wall, 0.0, _vel_x)
+
+            _next_bottom = _bottom + _vel_y * _step
+            _ceiling = (_vel_y > 0.0) & _hits(_next_x, _next_bottom, GROUND)
+            _next_bottom[_ceiling] = _bottom[_ceiling]
+            _vel_y = np.where(_ceiling, 0.0, _vel_y)
+
+            # Landing when the feet cross the top of a row with ground or a one way tile under either side
+            _surface = np.floor(_bottom / _tile_size)
+            _crossing = (_vel_y <= 0.0) & (_next_bottom < _surface * _tile_size) & (_surface >= 1)
+            _row = np.minimum(_surface.astype(np.int64) - 1, _height)
+            _row[~_crossing] = 0
+            _c0 = np.floor((_next_x - _half) / _tile_size).astype(np.int64) + 1
+            _c1 = np.floor((_next_x + _half) / _tile_size).astype(np.int64) + 1
+            _under_0 = (_padded[_row, _c0] & (GROUND | ONE_WAY)) != 0
+            _under_1 = (_padded[_row, _c1] & (GROUND | ONE_WAY)) != 0
+            _lands = _crossing & (_under_0 | _under_1)
+
+            # The node under the middle of the box, or under the side which is over the floor
+            _middle = np.floor(_next_x / _tile_size).astype(np.int64) + 1
+            _column = np.where(_under_0 & ((_middle == _c0) | ~_under_1), _c0, _c1) - 1
+            _node = np.full(len(_alive), -1, dtype=np.int32)
+            _on_grid = _lands & (_column >= 0) & (_column < _width) & (_row + 1 < _height)
+            _node[_on_grid] = _index[_row[_on_grid] + 1, _column[_on_grid]]
+            _landed[_alive[_lands]] = _node[_lands]
+            _times[_alive[_lands]] = _tick * _step
+            _landed_x[_alive[_lands]] = _next_x[_lands]
+
+            _done = _lands | (_next_bottom < 0.0) | (_next_x < 0.0) | (_next_x > _width * _tile_size)
+            _done |= _hits(_next_x, np.maximum(_next_bottom, 0.0), SPIKES)
+            _keep = ~_done
+            _alive, _x, _bottom = _alive[_keep], _next_x[_keep], _next_bottom[_keep]
+            _vel_x, _vel_y = _vel_x[_keep], _vel_y[_keep]
+        return _landed, _times, _landed_x
+
+    def node_at(self, _x: float, _bottom: float) -> int:
+        """
+        The node an agent with its feet at (_x, _bottom) stands on, or the first one below it when in the air. -1
+        when there is nothing under it.
+        """
+        _column = floor(_x / self._tile_size)
+        if not 0 <= _column < self._width:
+            return -1
+        _row = min(int(round(_bottom / self._tile_size)), self._height - 1)
+        while _row >= 0:
+            _node = int(self._index[_row, _column])
+            if _node >= 0:
+                return _node
+            _row -= 1
+        return -1
+
+    def find_path(self, _start: int, _goal: int) -> Optional[List[int]]:
+        """
+        The edges of the quickest path from _start to _goal by A*, in order, or None if the goal can't be reached.
+        The heuristic is the horizontal distance at c_max_vel, which no edge goes faster than.
+        """
+        if _start == _goal:
+            return []
+        _offsets, _targets, _costs, _xs = self._offset_list, self._target_list, self._cost_list, self._x_list
+        _goal_x, _speed = _xs[_goal], self.c_max_vel
+
+        _best: Dict[int, float] = {_start: 0.0}
+        _came: Dict[int, Tuple[int, int]] = dict()
+        _open = [(abs(_goal_x - _xs[_start]) / _speed, 0.0, _start)]
+        while _open:
+            _, _cost, _node = heappop(_open)
+            if _node == _goal:
+                _path = []
+                while _node != _start:
+                    _edge, _node = _came[_node]
+                    _path.append(_edge)
+                _path.reverse()
+                return _path
+            if _cost > _best[_node]:
+                continue
+            for _edge in range(_offsets[_node], _offsets[_node + 1]):
+                _next, _next_cost = _targets[_edge], _cost + _costs[_edge]
+                if _next_cost < _best.get(_next, inf):
+                    _best[_next] = _next_cost
+                    _came[_next] = (_edge, _node)
+                    heappush(_open, (_next_cost + abs(_goal_x - _xs[_next]) / _speed, _next_cost, _next))
+        return None
+
+    def _source(self, _edge: int) -> int:
+        return int(np.searchsorted(self._offsets, _edge, side='right')) - 1
+
+    def path_cost(self, _path: List[int]) -> float:
+        return sum(self._cost_list[_edge] for _edge in _path)
+
+    def position(self, _node: int) -> Tuple[float, float]:
+        """
+        Where the feet of an agent standing on _node are, in the middle of its column.
+        """
+        return (int(self._columns[_node]) + 0.5) * self._tile_size, int(self._rows[_node]) * self._tile_size
+
+    def edge(self, _edge: int) -> Tuple[int, int, int, float]:
+        """
+        (from node, to node, kind, horizontal launch speed) of an edge.
+        """
+        return (self._source(_edge), self._target_list[_edge], int(self._kinds[_edge]),
+                float(self._launch[_edge]))
+
+    def to_arrays(self) -> Dict[str, np.ndarray]:
+        return {"shape": np.array([self._width, self._height]), "tile_size": np.array([self._tile_size]),
+                "columns": self._columns, "rows": self._rows, "offsets": self._offsets, "targets": self._targets,
+                "costs": self._costs, "kinds": self._kinds, "launch": self._launch}
+
+    @classmethod
+    def from_arrays(cls, _arrays) -> "NavGraph":
+        _width, _height = (int(_value) for _value in _arrays["shape"])
+        return cls(_width, _height, float(_arrays["tile_size"][0]), _arrays["columns"], _arrays["rows"],
+                   _arrays["offsets"], _arrays["targets"], _arrays["costs"], _arrays["kinds"], _arrays["launch"])
+
+    @property
+    def node_count(self) -> int:
+        return len(self._columns)
+
+    @property
+    def edge_count(self) -> int:
+        return len(self._targets)
+
+    @property
+    def kinds(self) -> np.ndarray:
+        return self._kinds
+
+    @property
+    def index(self) -> np.ndarray:
+        return self._index
+
+
+class NavigationCache:
+    """
+    One graph per room, kept in memory by the content hash of the room and saved under it as an .npz, so a room
+    is only analysed again when it changes. A graph leaves memory when its room is evicted, and if the cache can't
+    be written it is only kept in memory.
+    """
+    # Under the cache root unless a directory is given
+    c_cache_dir: str = "navigation"
+    c_version: int = 1
+
+    def __init__(self, _cache_dir: str = None):
+        self._cache_dir: Optional[str] = _cache_dir
+        self._graphs: Dict[str, NavGraph] = dict()
+        self._built: int = 0
+        self._loaded: int = 0
+        self._unsaved: int = 0
+
+    def __contains__(self, _data: RoomData) -> bool:
+        return _data.hash in self._graphs
+
+    def cache_path(self, _data: RoomData) -> str:
+        return path.join(self.cache_dir, f"{_data.hash}.{self.c_version}.npz")
+
+    def graph(self, _data: RoomData, _cells: np.ndarray) -> NavGraph:
+        """
+        The graph of the room _data was loaded from, with _cells its collision flags.
+        """
+        _graph = self._graphs.get(_data.hash)
+        if _graph is not None:
+            return _graph
+
+        _cache = self.cache_path(_data)
+        if path.exists(_cache):
+            with np.load(_cache) as _arrays:
+                _graph = NavGraph.from_arrays(_arrays)
+            self._loaded += 1
+        else:
+            _graph = NavGraph.build(_cells)
+            self._built += 1
+            _temp = None
+            try:
+                makedirs(self.cache_dir, exist_ok=True)
+                # Written next to the cache and moved over it, so an interrupted save leaves nothing behind
+                _handle, _temp = mkstemp(suffix=".tmp", dir=self.cache_dir)
+                with fdopen(_handle, 'wb') as _file:
+                    np.savez(_file, **_graph.to_arrays())
+                replace(_temp, _cache)
+            except OSError:
+                if _temp is not None and path.exists(_temp):
+                    remove(_temp)
+                self._unsaved += 1
+        self._graphs[_data.hash] = _graph
+        return _graph
+
+    def release(self, _data: RoomData):
+        """
+        Drops the graph of a room which is no longer loaded.
+        """
+        self._graphs.pop(_data.hash, None)
+
+    def clear(self):
+        self._graphs = dict()
+
+    @property
+    def cache_dir(self) -> str:
+        return self._cache_dir or path.join(cache_root(), self.c_cache_dir)
+
+    @cache_dir.setter
+    def cache_dir(self, _cache_dir: Optional[str]):
+        self._cache_dir = _cache_dir
+
+    @property
+    def built(self):
+        return self._built
+
+    @property
+    def loaded(self):
+        return self._loaded
+
+    @property
+    def unsaved(self):
+        """
+        How many graphs were built but kept in memory only, because the cache couldn't be written.
+        """
+        return self._unsaved
+
+
+Navigation: NavigationCache = NavigationCache()
@@ -1,3 +1,5 @@
+from typing import Tuple
+
 from arcade import Sprite, load_texture
 
 from src.player.player_data import PlayerData, PlayerAnimator, Player16pxParticleAnimator
@@ -9,6 +11,7 @@ from src.player.player_weapon import PlayerWeapon
 from src.worldmap import Map
 
 from src.input import Input, Button
+from src.profiler import Profiler
 
 # TODO: Complete Input Code and Physics integration
 
@@ -27,6 +30,8 @@ class PlayerCharacter:
         self._data = PlayerData(self._sprite)
         self._data.bottom = 192.0
         self._data.left = 128.0
+        # Where the sprite was before the last fixed step, to draw between the two
+        self._previous_position: Tuple[float, float] = self._data.pos
 
         Player16pxParticleAnimator.load(":assets:/textures/particles", "placeholder_particle_16px")
 
@@ -48,49 +53,71 @@ class PlayerCharacter:
             self._data.reset_to_ground()
 
     def update(self):
-        # Update based on the state
-        self._states.state_update()
-
-        # Move player
-        self._physics.move()
-
-        # Collisions
-        _ground = Map.current.ground['ground']
-        _all_tiles = Map.current.ground['all_ground'] if not Input.get_button("CROUCH") else _ground
-        self._physics.resolve_collisions((_all_tiles, _ground, _ground, _ground))
-
-        _spikes = Map.current.dangers['spikes']
-        _hit_spikes = self._hitbox.hit_spike(_spikes)
-        if len(_hit_spikes):
-            self._data.reset_to_ground()
-
-        _spawn_zone = Map.current.spawn_zones
-        _hit_zones = self._hitbox.hit_spawn_zone(_spawn_zone)
-        self._data.in_spawn_zone = False
-        if len(_hit_zones):
-            self._data.in_spawn_zone = True
-
-        # Find the next state
-        self._states.find_state()
-
-        # Manage weapon
-        self._weapon.update()
-
-        # Animate
-        self._sprite.scale_xy = [self._data.direction, 1.0]
-
-        self._states.debug_update_pos()
-
-        if self._data.on_ground and self._data.in_spawn_zone:
-            self._data.set_last_ground()
-
-        self._check_map_transition()
-
-        Player16pxParticleAnimator.update()
-        Player16pxParticleAnimator.animate()
-        # PlayerAnimator.animate()
-
-    def draw(self):
+        with Profiler.scope("player"):
+            self._previous_position = self._data.pos
+
+            # Update based on the state
+            with Profiler.scope("player.state"):
+                self._states.state_update()
+
+            # Move player
+            with Profiler.scope("player.move"):
+                self._physics.move()
+
+            # Collisions
+            with Profiler.scope("player.collisions"):
+                _ground = Map.current.colliders['ground']
+                _all_tiles = Map.current.colliders['all_ground'] if not Input.get_button("CROUCH") else _ground
+                self._physics.resolve_collisions((_all_tiles, _ground, _ground, _ground))
+                # The spikes and gates are sprites, so they need the sprite where the body ended up
+                self._data.sync()
+
+            with Profiler.scope("player.dangers"):
+                _hit_spikes = Map.current.hit_dangers(self._sprite)
+                _data = self._data
+                _hit_enemies = Map.current.enemies.contact_damage(_data.left, _data.bottom, _data.right, _data.top)
+                if len(_hit_spikes) or _hit_enemies:
+                    self._data.reset_to_ground()
+                    self._data.sync()
+                    self._previous_position = self._data.pos
+
+                _spawn_zone = Map.current.spawn_zones
+                self._data.in_spawn_zone = self._hitbox.hit_spawn_zone(_spawn_zone)
+
+            # Find the next state
+            with Profiler.scope("player.find_state"):
+                self._states.find_state()
+
+            # Manage weapon
+            with Profiler.scope("player.weapon"):
+                self._weapon.update()
+
+            # Animate
+            self._sprite.scale_xy = [self._data.direction, 1.0]
+
+            self._states.debug_update_pos()
+
+            if self._data.on_ground and self._data.in_spawn_zone:
+                self._data.set_last_ground()
+
+            with Profiler.scope("player.transition"):
+                self._check_map_transition()
+
+            with Profiler.scope("player.particles"):
+                Player16pxParticleAnimator.update()
+                Player16pxParticleAnimator.animate()
+                # PlayerAnimator.animate()
+
+    def draw_position(self, _alpha: float = 1.0) -> Tuple[float, float]:
+        """
+        Where the player is drawn, _alpha of the way from where the last fixed step started to where it ended.
+        """
+        _x, _y = self._previous_position
+        return _x + (self._data.x - _x) * _alpha, _y + (self._data.y - _y) * _alpha
+
+    def draw(self, _alpha: float = 1.0):
+        # The body is where the player is, the sprite only follows it, so it can be placed anywhere for drawing
+        self._sprite.position = self.draw_position(_alpha)
         self._sprite.draw(pixelated=True)
 
         self._hitbox.debug_draw()
@@ -106,6 +133,8 @@ class PlayerCharacter:
                 self._data.can_transition = False
                 _next_room, self._data.pos = _gate_collision.transition(self._data)
                 self._data.set_last_ground_instant()
+                # Jumps straight to the gate of the next room rather than sliding across the screen
+                self._previous_position = self._data.pos
 
                 Map.set_room(_next_room)
         else:
@@ -113,7 +142,7 @@ class PlayerCharacter:
 
     @property
     def position(self):
-        return self._sprite.position
+        return self._data.pos
 
     @property
     def p_sprite(self):
@@ -127,6 +156,14 @@ class PlayerCharacter:
     def p_hitbox(self):
         return self._hitbox
 
+    @property
+    def previous_position(self) -> Tuple[float, float]:
+        return self._previous_position
+
+    @previous_position.setter
+    def previous_position(self, _value: Tuple[float, float]):
+        self._previous_position = _value
+
     @property
     def p_weapon(self):
         return self._weapon
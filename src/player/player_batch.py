@@ -0,0 +1,429 @@
+from typing import Tuple, Union
+
+import numpy as np
+
+from src.player.player_data import PlayerData
+from src.player.player_states import STAND, RUN, LEDGE_HOLD, JUMP, FALL, WALL_SLIDE
+
+from src.collision import CollisionGrid, GROUND, ONE_WAY
+
+from src.clock import Clock
+
+_Inputs = Union[np.ndarray, float, bool]
+
+
+class PlayerBatch:
+    """
+    The movement of many players at once, each field of PlayerData as one array with an entry per agent. A step
+    does what PlayerCharacter.update does for the input events, the state updates, the move, resolve_collisions and
+    the state changes, with the PlayerData constants, but as numpy operations masked by state rather than a state
+    object per player. Collisions are swept against a CollisionGrid with sweep_many.
+
+    Left out: attacks, particles, spikes, spawn zones and room transitions, so agents stay in the room they start
+    in and walk over spikes.
+    """
+    c_half_width: float = 16.0
+    c_half_height: float = 32.0
+
+    def __init__(self, _grid: CollisionGrid, _positions: np.ndarray, _frame: int = None):
+        self._grid: CollisionGrid = _grid
+        self._frame: int = Clock.frame if _frame is None else _frame
+
+        _positions = np.asarray(_positions, dtype=np.float64).reshape(-1, 2)
+        _count = len(_positions)
+        self._x: np.ndarray = _positions[:, 0].copy()
+        self._y: np.ndarray = _positions[:, 1].copy()
+        self._old_x: np.ndarray = np.zeros(_count)
+        self._old_y: np.ndarray = np.zeros(_count)
+        self._vel_x: np.ndarray = np.zeros(_count)
+        self._vel_y: np.ndarray = np.zeros(_count)
+        self._direction: np.ndarray = np.ones(_count)
+
+        self._on_ground: np.ndarray = np.zeros(_count, dtype=bool)
+        self._on_ciel: np.ndarray = np.zeros(_count, dtype=bool)
+        self._on_left: np.ndarray = np.zeros(_count, dtype=bool)
+        self._on_right: np.ndarray = np.zeros(_count, dtype=bool)
+        self._at_ledge: np.ndarray = np.zeros(_count, dtype=bool)
+        self._state: np.ndarray = np.full(_count, FALL, dtype=np.int8)
+
+        self._forgiven_jump_frames: np.ndarray = np.zeros(_count, dtype=np.int64)
+        self._forgiven_edge_frames: np.ndarray = np.zeros(_count, dtype=np.int64)
+        self._blocked_ledge_frames: np.ndarray = np.zeros(_count, dtype=np.int64)
+
+        # What each agent held last step, so presses and axis changes fire the same events Input does
+        self._horizontal: np.ndarray = np.zeros(_count)
+        self._jump: np.ndarray = np.zeros(_count, dtype=bool)
+        self._dash: np.ndarray = np.zeros(_count, dtype=bool)
+        self._crouch: np.ndarray = np.zeros(_count, dtype=bool)
+        self._dash_press_frame: np.ndarray = np.zeros(_count, dtype=np.int64)
+
+        # The tile the ground sensor last found, what PlayerHitbox.bottom_collisions holds
+        self._ground_column: np.ndarray = np.zeros(_count, dtype=np.int64)
+        self._ground_row: np.ndarray = np.zeros(_count, dtype=np.int64)
+
+    def __len__(self):
+        return len(self._x)
+
+    def _set_state(self, _mask: np.ndarray, _state: int):
+        # The p_into_state of the states which do something, for the agents actually changing state
+        _changed = _mask & (self._state != _state)
+        if _state == STAND:
+            self._vel_x[_changed] = 0.0
+            self._vel_y[_changed] = 0.0
+        elif _state == WALL_SLIDE:
+            self._forgiven_edge_frames[_changed] = 0
+            self._vel_x[_changed] = 0.0
+        self._state[_mask] = _state
+
+    def _dash_buffered(self, _frames: int) -> np.ndarray:
+        # A released button reads a press frame of 0
+        return self._frame - np.where(self._dash, self._dash_press_frame, 0) <= _frames
+
+    def _ledge_free(self, _mask: np.ndarray, _old: Tuple[np.ndarray, np.ndarray],
+                    _new: Tuple[np.ndarray, np.ndarray], _layer: int) -> np.ndarray:
+        # The check_ledge_* sensors: the 8x8 box swept from _old to _new doesn't touch _layer
+        _old_x, _old_y = _old[0][_mask], _old[1][_mask]
+        _hit = self._grid.sweep_many(_old_x - 4.0, _old_y - 4.0, _old_x + 4.0, _old_y + 4.0,
+                                     _new[0][_mask] - _old_x, _new[1][_mask] - _old_y, _layer)[0]
+        _free = np.zeros(len(self), dtype=bool)
+        _free[_mask] = ~_hit
+        return _free
+
+    # Input events, fired before the clock ticks like the Input observers
+
+    def _on_horizontal(self, _mask: np.ndarray, _value: np.ndarray):
+        _moving = _mask & (_value != 0.0)
+        _turning = _moving & np.isin(self._state, (STAND, RUN, WALL_SLIDE, LEDGE_HOLD))
+        _from_stand = _moving & (self._state == STAND)
+        self._direction[_turning] = np.sign(_value[_turning])
+        self._set_state(_from_stand, RUN)
+
+    def _on_crouch(self, _mask: np.ndarray):
+        _letting_go = _mask & (self._state == LEDGE_HOLD)
+        self._at_ledge[_letting_go] = False
+        self._blocked_ledge_frames[_letting_go] = self._frame
+        self._set_state(_letting_go, WALL_SLIDE)
+
+        # Standing at the edge of a platform and facing off it drops down to hold the ledge
+        _size, _below = self._grid.tile_size, self._old_y - self.c_half_height - 9.0
+        for _side in (-1.0, 1.0):
+            _offset = _side * (self.c_half_width + 7.0)
+            _edge = _mask & (self._state == STAND) & (self._direction == _side)
+            _new_y = _below if _side < 0.0 else self._y - self.c_half_height - 9.0
+            _drop = _edge & self._ledge_free(_edge, (self._old_x + _offset, _below), (self._x + _offset, _new_y),
+                                             GROUND | ONE_WAY)
+            _face = (self._ground_column + (_side > 0.0)) * _size
+            self._vel_x[_drop] = self._vel_y[_drop] = 0.0
+            self._y[_drop] = ((self._ground_row + 1) * _size - self.c_half_height)[_drop]
+            self._x[_drop] = (_face + _side * self.c_half_width)[_drop]
+            self._direction[_drop] = -_side
+            self._at_ledge[_drop] = True
+            self._set_state(_drop, LEDGE_HOLD)
+
+    def _on_jump(self, _mask: np.ndarray):
+        _data = PlayerData
+        _state = self._state.copy()
+        _off_wall = self._on_left != self._on_right
+        _away = np.where(self._on_right, -1.0, 1.0)
+        _jumps = np.zeros(len(self), dtype=bool)
+
+        _ground = _mask & ((_state == STAND) | (_state == RUN))
+        self._vel_y[_ground] = _data.c_base_jump_speed
+        _jumps |= _ground
+
+        _fall = _mask & (_state == FALL)
+        _coyote = _fall & (self._frame - self._forgiven_edge_frames <= _data.c_edge_buffer_frames)
+        self._vel_y[_coyote] = _data.c_base_jump_speed
+        self._forgiven_jump_frames[_fall & ~_coyote] = self._frame
+        _jumps |= _coyote
+
+        _wall = _mask & (_state == WALL_SLIDE)
+        self._vel_y[_wall] = _data.c_base_jump_speed * 1.5
+        _wall &= _off_wall
+        _speed = np.where(self._dash, _data.c_dash_jump_speed, _data.c_base_jump_speed)
+        self._vel_x[_wall] = (_away * _speed)[_wall]
+        _jumps |= _wall
+
+        _ledge = _mask & (_state == LEDGE_HOLD)
+        self._at_ledge[_ledge] = False
+        self._blocked_ledge_frames[_ledge] = self._frame
+        _ledge &= _off_wall
+        self._vel_y[_ledge] = _speed[_ledge]
+        self._vel_x[_ledge] = (_away * _data.c_base_jump_speed * 0.5)[_ledge]
+        _jumps |= _ledge
+
+        self._forgiven_edge_frames[_jumps] = 0
+        self._forgiven_jump_frames[_jumps] = 0
+        self._set_state(_jumps, JUMP)
+
+    # The p_update of every state
+
+    def _update(self, _dt: float):
+        _data = PlayerData
+        _state = self._state
+        _target = _data.c_max_vel * self._horizontal
+
+        _air = (_state == JUMP) | (_state == FALL)
+        _steer = (_state == RUN) | _air
+        _acc = np.where(_air, _data.c_max_dec_air, _data.c_max_dec)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            _turn = (_target != 0.0) & (self._vel_x / _target < 0)
+        _push = (_target != 0.0) & ~_turn
+        _acc = np.where(_turn, np.where(_air, _data.c_max_turn_air, _data.c_max_turn), _acc)
+        _acc = np.where(_push, np.where(_air, _data.c_max_acc_air, _data.c_max_acc), _acc)
+        _target = np.where(_push & (np.abs(_target) < np.abs(self._vel_x)), self._vel_x, _target)
+        # Standing always slows to a stop, whatever is held
+        _acc = np.where(_state == STAND, _data.c_max_dec, _acc)
+        _target = np.where(_state == STAND, 0.0, _target)
+
+        _diff = _target - self._vel_x
+        _acc_x = np.minimum(np.abs(_diff), _acc * _dt) * np.sign(_diff)
+        _acc_x = np.where(_steer | (_state == STAND), _acc_x, 0.0)
+
+        _acc_y = np.where(self._on_ground, 0.0, -_data.c_base_gravity * _dt)
+        _acc_y = np.where((_state == JUMP) & self._jump, -_data.c_jump_gravity * _dt,
+                          np.where(_air, -_data.c_base_gravity * _dt, _acc_y))
+        _hugging = (((self._horizontal != 0.0) & ~self._dash) &
+                    (((self._direction == -1.0) & self._on_left) | ((self._direction == 1.0) & self._on_right)))
+        _slide = np.where(self._vel_y <= 0, -_data.c_down_slide_gravity * _dt, -_data.c_up_slide_gravity * _dt)
+        _acc_y = np.where((_state == WALL_SLIDE) & ~self._on_ground & _hugging, _slide, _acc_y)
+        _acc_y = np.where(_state == LEDGE_HOLD, 0.0, _acc_y)
+
+        self._vel_x += _acc_x
+        self._vel_y += _acc_y
+
+        _facing = _steer & (self._vel_x != 0.0)
+        self._direction[_facing] = np.sign(self._vel_x[_facing])
+
+    # The p_collision_* of every state, for the agents whose check resolved
+
+    def _collision_bottom(self, _mask: np.ndarray):
+        _state = self._state.copy()
+        _fall = _mask & (_state == FALL)
+        _boost = _fall & (self._vel_x != 0.0) & self._dash_buffered(PlayerData.c_dash_buffer_frames)
+        self._vel_x[_boost] += (np.abs(self._vel_y) / 2.0 * np.sign(self._vel_x))[_boost]
+
+        self._vel_y[_mask] = np.maximum(0.0, self._vel_y[_mask])
+        _landing = _mask & ((_state == JUMP) | (_state == FALL))
+        self._set_state(_landing & (self._vel_x != 0.0), RUN)
+        self._set_state((_landing & (self._vel_x == 0.0)) | (_mask & (_state == WALL_SLIDE)), STAND)
+
+    def _collision_top(self, _mask: np.ndarray):
+        _state = self._state.copy()
+        _air = _mask & ((_state == JUMP) | (_state == FALL))
+        _boost = _air & (self._vel_x != 0.0) & self._dash_buffered(PlayerData.c_dash_buffer_frames)
+        self._vel_x[_boost] += (np.abs(self._vel_y) / 4.0 * np.sign(self._vel_x))[_boost]
+
+        self._vel_y[_mask] = np.minimum(0.0, self._vel_y[_mask])
+        self._set_state(_mask & (_state == JUMP), FALL)
+
+    def _collision_side(self, _mask: np.ndarray, _tile_top: np.ndarray, _side: float):
+        _data = PlayerData
+        _state = self._state.copy()
+        _jump, _fall, _wall = _mask & (_state == JUMP), _mask & (_state == FALL), _mask & (_state == WALL_SLIDE)
+        _air = _jump | _fall
+
+        # Falling into a wall on the right marks the player at a ledge, the other cases clear it
+        self._at_ledge[_air] = (_fall & (_side > 0.0))[_air]
+        _dash_frames = _data.c_dash_buffer_frames * (2 if _side > 0.0 else 1)
+        _boost = (_jump & self._dash_buffered(_dash_frames)) | (_fall & self._dash_buffered(_data.c_dash_buffer_frames))
+        _boost &= self._vel_y != 0.0
+        _scale = np.where(_jump, 0.75, 0.5)
+        self._vel_y[_boost] += (np.abs(self._vel_x) * _scale * np.sign(self._vel_y))[_boost]
+
+        _reach = ((_air & ~_boost) | _wall) & (self._direction * _side > 0.0) & (self._horizontal * _side > 0.0)
+        _reach &= (self._y < _tile_top) & (self._frame - self._blocked_ledge_frames > _data.c_ledge_buffer_frames)
+        _reach &= ~(_jump | _wall) | (self._vel_y < _data.c_max_vel)
+        _offset, _above = _side * (self.c_half_width + 9.0), self.c_half_height + 9.0
+        _grab = _reach & self._ledge_free(_reach, (self._old_x + _offset, self._old_y + _above),
+                                          (self._x + _offset, self._y + _above), GROUND)
+        self._vel_y[_grab] = 0.0
+        self._vel_x[_grab] = 0.0
+        self._y[_grab] = _tile_top[_grab] - self.c_half_height
+        self._at_ledge[_grab] = True
+
+        _slide = _air & ~_grab
+        if _side < 0.0:
+            self._vel_x[_slide] = np.maximum(0.0, self._vel_x[_slide])
+        else:
+            # Jumping into a wall on the right keeps only velocity away from it, the same as on the left
+            self._vel_x[_slide & _jump] = np.maximum(0.0, self._vel_x[_slide & _jump])
+            self._vel_x[_slide & _fall] = np.minimum(0.0, self._vel_x[_slide & _fall])
+        self._vel_x[_wall] = 0.0
+
+        _ground = _mask & ~(_air | _wall)
+        if _side < 0.0:
+            self._vel_x[_ground] = np.maximum(0.0, self._vel_x[_ground])
+        else:
+            self._vel_x[_ground] = np.minimum(0.0, self._vel_x[_ground])
+
+        self._set_state(_slide, WALL_SLIDE)
+        self._set_state(_grab, LEDGE_HOLD)
+
+    def _resolve_collisions(self):
+        _half_width, _half_height = self.c_half_width, self.c_half_height
+        self._on_ground[:] = self._on_ciel[:] = self._on_left[:] = self._on_right[:] = False
+
+        # Collides downward, the horizontal sensor just under the feet
+        _check = self._vel_y <= 0.0
+        _old_y = self._old_y - _half_height - 1
+        _hit, _, _column, _row, _one_way = self._grid.sweep_many(
+            self._old_x - _half_width, _old_y - 0.5, self._old_x + _half_width, _old_y + 0.5,
+            self._x - self._old_x, self._y - _half_height - 1 - _old_y,
+            np.where(self._crouch, GROUND, GROUND | ONE_WAY))
+        _top = (_row + 1) * self._grid.tile_size
+        self._ground_column[_check] = _column[_check]
+        self._ground_row[_check] = _row[_check]
+        _hit &= _check & (self._old_y - _half_height >= _top)
+        self._collision_bottom(_hit)
+        self._y[_hit] = _top[_hit] + _half_height
+        self._on_ground |= _hit
+        self._forgiven_edge_frames[_hit] = self._frame
+        self._forgiven_jump_frames[_hit] = 0
+
+        # Collides upward
+        _check = self._vel_y >= 0.0
+        _old_y = self._old_y + _half_height + 1
+        _hit, _, _column, _row, _one_way = self._grid.sweep_many(
+            self._old_x - _half_width, _old_y - 0.5, self._old_x + _half_width, _old_y + 0.5,
+            self._x - self._old_x, self._y + _half_height + 1 - _old_y, GROUND)
+        _bottom = _row * self._grid.tile_size
+        _hit &= _check & (self._old_y + _half_height <= _bottom)
+        self._collision_top(_hit)
+        self._y[_hit] = _bottom[_hit] - _half_height
+        self._on_ciel |= _hit
+
+        # Collides on the left, then on the right, with the vertical sensor just past the side
+        for _side, _on_side in ((-1.0, self._on_left), (1.0, self._on_right)):
+            _check = self._vel_x * _side >= 0.0
+            _old_x = self._old_x + _side * (_half_width + 1)
+            _hit, _, _column, _row, _one_way = self._grid.sweep_many(
+                _old_x - 0.5, self._old_y - _half_height, _old_x + 0.5, self._old_y + _half_height,
+                self._x + _side * (_half_width + 1) - _old_x, self._y - self._old_y, GROUND)
+            _face = (_column + (_side < 0.0)) * self._grid.tile_size
+            _hit &= _check & ((self._old_x + _side * _half_width) * _side <= _face * _side)
+            self._collision_side(_hit, (_row + 1) * self._grid.tile_size, _side)
+            self._x[_hit] = _face[_hit] - _side * _half_width
+            _on_side |= _hit
+
+    def _find_state(self):
+        _data = PlayerData
+        _state = self._state.copy()
+        _buffered = self._frame - self._forgiven_jump_frames <= _data.c_jump_buffer_frames
+        _falling = (self._vel_y < 0.0) | ~self._on_ground
+
+        _jump = ((_state == STAND) | (_state == RUN)) & _buffered
+        _fall = ((_state == STAND) | (_state == RUN)) & ~_buffered & _falling
+        self._vel_y[_jump] = _data.c_base_jump_speed
+        self._forgiven_edge_frames[_fall] = self._frame
+        self._forgiven_jump_frames[_fall & (_state == STAND)] = 0
+        _stop = (_state == RUN) & ~_buffered & ~_falling & (self._vel_x == 0.0)
+
+        _wall_jump = (_state == WALL_SLIDE) & _buffered
+        self._vel_y[_wall_jump] = _data.c_base_jump_speed * 1.5
+        _speed = np.where(self._dash, _data.c_dash_jump_speed, _data.c_base_jump_speed)
+        self._vel_x[_wall_jump] = (_speed * -self._direction)[_wall_jump]
+        _off_wall = (_state == WALL_SLIDE) & ~_buffered & (
+                (~self._on_left & ~self._on_right) | (self._on_left & (self._direction > 0.0)) |
+                (self._on_right & (self._direction < 0.0)))
+
+        _ledge = _state == LEDGE_HOLD
+        _ledge_land = _ledge & self._on_ground
+        _ledge_drop = _ledge & ~self._on_ground & ((self._on_right & (self._direction < 0.0)) |
+                                                   (self._on_left & (self._direction > 0.0)))
+        self._at_ledge[_ledge_land | _ledge_drop] = False
+        self._blocked_ledge_frames[_ledge_land | _ledge_drop] = self._frame
+
+        _reset = _jump | _wall_jump | _off_wall
+        self._forgiven_edge_frames[_reset] = 0
+        self._forgiven_jump_frames[_reset] = 0
+
+        self._set_state(_jump | _wall_jump, JUMP)
+        self._set_state(_fall | _off_wall | _ledge_drop | ((_state == JUMP) & (self._vel_y < 0.0)), FALL)
+        self._set_state(_stop | _ledge_land, STAND)
+
+    def step(self, _horizontal: _Inputs = 0.0, _jump: _Inputs = False, _dash: _Inputs = False,
+             _crouch: _Inputs = False, _dt: float = None):
+        """
+        One fixed step for every agent, with what each agent is holding: the HORIZONTAL axis from -1 to 1 and the
+        JUMP, DASH and CROUCH buttons. Changes from the last step fire in the order axis, dash, crouch, jump.
+        """
+        _dt = Clock.c_fixed_step if _dt is None else _dt
+        _count = len(self)
+        _horizontal = np.broadcast_to(np.asarray(_horizontal, dtype=np.float64), (_count,))
+        _jump = np.broadcast_to(np.asarray(_jump, dtype=bool), (_count,))
+        _dash = np.broadcast_to(np.asarray(_dash, dtype=bool), (_count,))
+        _crouch = np.broadcast_to(np.asarray(_crouch, dtype=bool), (_count,))
+
+        _turned = _horizontal != self._horizontal
+        self._horizontal = _horizontal.copy()
+        self._on_horizontal(_turned, self._horizontal)
+
+        self._dash_press_frame[_dash & ~self._dash] = self._frame
+        self._dash = _dash.copy()
+
+        _crouched = _crouch & ~self._crouch
+        self._crouch = _crouch.copy()
+        self._on_crouch(_crouched)
+
+        _jumped = _jump & ~self._jump
+        self._jump = _jump.copy()
+        self._on_jump(_jumped)
+
+        self._frame += 1
+        self._update(_dt)
+
+        self._old_x, self._old_y = self._x.copy(), self._y.copy()
+        self._x += self._vel_x * _dt
+        self._y += self._vel_y * _dt
+
+        self._resolve_collisions()
+        self._find_state()
+
+    @property
+    def frame(self) -> int:
+        return self._frame
+
+    @property
+    def x(self) -> np.ndarray:
+        return self._x
+
+    @property
+    def y(self) -> np.ndarray:
+        return self._y
+
+    @property
+    def vel_x(self) -> np.ndarray:
+        return self._vel_x
+
+    @property
+    def vel_y(self) -> np.ndarray:
+        return self._vel_y
+
+    @property
+    def direction(self) -> np.ndarray:
+        return self._direction
+
+    @property
+    def on_ground(self) -> np.ndarray:
+        return self._on_ground
+
+    @property
+    def on_left(self) -> np.ndarray:
+        return self._on_left
+
+    @property
+    def on_right(self) -> np.ndarray:
+        return self._on_right
+
+    @property
+    def state(self) -> np.ndarray:
+        return self._state
+
+    @property
+    def forgiven_jump_frames(self) -> np.ndarray:
+        return self._forgiven_jump_frames
+
+    @property
+    def forgiven_edge_frames(self) -> np.ndarray:
+        return self._forgiven_edge_frames
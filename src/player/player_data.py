@@ -1,4 +1,4 @@
-from typing import Tuple, List, TYPE_CHECKING
+from typing import Tuple, TYPE_CHECKING
 
 from arcade import Sprite
 
@@ -10,6 +10,54 @@ PlayerAnimator = Animator()
 Player16pxParticleAnimator = TempAnimatorManager()
 
 
+class PlayerBody:
+    """
+    The box the player moves and collides as, in plain floats so the physics never touches arcade Sprite
+    properties, which work the edges out from the hit box every time they are read.
+    """
+    __slots__ = ('x', 'y', 'half_width', 'half_height', 'vel_x', 'vel_y', 'acc_x', 'acc_y', 'old_x', 'old_y')
+
+    def __init__(self, _half_width: float, _half_height: float):
+        self.x = self.y = 0.0
+        self.half_width = _half_width
+        self.half_height = _half_height
+        self.vel_x = self.vel_y = 0.0
+        self.acc_x = self.acc_y = 0.0
+        self.old_x = self.old_y = 0.0
+
+    @property
+    def left(self):
+        return self.x - self.half_width
+
+    @left.setter
+    def left(self, _value: float):
+        self.x = _value + self.half_width
+
+    @property
+    def right(self):
+        return self.x + self.half_width
+
+    @right.setter
+    def right(self, _value: float):
+        self.x = _value - self.half_width
+
+    @property
+    def bottom(self):
+        return self.y - self.half_height
+
+    @bottom.setter
+    def bottom(self, _value: float):
+        self.y = _value + self.half_height
+
+    @property
+    def top(self):
+        return self.y + self.half_height
+
+    @top.setter
+    def top(self, _value: float):
+        self.y = _value - self.half_height
+
+
 class PlayerData:
     c_max_acc: float = 25.0 * TILE_SIZE
     c_max_dec: float = 45.0 * TILE_SIZE
@@ -36,9 +84,9 @@ class PlayerData:
 
     def __init__(self, source: Sprite):
         self._source = source
-
-        self._acceleration: Tuple[float, float] = (0.0, 0.0)
-        self._old_position: Tuple[float, float] = (0.0, 0.0)
+        # The sprite is only written to by sync(), everything else reads and moves the body
+        self._body = PlayerBody((source.right - source.left) / 2, (source.top - source.bottom) / 2)
+        self._body.x, self._body.y = source.position
 
         self.direction: float = 1.0
 
@@ -53,8 +101,7 @@ class PlayerData:
         self.can_transition: bool = True
 
     def reset(self):
-        self._acceleration: Tuple[float, float] = (0.0, 0.0)
-        self._old_position: Tuple[float, float] = (0.0, 0.0)
+        self.acc = self.old_pos = (0.0, 0.0)
 
         self.direction: float = 1.0
 
@@ -65,13 +112,12 @@ class PlayerData:
         self.blocked_ledge_frames: int = 0
 
         self.pos = (32.0 * 5, 32.0 * 5)
-        self._last_ground_pos = tuple(self._source.position)
+        self._last_ground_pos = self.pos
 
         self.can_transition: bool = True
 
     def reset_to_ground(self):
-        self._acceleration: Tuple[float, float] = (0.0, 0.0)
-        self._old_position: Tuple[float, float] = (0.0, 0.0)
+        self.acc = self.old_pos = (0.0, 0.0)
 
         self.direction: float = 1.0
 
@@ -81,20 +127,40 @@ class PlayerData:
         self.forgiven_edge_frames: int = 0
         self.blocked_ledge_frames: int = 0
 
-        self._source.velocity = [0.0, 0.0]
-        self._source.change_x = 0.0
-        self._source.center_y = 0.0
-
+        self.vel = (0.0, 0.0)
         self.pos = self._last_ground_pos
 
         self.can_transition: bool = True
 
     def set_last_ground(self):
-        self._last_ground_pos = self._old_position
+        self._last_ground_pos = self.old_pos
 
     def set_last_ground_instant(self):
         self._last_ground_pos = self.pos
 
+    def sync(self):
+        """
+        Copies the body to the sprite, once a step before anything collides or draws with the sprite.
+        """
+        self._source.position = self._body.x, self._body.y
+        self._source.velocity = [self._body.vel_x, self._body.vel_y]
+
+    @property
+    def body(self) -> PlayerBody:
+        return self._body
+
+    @property
+    def source(self) -> Sprite:
+        return self._source
+
+    @property
+    def last_ground_pos(self) -> Tuple[float, float]:
+        return self._last_ground_pos
+
+    @last_ground_pos.setter
+    def last_ground_pos(self, _value: Tuple[float, float]):
+        self._last_ground_pos = _value
+
     # SIZE PROPERTIES
     @property
     def scale(self):
@@ -111,140 +177,140 @@ class PlayerData:
     # POSITION PROPERTIES
     @property
     def pos(self):
-        return self._source.position
+        return self._body.x, self._body.y
 
     @pos.setter
     def pos(self, _value: Tuple[float, float]):
-        self._source.position = _value
+        self._body.x, self._body.y = _value
 
     @property
     def x(self):
-        return self._source.center_x
+        return self._body.x
 
     @x.setter
     def x(self, _value: float):
-        self._source.center_x = _value
+        self._body.x = _value
 
     @property
     def y(self):
-        return self._source.center_y
+        return self._body.y
 
     @y.setter
     def y(self, _value: float):
-        self._source.center_y = _value
+        self._body.y = _value
 
     @property
     def bottom(self):
-        return self._source.bottom
+        return self._body.y - self._body.half_height
 
     @bottom.setter
     def bottom(self, _value: float):
-        self._source.bottom = _value
+        self._body.y = _value + self._body.half_height
 
     @property
     def top(self):
-        return self._source.top
+        return self._body.y + self._body.half_height
 
     @top.setter
     def top(self, _value: float):
-        self._source.top = _value
+        self._body.y = _value - self._body.half_height
 
     @property
     def left(self):
-        return self._source.left
+        return self._body.x - self._body.half_width
 
     @left.setter
     def left(self, _value: float):
-        self._source.left = _value
+        self._body.x = _value + self._body.half_width
 
     @property
     def right(self):
-        return self._source.right
+        return self._body.x + self._body.half_width
 
     @right.setter
     def right(self, _value: float):
-        self._source.right = _value
+        self._body.x = _value - self._body.half_width
 
     @property
     def old_pos(self):
-        return self._old_position
+        return self._body.old_x, self._body.old_y
 
     @old_pos.setter
     def old_pos(self, _value: Tuple[float, float]):
-        self._old_position = _value
+        self._body.old_x, self._body.old_y = _value
 
     @property
     def old_x(self):
-        return self._old_position[0]
+        return self._body.old_x
 
     @property
     def old_y(self):
-        return self._old_position[1]
+        return self._body.old_y
 
     @property
     def old_bottom(self):
-        return self._old_position[1] + (self._source.bottom - self._source.center_y)
+        return self._body.old_y - self._body.half_height
 
     @property
     def old_top(self):
-        return self._old_position[1] + (self._source.top - self._source.center_y)
+        return self._body.old_y + self._body.half_height
 
     @property
     def old_left(self):
-        return self._old_position[0] + (self._source.left - self._source.center_x)
+        return self._body.old_x - self._body.half_width
 
     @property
     def old_right(self):
-        return self._old_position[0] + (self._source.right - self._source.center_x)
+        return self._body.old_x + self._body.half_width
 
     # MOVEMENT PROPERTIES
     @property
     def vel(self):
-        return self._source.velocity
+        return self._body.vel_x, self._body.vel_y
 
     @vel.setter
-    def vel(self, _value: List[float]):
-        self._source.velocity = _value
+    def vel(self, _value: Tuple[float, float]):
+        self._body.vel_x, self._body.vel_y = _value
 
     @property
     def vel_x(self):
-        return self._source.change_x
+        return self._body.vel_x
 
     @vel_x.setter
     def vel_x(self, _value: float):
-        self._source.change_x = _value
+        self._body.vel_x = _value
 
     @property
     def vel_y(self):
-        return self._source.change_y
+        return self._body.vel_y
 
     @vel_y.setter
     def vel_y(self, _value: float):
-        self._source.change_y = _value
+        self._body.vel_y = _value
 
     @property
     def acc(self):
-        return self._acceleration
+        return self._body.acc_x, self._body.acc_y
 
     @acc.setter
     def acc(self, _value: Tuple[float, float]):
-        self._acceleration = _value
+        self._body.acc_x, self._body.acc_y = _value
 
     @property
     def acc_x(self):
-        return self._acceleration[0]
+        return self._body.acc_x
 
     @acc_x.setter
     def acc_x(self, _value: float):
-        self._acceleration = (_value, self._acceleration[1])
+        self._body.acc_x = _value
 
     @property
     def acc_y(self):
-        return self._acceleration[1]
+        return self._body.acc_y
 
     @acc_y.setter
     def acc_y(self, _value: float):
-        self._acceleration = (self._acceleration[0], _value)
+        self._body.acc_y = _value
 
     # ANGLE PROPERTIES
 
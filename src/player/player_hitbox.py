@@ -1,10 +1,10 @@
-from typing import Tuple
+from typing import Tuple, Optional
 
 from arcade import Sprite, SpriteList, SpriteSolidColor
 
 from src.player.player_data import PlayerData
 
-from src.util import dist, lerp, round_point
+from src.collision import CollisionLayer, Contact, Tile
 
 
 class PlayerHitbox:
@@ -18,81 +18,81 @@ class PlayerHitbox:
         self._ledge_sensor = SpriteSolidColor(8, 8, (0, 0, 255))
 
         self._bottom_collisions = self._top_collisions = self._left_collisions = self._right_collisions = None
+        self._last_contact: Optional[Contact] = None
 
     def hit_spike(self, _collision_layer: SpriteList):
         return self._source.collides_with_list(_collision_layer)
 
-    def hit_spawn_zone(self, _collision_layer: SpriteList):
-        return self._source.collides_with_list(_collision_layer)
+    def hit_spawn_zone(self, _collision_layer: CollisionLayer) -> bool:
+        return _collision_layer.overlaps(self._position.left, self._position.bottom, self._position.right,
+                                         self._position.top)
 
     def _resolve_collision(self, _old_check: Tuple[float, float], _new_check: Tuple[float, float],
-                           _sensor: Sprite, _collision_layer: SpriteList):
-        _length = int(dist(_old_check, _new_check) // 32) + 1
-
-        for step in range(_length + 1):
-            t = step / _length
-            _pos = lerp(_old_check[0], _new_check[0], t), lerp(_old_check[1], _new_check[1], t)
-            _sensor.position = round_point(_pos)
-            _collisions = _sensor.collides_with_list(_collision_layer)
-            if len(_collisions):
-                _collisions.sort(key=lambda sprite: sprite.center_y, reverse=True)
-                return True, _collisions
+                           _sensor: Sprite, _collision_layer: CollisionLayer):
+        # One continuous sweep of the sensor from its old to its new position, so fast moves can't skip a tile
+        _half_width, _half_height = _sensor.width / 2, _sensor.height / 2
+        _contact = _collision_layer.sweep(_old_check[0] - _half_width, _old_check[1] - _half_height,
+                                          _old_check[0] + _half_width, _old_check[1] + _half_height,
+                                          _new_check[0] - _old_check[0], _new_check[1] - _old_check[1])
+        self._last_contact = _contact
+        if _contact is not None:
+            return True, [_contact.tile]
         return False, [None]
 
-    def hit_ground(self, _collision_layer: SpriteList) -> Tuple[bool, Sprite]:
-        _old_check = round_point((self._position.old_x, self._position.old_bottom-1))
-        _new_check = round_point((self._position.x, self._position.bottom-1))
+    def hit_ground(self, _collision_layer: CollisionLayer) -> Tuple[bool, Optional[Tile]]:
+        _old_check = (self._position.old_x, self._position.old_bottom-1)
+        _new_check = (self._position.x, self._position.bottom-1)
         _hit, _collisions = self._resolve_collision(_old_check, _new_check, self._horizontal_sensor, _collision_layer)
         self._bottom_collisions = _collisions
         return _hit, _collisions[0]
 
-    def hit_ciel(self, _collision_layer: SpriteList) -> Tuple[bool, Sprite]:
-        _old_check = round_point((self._position.old_x, self._position.old_top+1))
-        _new_check = round_point((self._position.x, self._position.top+1))
+    def hit_ciel(self, _collision_layer: CollisionLayer) -> Tuple[bool, Optional[Tile]]:
+        _old_check = (self._position.old_x, self._position.old_top+1)
+        _new_check = (self._position.x, self._position.top+1)
         _hit, _collisions = self._resolve_collision(_old_check, _new_check, self._horizontal_sensor, _collision_layer)
         self._top_collisions = _collisions
         return _hit, _collisions[0]
 
-    def hit_left(self, _collision_layer: SpriteList) -> Tuple[bool, Sprite]:
-        _old_check = round_point((self._position.old_left-1, self._position.old_y))
-        _new_check = round_point((self._position.left-1, self._position.y))
+    def hit_left(self, _collision_layer: CollisionLayer) -> Tuple[bool, Optional[Tile]]:
+        _old_check = (self._position.old_left-1, self._position.old_y)
+        _new_check = (self._position.left-1, self._position.y)
         _hit, _collisions = self._resolve_collision(_old_check, _new_check, self._vertical_sensor, _collision_layer)
         self._left_collisions = _collisions
         return _hit, _collisions[0]
 
-    def hit_right(self, _collision_layer: SpriteList) -> Tuple[bool, Sprite]:
-        _old_check = round_point((self._position.old_right+1, self._position.old_y))
-        _new_check = round_point((self._position.right+1, self._position.y))
+    def hit_right(self, _collision_layer: CollisionLayer) -> Tuple[bool, Optional[Tile]]:
+        _old_check = (self._position.old_right+1, self._position.old_y)
+        _new_check = (self._position.right+1, self._position.y)
         _hit, _collisions = self._resolve_collision(_old_check, _new_check, self._vertical_sensor, _collision_layer)
         self._right_collisions = _collisions
         return _hit, _collisions[0]
 
-    def check_ledge_vertical_left(self, _collision_layer: SpriteList):
-        _old_check = round_point((self._position.old_left - 9.0, self._position.old_top + 9.0))
-        _new_check = round_point((self._position.left - 9.0, self._position.top + 9.0))
+    def check_ledge_vertical_left(self, _collision_layer: CollisionLayer):
+        _old_check = (self._position.old_left - 9.0, self._position.old_top + 9.0)
+        _new_check = (self._position.left - 9.0, self._position.top + 9.0)
         _ledge_hit, _ledge_collision = self._resolve_collision(_old_check, _new_check,
                                                                self._ledge_sensor, _collision_layer)
 
         return not _ledge_hit
 
-    def check_ledge_vertical_right(self, _collision_layer: SpriteList):
-        _old_check = round_point((self._position.old_right + 9.0, self._position.old_top + 9.0))
-        _new_check = round_point((self._position.right + 9.0, self._position.top + 9.0))
+    def check_ledge_vertical_right(self, _collision_layer: CollisionLayer):
+        _old_check = (self._position.old_right + 9.0, self._position.old_top + 9.0)
+        _new_check = (self._position.right + 9.0, self._position.top + 9.0)
         _ledge_hit, _ledge_collision = self._resolve_collision(_old_check, _new_check,
                                                                self._ledge_sensor, _collision_layer)
 
         return not _ledge_hit
 
-    def check_ledge_horizontal_left(self, _collision_layer: SpriteList):
-        _old_check = round_point((self._position.old_left - 7.0, self._position.old_bottom - 9.0))
-        _new_check = round_point((self._position.left - 7.0, self._position.old_bottom - 9.0))
+    def check_ledge_horizontal_left(self, _collision_layer: CollisionLayer):
+        _old_check = (self._position.old_left - 7.0, self._position.old_bottom - 9.0)
+        _new_check = (self._position.left - 7.0, self._position.old_bottom - 9.0)
         _ledge_hit, _ledge_collision = self._resolve_collision(_old_check, _new_check,
                                                                self._ledge_sensor, _collision_layer)
         return not _ledge_hit
 
-    def check_ledge_horizontal_right(self, _collision_layer: SpriteList):
-        _old_check = round_point((self._position.old_right + 7.0, self._position.old_bottom - 9.0))
-        _new_check = round_point((self._position.right + 7.0, self._position.bottom - 9.0))
+    def check_ledge_horizontal_right(self, _collision_layer: CollisionLayer):
+        _old_check = (self._position.old_right + 7.0, self._position.old_bottom - 9.0)
+        _new_check = (self._position.right + 7.0, self._position.bottom - 9.0)
         _ledge_hit, _ledge_collision = self._resolve_collision(_old_check, _new_check,
                                                                self._ledge_sensor, _collision_layer)
 
@@ -131,6 +131,13 @@ class PlayerHitbox:
                                        self._position.bottom - 9)
         self._ledge_sensor.draw(pixelated=True)
 
+    @property
+    def last_contact(self) -> Optional[Contact]:
+        """
+        The time of impact, normal and tile of the last sweep.
+        """
+        return self._last_contact
+
     @property
     def bottom_collisions(self):
         return self._bottom_collisions
@@ -8,6 +8,8 @@ from arcade import SpriteList
 from src.player.player_data import PlayerData
 from src.player.player_hitbox import PlayerHitbox
 
+from src.collision import CollisionLayer
+
 from src.clock import Clock
 
 
@@ -22,7 +24,8 @@ class PlayerPhysics:
     def resolve_spike_collision(self, _collision_layer: SpriteList):
         return self._hitbox.hit_spike(_collision_layer)
 
-    def resolve_collisions(self, _collision_layers: Tuple[SpriteList, SpriteList, SpriteList, SpriteList]):
+    def resolve_collisions(self, _collision_layers: Tuple[CollisionLayer, CollisionLayer,
+                                                          CollisionLayer, CollisionLayer]):
         self._data.on_ground = self._data.on_ciel = self._data.on_left = self._data.on_right = False
         _ground_collision = _ciel_collision = _left_collision = _right_collision = None
 
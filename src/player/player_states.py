@@ -1,7 +1,9 @@
-from typing import TYPE_CHECKING, Dict
+from typing import TYPE_CHECKING, Callable, Dict, List, Optional, Tuple
 if TYPE_CHECKING:
     from src.player.player import PlayerCharacter
 
+from json import dump
+
 from arcade import Sprite, load_texture
 
 from src.player.player_data import PlayerData, Player16pxParticleAnimator
@@ -10,9 +12,15 @@ from src.worldmap import Map
 
 from src.input import Input, Button
 from src.clock import Clock
+from src.util import STATE_STATS
+
+# State ids, the index of each state in PlayerStateSwitch and PlayerBatch, and of its placeholder name texture
+STAND, RUN, LEDGE_HOLD, JUMP, FALL, WALL_SLIDE = range(6)
+STATE_NAMES: Tuple[str, ...] = ("stand", "run", "ledge_hold", "jump", "fall", "wall_slide")
 
 
 class PlayerState:
+    c_id: int = -1
 
     def __init__(self, _switch: "PlayerStateSwitch", _source: "PlayerCharacter", _name: str):
         self._switch: "PlayerStateSwitch" = _switch
@@ -78,6 +86,7 @@ class PlayerState:
 
 
 class StandState(PlayerState):
+    c_id: int = STAND
 
     def __init__(self, _switch, _source):
         super().__init__(_switch, _source, "stand")
@@ -110,15 +119,15 @@ class StandState(PlayerState):
             self._data.vel_y = self._data.c_base_jump_speed
             self._data.forgiven_edge_frames = 0
             self._data.forgiven_jump_frames = 0
-            return self._switch.set_state("jump")
+            return self._switch.set_state(JUMP)
         elif self._data.vel_y < 0.0 or not self._data.on_ground:
             self._data.forgiven_edge_frames = Clock.frame
             self._data.forgiven_jump_frames = 0
-            return self._switch.set_state("fall")
+            return self._switch.set_state(FALL)
 
     def p_crouch(self, _button: Button):
         if (self._data.direction < 0.0 and
-                self._source.p_hitbox.check_ledge_horizontal_left(Map.current.ground['all_ground'])):
+                self._source.p_hitbox.check_ledge_horizontal_left(Map.current.colliders['all_ground'])):
             self._data.vel_x = 0.0
             self._data.vel_y = 0.0
 
@@ -128,9 +137,9 @@ class StandState(PlayerState):
 
             self._data.direction = 1.0
             self._data.at_ledge = True
-            self._switch.set_state("ledge_hold")
+            self._switch.set_state(LEDGE_HOLD)
         elif (self._data.direction > 0.0 and
-                self._source.p_hitbox.check_ledge_horizontal_right(Map.current.ground['all_ground'])):
+                self._source.p_hitbox.check_ledge_horizontal_right(Map.current.colliders['all_ground'])):
             self._data.vel_x = 0.0
             self._data.vel_y = 0.0
 
@@ -140,18 +149,18 @@ class StandState(PlayerState):
 
             self._data.direction = -1.0
             self._data.at_ledge = True
-            self._switch.set_state("ledge_hold")
+            self._switch.set_state(LEDGE_HOLD)
 
     def p_jump(self, _button: Button):
         self._data.vel_y = self._data.c_base_jump_speed * _button.pressed
         self._data.forgiven_edge_frames = 0
         self._data.forgiven_jump_frames = 0
-        self._switch.set_state("jump")
+        self._switch.set_state(JUMP)
 
     def p_horizontal(self, _value: float):
         if _value:
             self._data.direction = _value / abs(_value)
-            self._switch.set_state("run")
+            self._switch.set_state(RUN)
 
     def p_left_attack(self, _button: Button):
         self._source.p_weapon.attack_left()
@@ -161,6 +170,7 @@ class StandState(PlayerState):
 
 
 class RunState(PlayerState):
+    c_id: int = RUN
 
     def __init__(self, _switch, _source):
         super().__init__(_switch, _source, "run")
@@ -207,18 +217,18 @@ class RunState(PlayerState):
             self._data.vel_y = self._data.c_base_jump_speed
             self._data.forgiven_edge_frames = 0
             self._data.forgiven_jump_frames = 0
-            return self._switch.set_state("jump")
+            return self._switch.set_state(JUMP)
         elif self._data.vel_y < 0.0 or not self._data.on_ground:
             self._data.forgiven_edge_frames = Clock.frame
-            return self._switch.set_state("fall")
+            return self._switch.set_state(FALL)
         elif self._data.vel_x == 0.0:
-            return self._switch.set_state("stand")
+            return self._switch.set_state(STAND)
 
     def p_jump(self, _button: Button):
         self._data.vel_y = self._data.c_base_jump_speed * _button.pressed
         self._data.forgiven_edge_frames = 0
         self._data.forgiven_jump_frames = 0
-        self._switch.set_state("jump")
+        self._switch.set_state(JUMP)
 
     def p_horizontal(self, _value: float):
         if _value:
@@ -233,6 +243,7 @@ class RunState(PlayerState):
 
 
 class JumpState(PlayerState):
+    c_id: int = JUMP
 
     def __init__(self, _switch, _source):
         super().__init__(_switch, _source, "jump")
@@ -273,14 +284,14 @@ class JumpState(PlayerState):
 
     def p_find_state(self):
         if self._data.vel_y < 0.0:
-            return self._switch.set_state("fall")
+            return self._switch.set_state(FALL)
 
     def p_collision_bottom(self, _collision: Sprite):
         self._data.vel_y = max(0.0, self._data.vel_y)
         if self._data.vel_x:
-            self._switch.set_state("run")
+            self._switch.set_state(RUN)
         else:
-            self._switch.set_state("stand")
+            self._switch.set_state(STAND)
 
     def p_collision_left(self, _collision: Sprite):
         self._data.at_ledge = False
@@ -292,17 +303,17 @@ class JumpState(PlayerState):
         elif (self._data.direction < 0 and Input.get_axis("HORIZONTAL").value < 0.0 and
                 self._data.y < _collision.top and self._data.vel_y < self._data.c_max_vel and
                 Clock.frame_length(self._data.blocked_ledge_frames) > self._data.c_ledge_buffer_frames and
-                self._source.p_hitbox.check_ledge_vertical_left(Map.current.ground["ground"])):
+                self._source.p_hitbox.check_ledge_vertical_left(Map.current.colliders["ground"])):
 
             self._data.vel_y = 0.0
             self._data.vel_x = 0.0
             self._data.top = _collision.top
             self._data.at_ledge = True
 
-            return self._switch.set_state("ledge_hold")
+            return self._switch.set_state(LEDGE_HOLD)
 
         self._data.vel_x = max(0.0, self._data.vel_x)
-        self._switch.set_state("wall_slide")
+        self._switch.set_state(WALL_SLIDE)
 
     def p_collision_right(self, _collision: Sprite):
         self._data.at_ledge = False
@@ -314,17 +325,17 @@ class JumpState(PlayerState):
         elif (self._data.direction > 0 and Input.get_axis("HORIZONTAL").value > 0.0 and
                 self._data.y < _collision.top and self._data.vel_y < self._data.c_max_vel and
                 Clock.frame_length(self._data.blocked_ledge_frames) > self._data.c_ledge_buffer_frames and
-                self._source.p_hitbox.check_ledge_vertical_right(Map.current.ground["ground"])):
+                self._source.p_hitbox.check_ledge_vertical_right(Map.current.colliders["ground"])):
 
             self._data.vel_y = 0.0
             self._data.vel_x = 0.0
             self._data.top = _collision.top
             self._data.at_ledge = True
 
-            return self._switch.set_state("ledge_hold")
+            return self._switch.set_state(LEDGE_HOLD)
 
         self._data.vel_x = max(0.0, self._data.vel_x)
-        self._switch.set_state("wall_slide")
+        self._switch.set_state(WALL_SLIDE)
 
     def p_collision_top(self, _collision: Sprite):
         if self._data.vel_x:
@@ -333,7 +344,7 @@ class JumpState(PlayerState):
                 self._data.vel_x += _acc_x
 
         self._data.vel_y = min(0.0, self._data.vel_y)
-        return self._switch.set_state("fall")
+        return self._switch.set_state(FALL)
 
     def p_left_attack(self, _button: Button):
         self._source.p_weapon.attack_left()
@@ -346,6 +357,7 @@ class JumpState(PlayerState):
 
 
 class FallState(PlayerState):
+    c_id: int = FALL
 
     def __init__(self, _switch, _source):
         super().__init__(_switch, _source, "fall")
@@ -390,7 +402,7 @@ class FallState(PlayerState):
             self._data.vel_y = self._data.c_base_jump_speed * _button.pressed
             self._data.forgiven_edge_frames = 0
             self._data.forgiven_jump_frames = 0
-            return self._switch.set_state("jump")
+            return self._switch.set_state(JUMP)
 
         self._data.forgiven_jump_frames = Clock.frame
 
@@ -400,9 +412,9 @@ class FallState(PlayerState):
                 _acc_x = (abs(self._data.vel_y) / 2.0) * (self._data.vel_x / abs(self._data.vel_x))
                 self._data.vel_x += _acc_x
 
-            self._switch.set_state("run")
+            self._switch.set_state(RUN)
         else:
-            self._switch.set_state("stand")
+            self._switch.set_state(STAND)
 
         self._data.vel_y = max(0.0, self._data.vel_y)
 
@@ -416,17 +428,17 @@ class FallState(PlayerState):
         elif (self._data.direction < 0 and Input.get_axis("HORIZONTAL").value < 0.0 and
                 self._data.y < _collision.top and
                 Clock.frame_length(self._data.blocked_ledge_frames) > self._data.c_ledge_buffer_frames and
-                self._source.p_hitbox.check_ledge_vertical_left(Map.current.ground["ground"])):
+                self._source.p_hitbox.check_ledge_vertical_left(Map.current.colliders["ground"])):
 
             self._data.vel_y = 0.0
             self._data.vel_x = 0.0
             self._data.top = _collision.top
             self._data.at_ledge = True
 
-            return self._switch.set_state("ledge_hold")
+            return self._switch.set_state(LEDGE_HOLD)
 
         self._data.vel_x = max(0.0, self._data.vel_x)
-        self._switch.set_state("wall_slide")
+        self._switch.set_state(WALL_SLIDE)
 
     def p_collision_right(self, _collision: Sprite):
         self._data.at_ledge = True
@@ -438,17 +450,17 @@ class FallState(PlayerState):
         elif (self._data.direction > 0 and Input.get_axis("HORIZONTAL").value > 0.0 and
                 self._data.y < _collision.top and
                 Clock.frame_length(self._data.blocked_ledge_frames) > self._data.c_ledge_buffer_frames and
-                self._source.p_hitbox.check_ledge_vertical_right(Map.current.ground["ground"])):
+                self._source.p_hitbox.check_ledge_vertical_right(Map.current.colliders["ground"])):
 
             self._data.vel_y = 0.0
             self._data.vel_x = 0.0
             self._data.top = _collision.top
             self._data.at_ledge = True
 
-            return self._switch.set_state("ledge_hold")
+            return self._switch.set_state(LEDGE_HOLD)
 
         self._data.vel_x = min(0.0, self._data.vel_x)
-        self._switch.set_state("wall_slide")
+        self._switch.set_state(WALL_SLIDE)
 
     def p_collision_top(self, _collision: Sprite):
         if self._data.vel_x:
@@ -469,6 +481,7 @@ class FallState(PlayerState):
 
 
 class WallSlideState(PlayerState):
+    c_id: int = WALL_SLIDE
 
     def __init__(self, _switch, _source):
         super().__init__(_switch, _source, "wall_slide")
@@ -509,13 +522,13 @@ class WallSlideState(PlayerState):
 
             self._data.forgiven_edge_frames = 0
             self._data.forgiven_jump_frames = 0
-            return self._switch.set_state("jump")
+            return self._switch.set_state(JUMP)
         elif ((not self._data.on_left and not self._data.on_right) or
                 self._data.on_left and self._data.direction > 0.0 or
                 self._data.on_right and self._data.direction < 0.0):
             self._data.forgiven_edge_frames = 0
             self._data.forgiven_jump_frames = 0
-            return self._switch.set_state("fall")
+            return self._switch.set_state(FALL)
 
     def p_jump(self, _button: Button):
         self._data.vel_y = _button.pressed * self._data.c_base_jump_speed * 1.5
@@ -527,7 +540,7 @@ class WallSlideState(PlayerState):
 
             self._data.forgiven_edge_frames = 0
             self._data.forgiven_jump_frames = 0
-            return self._switch.set_state("jump")
+            return self._switch.set_state(JUMP)
         elif self._data.on_left and not self._data.on_right:
             _acc_x = self._data.c_base_jump_speed
             if Input.get_button("DASH"):
@@ -536,7 +549,7 @@ class WallSlideState(PlayerState):
 
             self._data.forgiven_edge_frames = 0
             self._data.forgiven_jump_frames = 0
-            return self._switch.set_state("jump")
+            return self._switch.set_state(JUMP)
 
     def p_crouch(self, _button: Button):
         pass
@@ -546,35 +559,36 @@ class WallSlideState(PlayerState):
 
     def p_collision_bottom(self, _collision: Sprite):
         self._data.vel_y = max(0.0, self._data.vel_y)
-        self._switch.set_state("stand")
+        self._switch.set_state(STAND)
 
     def p_collision_right(self, _collision: Sprite):
         self._data.vel_x = 0.0
         if (self._data.direction > 0 and Input.get_axis("HORIZONTAL").value > 0.0 and self._data.y < _collision.top and
                 Clock.frame_length(self._data.blocked_ledge_frames) > self._data.c_ledge_buffer_frames and
                 self._data.vel_y < self._data.c_max_vel and
-                self._source.p_hitbox.check_ledge_vertical_right(Map.current.ground["ground"])):
+                self._source.p_hitbox.check_ledge_vertical_right(Map.current.colliders["ground"])):
 
             self._data.vel_y = 0.0
             self._data.top = _collision.top
             self._data.at_ledge = True
 
-            return self._switch.set_state("ledge_hold")
+            return self._switch.set_state(LEDGE_HOLD)
 
     def p_collision_left(self, _collision: Sprite):
         self._data.vel_x = 0.0
         if (self._data.direction < 0 and Input.get_axis("HORIZONTAL").value < 0.0 and self._data.y < _collision.top and
                 Clock.frame_length(self._data.blocked_ledge_frames) > self._data.c_ledge_buffer_frames and
                 self._data.vel_y < self._data.c_max_vel and
-                self._source.p_hitbox.check_ledge_vertical_left(Map.current.ground["ground"])):
+                self._source.p_hitbox.check_ledge_vertical_left(Map.current.colliders["ground"])):
             self._data.vel_y = 0.0
             self._data.top = _collision.top
             self._data.at_ledge = True
 
-            return self._switch.set_state("ledge_hold")
+            return self._switch.set_state(LEDGE_HOLD)
 
 
 class LedgeHoldState(PlayerState):
+    c_id: int = LEDGE_HOLD
 
     def __init__(self, _switch, _source):
         super().__init__(_switch, _source, "ledge_hold")
@@ -592,12 +606,12 @@ class LedgeHoldState(PlayerState):
         if self._data.on_ground:
             self._data.at_ledge = False
             self._data.blocked_ledge_frames = Clock.frame
-            return self._switch.set_state("stand")
+            return self._switch.set_state(STAND)
         elif ((self._data.on_right and self._data.direction < 0.0) or
                 (self._data.on_left and self._data.direction > 0.0)):
             self._data.at_ledge = False
             self._data.blocked_ledge_frames = Clock.frame
-            return self._switch.set_state("fall")
+            return self._switch.set_state(FALL)
 
     def p_jump(self, _button: Button):
         self._data.at_ledge = False
@@ -611,7 +625,7 @@ class LedgeHoldState(PlayerState):
             self._data.vel_x = -self._data.c_base_jump_speed * 0.5
             self._data.forgiven_edge_frames = 0
             self._data.forgiven_jump_frames = 0
-            return self._switch.set_state("jump")
+            return self._switch.set_state(JUMP)
         elif self._data.on_left and not self._data.on_right:
             _acc_y = self._data.c_base_jump_speed
             if Input.get_button("DASH"):
@@ -621,39 +635,106 @@ class LedgeHoldState(PlayerState):
             self._data.vel_x = self._data.c_base_jump_speed * 0.5
             self._data.forgiven_edge_frames = 0
             self._data.forgiven_jump_frames = 0
-            return self._switch.set_state("jump")
+            return self._switch.set_state(JUMP)
 
     def p_crouch(self, _button: Button):
         self._data.at_ledge = False
         self._data.blocked_ledge_frames = Clock.frame
-        self._switch.set_state("wall_slide")
+        self._switch.set_state(WALL_SLIDE)
 
     def p_horizontal(self, _value: float):
         if _value:
             self._data.direction = _value / abs(_value)
 
 
+class StateStats:
+    """
+    How many times the player went from each state to each other state, and how many fixed steps it spent in each,
+    for tuning how the movement feels. Only made when asked for, a switch without one only checks for None on a
+    transition.
+    """
+
+    def __init__(self, _state: int):
+        _count = len(STATE_NAMES)
+        self._transitions: List[List[int]] = [[0] * _count for _ in range(_count)]
+        self._frames: List[int] = [0] * _count
+        self._state: int = _state
+        self._entered: int = Clock.frame
+
+    def transition(self, _from: int, _to: int):
+        _frame = Clock.frame
+        self._transitions[_from][_to] += 1
+        self._frames[_from] += _frame - self._entered
+        self._state, self._entered = _to, _frame
+
+    def count(self, _from: int, _to: int) -> int:
+        return self._transitions[_from][_to]
+
+    def frames(self, _state: int) -> int:
+        """
+        The steps spent in _state, counting the time in the current state up to now.
+        """
+        _frames = self._frames[_state]
+        if _state == self._state:
+            _frames += Clock.frame - self._entered
+        return _frames
+
+    def to_dict(self) -> Dict:
+        return {"transitions": {STATE_NAMES[_from]: {STATE_NAMES[_to]: _count
+                                                     for _to, _count in enumerate(_row) if _count}
+                                for _from, _row in enumerate(self._transitions)},
+                "frames": {_name: self.frames(_state) for _state, _name in enumerate(STATE_NAMES)},
+                "seconds": {_name: self.frames(_state) * Clock.c_fixed_step
+                            for _state, _name in enumerate(STATE_NAMES)}}
+
+    def save(self, _path: str):
+        with open(_path, 'w') as _file:
+            dump(self.to_dict(), _file, indent=2)
+
+    @property
+    def transitions(self) -> List[List[int]]:
+        return self._transitions
+
+
 class PlayerStateSwitch:
+    """
+    The states are indexed by their c_id, and each hook the player or Input calls has a table of the states' bound
+    methods in the same order, so passing an event on is a single list lookup.
+    """
 
     def __init__(self, _source: "PlayerCharacter"):
         self._data: PlayerData = _source.p_data
         self._source: "PlayerCharacter" = _source
-        self._states: Dict[str, PlayerState] = {"stand": StandState(self, _source),
-                                                "run": RunState(self, _source),
-                                                "ledge_hold": LedgeHoldState(self, _source),
-                                                "jump": JumpState(self, _source),
-                                                "fall": FallState(self, _source),
-                                                "wall_slide": WallSlideState(self, _source)}
-
-        self._current_state: PlayerState = self._states['fall']
+        _states = [StandState(self, _source), RunState(self, _source), LedgeHoldState(self, _source),
+                   JumpState(self, _source), FallState(self, _source), WallSlideState(self, _source)]
+        # Placed by their c_id, which the tables below are indexed with
+        self._states: List[PlayerState] = sorted(_states, key=lambda _state: _state.c_id)
+        if [_state.c_id for _state in self._states] != list(range(len(STATE_NAMES))):
+            raise ValueError(f"the player states must have the ids 0 to {len(STATE_NAMES) - 1} once each, not "
+                             f"{[_state.c_id for _state in _states]}")
+
+        self._update: List[Callable[[], None]] = [_state.p_update for _state in self._states]
+        self._find_state: List[Callable[[], None]] = [_state.p_find_state for _state in self._states]
+        self._collision_bottom: List[Callable[[Sprite], None]] = [_state.p_collision_bottom for _state in self._states]
+        self._collision_top: List[Callable[[Sprite], None]] = [_state.p_collision_top for _state in self._states]
+        self._collision_left: List[Callable[[Sprite], None]] = [_state.p_collision_left for _state in self._states]
+        self._collision_right: List[Callable[[Sprite], None]] = [_state.p_collision_right for _state in self._states]
+        self._jump: List[Callable[[Button], None]] = [_state.p_jump for _state in self._states]
+        self._crouch: List[Callable[[Button], None]] = [_state.p_crouch for _state in self._states]
+        self._horizontal: List[Callable[[float], None]] = [_state.p_horizontal for _state in self._states]
+        self._left_attack: List[Callable[[Button], None]] = [_state.p_left_attack for _state in self._states]
+        self._right_attack: List[Callable[[Button], None]] = [_state.p_right_attack for _state in self._states]
+        self._down_attack: List[Callable[[Button], None]] = [_state.p_down_attack for _state in self._states]
+
+        self._state: int = FALL
+        self._stats: Optional[StateStats] = StateStats(FALL) if STATE_STATS is not None else None
 
         # TODO: remove placeholder variables
         self._state_name = Sprite()
-        self._state_name_textures = {_name:
-                                     load_texture(":assets:/textures/placeholder_state_names.png", x=32 * i,
+        self._state_name_textures = [load_texture(":assets:/textures/placeholder_state_names.png", x=32 * i,
                                                   width=32, height=16)
-                                     for i, _name in enumerate(self._states.keys())}
-        self._state_name.texture = self._state_name_textures['fall']
+                                     for i in range(len(STATE_NAMES))]
+        self._state_name.texture = self._state_name_textures[FALL]
 
         # Register Movement Observers
         Input.get_axis("HORIZONTAL").register_observer(self.p_horizontal)
@@ -665,56 +746,79 @@ class PlayerStateSwitch:
         Input.get_button("ATTACK_LEFT").register_press_observer(self.p_left_attack)
         Input.get_button("ATTACK_RIGHT").register_press_observer(self.p_right_attack)
 
-    def find_state(self):
-        self._current_state.p_find_state()
+    def enable_stats(self):
+        if self._stats is None:
+            self._stats = StateStats(self._state)
 
-    def set_state(self, _state):
-        self._state_name.texture = self._state_name_textures[_state]
-        _new_state = self._states[_state]
-        if _new_state != self._current_state:
-            self._current_state.p_out_of_state()
-            _new_state.p_into_state()
+    def disable_stats(self):
+        self._stats = None
 
-            self._current_state = _new_state
+    def find_state(self):
+        self._find_state[self._state]()
+
+    def set_state(self, _state: int):
+        if _state != self._state:
+            self._states[self._state].p_out_of_state()
+            self._states[_state].p_into_state()
+
+            if self._stats is not None:
+                self._stats.transition(self._state, _state)
+            self._state = _state
+            self._state_name.texture = self._state_name_textures[_state]
+
+    def restore_state(self, _state: int):
+        """
+        Puts the player back in a state, as a snapshot had it, without leaving or entering any state.
+        """
+        self._state = _state
+        self._state_name.texture = self._state_name_textures[_state]
 
     def state_update(self):
-        self._current_state.p_update()
+        self._update[self._state]()
 
     def collision_bottom(self, _collision: Sprite):
-        self._current_state.p_collision_bottom(_collision)
+        self._collision_bottom[self._state](_collision)
 
     def collision_top(self, _collision: Sprite):
-        self._current_state.p_collision_top(_collision)
+        self._collision_top[self._state](_collision)
 
     def collision_left(self, _collision: Sprite):
-        self._current_state.p_collision_left(_collision)
+        self._collision_left[self._state](_collision)
 
     def collision_right(self, _collision: Sprite):
-        self._current_state.p_collision_right(_collision)
+        self._collision_right[self._state](_collision)
+
+    @property
+    def state(self) -> PlayerState:
+        return self._states[self._state]
+
+    @property
+    def state_id(self) -> int:
+        return self._state
 
     @property
-    def state(self):
-        return self._current_state
+    def stats(self) -> Optional[StateStats]:
+        return self._stats
 
     # Button Events
 
     def p_jump(self, _button: Button):
-        self._current_state.p_jump(_button)
+        self._jump[self._state](_button)
 
     def p_crouch(self, _button: Button):
-        self._current_state.p_crouch(_button)
+        self._crouch[self._state](_button)
 
     def p_horizontal(self, _value: float):
-        self._current_state.p_horizontal(_value)
+        self._horizontal[self._state](_value)
 
     def p_left_attack(self, _button: Button):
-        self._current_state.p_left_attack(_button)
+        self._left_attack[self._state](_button)
 
     def p_right_attack(self, _button: Button):
-        self._current_state.p_right_attack(_button)
+        self._right_attack[self._state](_button)
 
     def p_down_attack(self, _button: Button):
-        self._current_state.p_down_attack(_button)
+        self._down_attack[self._state](_button)
 
     # Debug Methods
 
@@ -1,12 +1,14 @@
-from typing import Tuple
+from typing import Dict, Optional, Tuple, Type
 
+import numpy as np
 from arcade import Sprite, SpriteSolidColor, load_texture, Texture
 
 from src.player.player_data import PlayerData
 
 from src.clock import Clock
 from src.input import Input
-from src.worldmap import Map
+from src.pool import Pool
+from src.worldmap import Map, Room
 
 from src.util import TILE_SIZE
 
@@ -17,15 +19,24 @@ class PlayerHit(Sprite):
     c_hit_max_age: int = 4
 
     def __init__(self):
-        if not self.c_hit_texture:
-            self.c_hit_texture = load_texture(":assets:/textures/particles/placeholder_hit.png")
+        # Loaded once for every hit, set on the class and not the instance
+        if PlayerHit.c_hit_texture is None:
+            PlayerHit.c_hit_texture = load_texture(":assets:/textures/particles/placeholder_hit.png")
         super().__init__()
         self.texture = self.c_hit_texture
 
+    def reset(self):
+        self.angle = 0.0
+
+
+# Every attack shows at most one hit, and only one attack is out at a time
+PlayerHits: Pool[PlayerHit] = Pool(PlayerHit, PlayerHit.reset, _name="player.hits")
+
 
 class PlayerAttack:
     c_attack_max_age: int = 8
     c_knockback = 8.0 * TILE_SIZE
+    c_damage: int = 1
 
     def __init__(self, _data: PlayerData, _sprite: Sprite, _hitbox: SpriteSolidColor,
                  rel_pos: Tuple[float, float], hitbox_pos: Tuple[float, float]):
@@ -37,7 +48,7 @@ class PlayerAttack:
         self._rel_pos = rel_pos
         self._hitbox_pos = hitbox_pos
 
-        self._hit: Sprite = None
+        self._hit: PlayerHit = None
 
         # TODO: Add animation system
         self._animator = None
@@ -45,16 +56,63 @@ class PlayerAttack:
         self._spawn_frame = Clock.frame
 
         self._struck = False
+        # Every enemy is hit once an attack. Flagged by the enemy's index in the room the mask was filled in, it
+        # grows to the largest room's enemies and is cleared when the attack is swung again or the room changes.
+        self._struck_enemies: np.ndarray = np.zeros(0, dtype=bool)
+        self._struck_room: Optional[Room] = None
+
+    def reset(self):
+        """
+        Readies an attack taken from its pool to be swung again.
+        """
+        self._spawn_frame = Clock.frame
+        self._struck = False
+        self._struck_enemies.fill(False)
+
+    def restore(self, _spawn_frame: int, _struck: bool):
+        self._spawn_frame = _spawn_frame
+        self._struck = _struck
+
+    @property
+    def spawn_frame(self) -> int:
+        return self._spawn_frame
+
+    @property
+    def struck(self) -> bool:
+        return self._struck
+
+    def finish(self):
+        """
+        Gives back the hit the attack showed, before the attack goes back to its pool.
+        """
+        if self._hit is not None:
+            PlayerHits.release(self._hit)
+            self._hit = None
 
     def update_position(self):
         self._hitbox.position = self._data.x + self._hitbox_pos[0], self._data.y + self._hitbox_pos[1]
         self._sprite.position = self._data.x + self._rel_pos[0], self._data.y + self._rel_pos[1]
 
     def check_collision_environment(self):
-        return self._hitbox.collides_with_list(Map.current.dangers['spikes'])
-
-    def check_collision_enemies(self):
-        return self._hitbox.collides_with_list(Map.current.enemies.sprites)
+        return Map.current.hit_dangers(self._hitbox)
+
+    def check_collision_enemies(self) -> np.ndarray:
+        return Map.current.enemies.hit(self._hitbox)
+
+    def strike_enemies(self):
+        _hit = self.check_collision_enemies()
+        if not len(_hit):
+            return
+        if Map.current is not self._struck_room:
+            self._struck_room = Map.current
+            self._struck_enemies.fill(False)
+        _enemies = Map.current.enemies
+        if len(self._struck_enemies) < len(_enemies):
+            self._struck_enemies = np.pad(self._struck_enemies, (0, len(_enemies) - len(self._struck_enemies)))
+        _new = _hit[~self._struck_enemies[_hit]]
+        if len(_new):
+            _enemies.damage(_new, self.c_damage)
+            self._struck_enemies[_new] = True
 
     def check_attack(self):
         raise NotImplementedError()
@@ -83,12 +141,13 @@ class DownAttack(PlayerAttack):
     def check_attack(self):
         if not self._struck:
             self.update_position()
+            self.strike_enemies()
 
             terrain_collisions = self.check_collision_environment()
 
             if terrain_collisions:
                 self._struck = True
-                self._hit = PlayerHit()
+                self._hit = PlayerHits.acquire()
                 self._hit.bottom = terrain_collisions[0].top
                 self._hit.center_x = self._data.x
                 if Input.get_button("DASH"):
@@ -111,12 +170,13 @@ class RightAttack(PlayerAttack):
     def check_attack(self):
         if not self._struck:
             self.update_position()
+            self.strike_enemies()
 
             terrain_collisions = self.check_collision_environment()
 
             if terrain_collisions:
                 self._struck = True
-                self._hit = PlayerHit()
+                self._hit = PlayerHits.acquire()
                 self._hit.angle = 90.0
                 self._hit.right = terrain_collisions[0].left
                 self._hit.center_y = self._data.y
@@ -140,11 +200,12 @@ class LeftAttacK(PlayerAttack):
     def check_attack(self):
         if not self._struck:
             self.update_position()
+            self.strike_enemies()
             terrain_collisions = self.check_collision_environment()
 
             if terrain_collisions:
                 self._struck = True
-                self._hit = PlayerHit()
+                self._hit = PlayerHits.acquire()
                 self._hit.angle = -90.0
                 self._hit.left = terrain_collisions[0].right
                 self._hit.center_y = self._data.y
@@ -160,6 +221,8 @@ class LeftAttacK(PlayerAttack):
 
 class PlayerWeapon:
     c_attack_delay: int = 32
+    # The attacks by the number a snapshot keeps them as
+    c_attack_kinds: Tuple[Type[PlayerAttack], ...] = (DownAttack, LeftAttacK, RightAttack)
 
     def __init__(self, _data: PlayerData):
         self._data: PlayerData = _data
@@ -177,6 +240,16 @@ class PlayerWeapon:
         self._last_attack: int = 0
         self._sprite: Sprite = Sprite(texture=self._down_swipe)
 
+        # One of each attack is ever out, made now so the first swing doesn't
+        self._attacks: Dict[Type[PlayerAttack], Pool[PlayerAttack]] = {
+            DownAttack: Pool(lambda: DownAttack(self._data, self._sprite, self._down_hitbox), PlayerAttack.reset, 1,
+                             _name="player.attacks.down"),
+            LeftAttacK: Pool(lambda: LeftAttacK(self._data, self._sprite, self._side_hitbox), PlayerAttack.reset, 1,
+                             _name="player.attacks.left"),
+            RightAttack: Pool(lambda: RightAttack(self._data, self._sprite, self._side_hitbox), PlayerAttack.reset, 1,
+                              _name="player.attacks.right")}
+        PlayerHits.reserve(1)
+
     def draw(self):
         if self._current_attack:
             self._current_attack.draw()
@@ -186,15 +259,47 @@ class PlayerWeapon:
             self._data.vel = self._current_attack.check_attack()
 
             self._last_attack = Clock.frame
-        else:
-            self._current_attack = None
+        elif self._current_attack:
+            self._end_attack()
+
+    def _end_attack(self):
+        self._current_attack.finish()
+        self._attacks[type(self._current_attack)].release(self._current_attack)
+        self._current_attack = None
+
+    def snapshot(self) -> Tuple[int, int, int, bool]:
+        """
+        When the last attack was, which attack is out, -1 for none, when it was swung and if it struck terrain.
+        """
+        _attack = self._current_attack
+        if _attack is None:
+            return self._last_attack, -1, 0, False
+        return self._last_attack, self.c_attack_kinds.index(type(_attack)), _attack.spawn_frame, _attack.struck
+
+    def restore(self, _last_attack: int, _kind: int, _spawn_frame: int, _struck: bool):
+        """
+        Puts the attacks back as a snapshot had them. The hit an attack showed on terrain isn't kept.
+        """
+        self._last_attack = _last_attack
+        _type = self.c_attack_kinds[_kind] if _kind >= 0 else None
+        if self._current_attack is not None and type(self._current_attack) is not _type:
+            self._end_attack()
+        if _type is not None:
+            if self._current_attack is None:
+                self._current_attack = self._attacks[_type].acquire()
+                self._sprite.scale_xy = (-1.0, 1.0) if _type is LeftAttacK else (1.0, 1.0)
+                self._sprite.texture = self._down_swipe if _type is DownAttack else self._side_swipe
+            if not _struck:
+                self._current_attack.finish()
+            self._current_attack.restore(_spawn_frame, _struck)
+            self._current_attack.update_position()
 
     def attack_downward(self):
         if not self._current_attack and Clock.frame_length(self._last_attack) > self.c_attack_delay:
             self._last_attack = 0
             self._sprite.scale_xy = (1.0, 1.0)
             self._sprite.texture = self._down_swipe
-            self._current_attack = DownAttack(self._data, self._sprite, self._down_hitbox)
+            self._current_attack = self._attacks[DownAttack].acquire()
             self._current_attack.update_position()
 
     def attack_left(self):
@@ -202,7 +307,7 @@ class PlayerWeapon:
             self._last_attack = 0
             self._sprite.scale_xy = (-1.0, 1.0)
             self._sprite.texture = self._side_swipe
-            self._current_attack = LeftAttacK(self._data, self._sprite, self._side_hitbox)
+            self._current_attack = self._attacks[LeftAttacK].acquire()
             self._current_attack.update_position()
 
     def attack_right(self):
@@ -210,6 +315,13 @@ class PlayerWeapon:
             self._last_attack = 0
             self._sprite.scale_xy = (1.0, 1.0)
             self._sprite.texture = self._side_swipe
-            self._current_attack = RightAttack(self._data, self._sprite, self._side_hitbox)
+            self._current_attack = self._attacks[RightAttack].acquire()
             self._current_attack.update_position()
 
+    @property
+    def attacks(self) -> Dict[Type[PlayerAttack], Pool[PlayerAttack]]:
+        return self._attacks
+
+    @property
+    def current_attack(self) -> PlayerAttack:
+        return self._current_attack
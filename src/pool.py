@@ -0,0 +1,128 @@
+from typing import Callable, Dict, Generic, List, Optional, TypeVar
+
+T = TypeVar('T')
+
+
+class Pool(Generic[T]):
+    """
+    Objects made once and handed out again, for the short lived things of a fight, attacks, hits and projectiles,
+    so a busy frame makes no garbage. acquire() takes a free object, or makes one with _factory when there are
+    none, and passes it to _reset with its arguments to ready it. release() gives it back.
+
+    At most _max_size free objects are kept, any more released are dropped. The high water mark is the most ever in
+    use at once, what the pool should be reserved to so it never has to make one mid fight.
+    """
+
+    def __init__(self, _factory: Callable[[], T], _reset: Optional[Callable[..., None]] = None, _size: int = 0,
+                 _max_size: Optional[int] = None, _name: Optional[str] = None):
+        self._factory: Callable[[], T] = _factory
+        self._reset: Optional[Callable[..., None]] = _reset
+        self._max_size: Optional[int] = _max_size
+
+        self._free: List[T] = []
+        # The objects handed out, by their id. Holding them keeps an object dropped without a release alive, so its
+        # id can't be reused by another object which is then mistaken for it.
+        self._in_use: Dict[int, T] = dict()
+
+        self._created: int = 0
+        self._acquired: int = 0
+        self._misses: int = 0
+        self._high_water: int = 0
+
+        if _size:
+            self.reserve(_size)
+        if _name is not None:
+            Pools.register(_name, self)
+
+    def reserve(self, _size: int):
+        """
+        Makes objects until there are at least _size, in use or free.
+        """
+        while len(self._free) + len(self._in_use) < _size:
+            self._free.append(self._factory())
+            self._created += 1
+
+    def acquire(self, *_args) -> T:
+        if self._free:
+            _object = self._free.pop()
+        else:
+            _object = self._factory()
+            self._created += 1
+            self._misses += 1
+        if self._reset is not None:
+            self._reset(_object, *_args)
+
+        self._in_use[id(_object)] = _object
+        self._acquired += 1
+        if len(self._in_use) > self._high_water:
+            self._high_water = len(self._in_use)
+        return _object
+
+    def release(self, _object: T):
+        if self._in_use.get(id(_object)) is not _object:
+            raise ValueError(f"{_object!r} was not acquired from this pool or was already released")
+        del self._in_use[id(_object)]
+        if self._max_size is None or len(self._free) < self._max_size:
+            self._free.append(_object)
+
+    def clear(self):
+        """
+        Drops every free object, the ones in use are still released as normal.
+        """
+        self._free = []
+
+    def to_dict(self) -> Dict[str, int]:
+        return {'created': self._created, 'acquired': self._acquired, 'misses': self._misses,
+                'in_use': self.in_use, 'free': self.free, 'high_water': self._high_water}
+
+    @property
+    def in_use(self) -> int:
+        return len(self._in_use)
+
+    @property
+    def free(self) -> int:
+        return len(self._free)
+
+    @property
+    def created(self) -> int:
+        return self._created
+
+    @property
+    def acquired(self) -> int:
+        return self._acquired
+
+    @property
+    def misses(self) -> int:
+        """
+        How many times acquire() had to make an object.
+        """
+        return self._misses
+
+    @property
+    def high_water(self) -> int:
+        return self._high_water
+
+
+class PoolRegistry:
+    """
+    Every named pool, so their statistics can be looked at together.
+    """
+
+    def __init__(self):
+        self._pools: Dict[str, Pool] = dict()
+
+    def register(self, _name: str, _pool: Pool):
+        self._pools[_name] = _pool
+
+    def get(self, _name: str) -> Optional[Pool]:
+        return self._pools.get(_name)
+
+    def stats(self) -> Dict[str, Dict[str, int]]:
+        return {_name: _pool.to_dict() for _name, _pool in self._pools.items()}
+
+    @property
+    def names(self) -> List[str]:
+        return list(self._pools)
+
+
+Pools = PoolRegistry()
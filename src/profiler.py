@@ -0,0 +1,198 @@
+from typing import Dict, List, Optional, Tuple
+from array import array
+from json import dump
+from time import perf_counter_ns
+
+import numpy as np
+from arcade import Text
+
+from src.clock import Clock
+from src.util import PROFILE
+
+
+class _Scope:
+    """
+    Times the block it is entered around and records it under its name. One per name, so the same scope can't be
+    nested in itself.
+    """
+    __slots__ = ('_profiler', '_name', '_start')
+
+    def __init__(self, _profiler: "FrameProfiler", _name: str):
+        self._profiler = _profiler
+        self._name = _name
+        self._start: int = 0
+
+    def __enter__(self):
+        self._start = perf_counter_ns()
+        return self
+
+    def __exit__(self, *_):
+        self._profiler.record(self._name, perf_counter_ns() - self._start)
+
+
+class _NullScope:
+    """
+    What every scope is while profiling is off, entering and leaving it does nothing.
+    """
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *_):
+        pass
+
+
+_null_scope = _NullScope()
+
+
+class FrameProfiler:
+    """
+    Named timing scopes around the stages of a step or a draw. Each name keeps its last c_capacity times in
+    nanoseconds, with the clock frame they were taken on, in a ring buffer. While disabled scope() hands back a
+    shared scope which does nothing, so the stages can stay wrapped in release builds.
+    """
+    c_capacity: int = 4096
+    # Seconds between the overlay's percentiles being worked out again, sorting every ring each frame costs more
+    # than the stages it measures
+    c_draw_interval: float = 0.25
+
+    def __init__(self, _enabled: bool = False, _capacity: int = None):
+        self._enabled: bool = _enabled
+        self._capacity: int = _capacity or self.c_capacity
+
+        self._scopes: Dict[str, _Scope] = dict()
+        self._times: Dict[str, array] = dict()
+        self._frames: Dict[str, array] = dict()
+        self._counts: Dict[str, int] = dict()
+
+        # The overlay's lines as last worked out, when that was, and the Text each scope is drawn with
+        self._lines: List[Tuple[str, str]] = []
+        self._lines_at: Optional[int] = None
+        self._texts: Dict[str, Text] = dict()
+
+    def enable(self):
+        self._enabled = True
+
+    def disable(self):
+        self._enabled = False
+
+    def reset(self):
+        self._scopes, self._times, self._frames, self._counts = dict(), dict(), dict(), dict()
+        self._lines, self._lines_at = [], None
+
+    def scope(self, _name: str):
+        """
+        A context manager timing the block inside it as _name.
+        """
+        if not self._enabled:
+            return _null_scope
+        _scope = self._scopes.get(_name)
+        if _scope is None:
+            _scope = self._scopes[_name] = _Scope(self, _name)
+        return _scope
+
+    def record(self, _name: str, _time: int):
+        if _name not in self._counts:
+            self._times[_name] = array('q', bytes(8 * self._capacity))
+            self._frames[_name] = array('q', bytes(8 * self._capacity))
+            self._counts[_name] = 0
+        _index = self._counts[_name] % self._capacity
+        self._times[_name][_index] = _time
+        self._frames[_name][_index] = Clock.frame
+        self._counts[_name] += 1
+
+    def _ordered(self, _ring: array, _count: int) -> np.ndarray:
+        _values = np.frombuffer(_ring, dtype=np.int64)
+        if _count <= self._capacity:
+            return _values[:_count].copy()
+        return np.roll(_values, -(_count % self._capacity))
+
+    def samples(self, _name: str) -> np.ndarray:
+        """
+        The times kept for _name in nanoseconds, oldest first.
+        """
+        return self._ordered(self._times[_name], self._counts[_name])
+
+    def frames(self, _name: str) -> np.ndarray:
+        return self._ordered(self._frames[_name], self._counts[_name])
+
+    def summary(self, _name: str) -> Dict[str, float]:
+        """
+        How many times _name was recorded, and the mean, p50, p95 and p99 of the kept times in microseconds.
+        """
+        _samples = self.samples(_name) / 1000.0
+        _p50, _p95, _p99 = np.percentile(_samples, (50, 95, 99))
+        return {"count": self._counts[_name], "mean": float(_samples.mean()),
+                "p50": float(_p50), "p95": float(_p95), "p99": float(_p99)}
+
+    def summaries(self) -> Dict[str, Dict[str, float]]:
+        return {_name: self.summary(_name) for _name in self._counts}
+
+    def to_csv(self, _path: str):
+        with open(_path, 'w') as _file:
+            _file.write("scope,frame,ns\n")
+            for _name in self._counts:
+                for _frame, _time in zip(self.frames(_name).tolist(), self.samples(_name).tolist()):
+                    _file.write(f"{_name},{_frame},{_time}\n")
+
+    def to_json(self, _path: str):
+        with open(_path, 'w') as _file:
+            dump({_name: {"summary": self.summary(_name), "frames": self.frames(_name).tolist(),
+                          "ns": self.samples(_name).tolist()} for _name in self._counts}, _file)
+
+    def save(self, _path: str):
+        """
+        Writes every kept time to _path, as JSON with summaries if it ends in .json and as CSV otherwise.
+        """
+        if _path.endswith(".json"):
+            self.to_json(_path)
+        else:
+            self.to_csv(_path)
+
+    def lines(self, _names: Optional[List[str]] = None) -> List[Tuple[str, str]]:
+        """
+        The overlay line of each scope, (name, p50 / p95 / p99), worked out again at most every c_draw_interval.
+        """
+        _now = perf_counter_ns()
+        if self._lines_at is None or _now - self._lines_at >= self.c_draw_interval * 1e9:
+            self._lines_at = _now
+            self._lines = []
+            for _name in _names or self._counts:
+                if _name not in self._counts:
+                    continue
+                _summary = self.summary(_name)
+                self._lines.append((_name, f"{_name}: {_summary['p50']:.0f} / {_summary['p95']:.0f} / "
+                                           f"{_summary['p99']:.0f} us"))
+        return self._lines
+
+    def draw(self, _left: float, _top: float, _names: Optional[List[str]] = None):
+        """
+        Draws the p50, p95 and p99 of each scope as a column of text, starting from the top left corner. Each
+        scope keeps its Text, so only a line which changed is laid out again.
+        """
+        for _index, (_name, _line) in enumerate(self.lines(_names)):
+            _position = (_left, _top - 20 * _index)
+            _text = self._texts.get(_name)
+            if _text is None:
+                _text = self._texts[_name] = Text(_line, *_position)
+            # Setting either to what it already is does nothing
+            _text.text = _line
+            if _text.position != _position:
+                _text.position = _position
+            _text.draw()
+
+    @property
+    def enabled(self) -> bool:
+        return self._enabled
+
+    @property
+    def names(self) -> List[str]:
+        return list(self._counts)
+
+    @property
+    def capacity(self) -> int:
+        return self._capacity
+
+
+Profiler = FrameProfiler(PROFILE is not None)
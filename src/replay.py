@@ -0,0 +1,237 @@
+from typing import Dict, List, Optional, Tuple, TYPE_CHECKING
+if TYPE_CHECKING:
+    from src.player.player import PlayerCharacter
+
+from array import array
+from struct import pack, unpack_from, calcsize
+from zlib import crc32
+
+from data.arcade_keys_str_id import Keyboard, Mouse
+
+from src.clock import Clock
+from src.input import Input
+
+c_magic: bytes = b'GFIR'
+c_version: int = 1
+# Start room, clock and player position, then the names of the keys in the order of their bits
+c_header: str = '<4sBIddddB'
+c_state: str = '<I6d4B'
+
+
+def state_hash(_player: "PlayerCharacter") -> int:
+    """
+    CRC32 of the clock frame and everything about the player a step changes, to check a replay stays in sync.
+    """
+    _data = _player.p_data
+    _state = type(_player.p_state_switch.state).__name__.encode()
+    return crc32(pack(c_state, Clock.frame, _data.x, _data.y, _data.vel_x, _data.vel_y, _data.acc_x, _data.acc_y,
+                      _data.on_ground, _data.on_ciel, _data.on_left, _data.on_right), crc32(_state))
+
+
+def _write_name(_log: bytearray, _name: str):
+    _encoded = _name.encode()
+    _log.append(len(_encoded))
+    _log.extend(_encoded)
+
+
+def _read_name(_log: bytes, _offset: int) -> Tuple[str, int]:
+    _length = _log[_offset]
+    return _log[_offset + 1:_offset + 1 + _length].decode(), _offset + 1 + _length
+
+
+def _write_varint(_log: bytearray, _value: int):
+    while _value >= 0x80:
+        _log.append(_value & 0x7F | 0x80)
+        _value >>= 7
+    _log.append(_value)
+
+
+def _read_varint(_log: bytes, _offset: int) -> Tuple[int, int]:
+    _value = _shift = 0
+    while True:
+        _byte = _log[_offset]
+        _offset += 1
+        _value |= (_byte & 0x7F) << _shift
+        if not _byte & 0x80:
+            return _value, _offset
+        _shift += 7
+
+
+class InputRecorder:
+    """
+    Records which bound keys are down at the start of every fixed step. Only steps where a key changed are written,
+    as the number of steps since the last change and the bits which flipped, so a held key costs nothing. After
+    each step the state hash is stored as well.
+    """
+
+    def __init__(self, _start: Tuple[str, str], _player: "PlayerCharacter"):
+        self._start = _start
+        self._clock = (Clock.frame, Clock.time, Clock.const_time)
+        self._position = tuple(_player.position)
+
+        self._keys: Tuple[str, ...] = Input.bound_keys
+        self._bits: Dict[str, int] = {_name: 1 << _bit for _bit, _name in enumerate(self._keys)}
+        self._width: int = (len(self._keys) + 7) // 8
+
+        self._held: int = 0
+        self._last_frame: int = Clock.frame
+        self._changes: int = 0
+        self._records: bytearray = bytearray()
+        self._hashes: array = array('I')
+
+    def capture(self):
+        """
+        Called at the start of a fixed step, before the clock ticks.
+        """
+        _held = 0
+        for _name in Input.held_keys:
+            _held |= self._bits[_name]
+        if _held != self._held:
+            _write_varint(self._records, Clock.frame - self._last_frame)
+            self._records.extend((_held ^ self._held).to_bytes(self._width, 'little'))
+            self._held, self._last_frame = _held, Clock.frame
+            self._changes += 1
+
+    def hash_step(self, _player: "PlayerCharacter"):
+        """
+        Called at the end of a fixed step.
+        """
+        self._hashes.append(state_hash(_player))
+
+    def to_bytes(self) -> bytes:
+        _log = bytearray(pack(c_header, c_magic, c_version, *self._clock, *self._position, len(self._keys)))
+        _write_name(_log, self._start[0])
+        _write_name(_log, self._start[1])
+        for _name in self._keys:
+            _write_name(_log, _name)
+
+        _log.extend(pack('<I', self._changes))
+        _log.extend(self._records)
+        _log.extend(pack('<I', len(self._hashes)))
+        _log.extend(self._hashes.tobytes())
+        return bytes(_log)
+
+    def save(self, _path: str):
+        with open(_path, 'wb') as _file:
+            _file.write(self.to_bytes())
+
+    @property
+    def steps(self) -> int:
+        return len(self._hashes)
+
+    @property
+    def changes(self) -> int:
+        return self._changes
+
+
+class InputReplayer:
+    """
+    Plays an InputRecorder log back through the same key callbacks the window uses. restart() puts the clock back
+    to where the recording started, and the hash of every step is checked against the recorded one.
+    """
+
+    def __init__(self, _log: bytes):
+        _magic, _version, _frame, _time, _const_time, _x, _y, _count = unpack_from(c_header, _log)
+        if _magic != c_magic or _version != c_version:
+            raise ValueError(f"not an input log of version {c_version}")
+        self._clock: Tuple[int, float, float] = (_frame, _time, _const_time)
+        self._position: Tuple[float, float] = (_x, _y)
+
+        _offset = calcsize(c_header)
+        _region, _offset = _read_name(_log, _offset)
+        _room, _offset = _read_name(_log, _offset)
+        self._start: Tuple[str, str] = (_region, _room)
+        self._keys: List[str] = []
+        for _ in range(_count):
+            _name, _offset = _read_name(_log, _offset)
+            self._keys.append(_name)
+        _width = (_count + 7) // 8
+
+        # (frame, keys to release, keys to press), frames relative to the start of the recording
+        self._changes: List[Tuple[int, Tuple[str, ...], Tuple[str, ...]]] = []
+        _held = _frame_offset = 0
+        (_changes,), _offset = unpack_from('<I', _log, _offset), _offset + 4
+        for _ in range(_changes):
+            _delta, _offset = _read_varint(_log, _offset)
+            _flipped = int.from_bytes(_log[_offset:_offset + _width], 'little')
+            _offset += _width
+            _frame_offset += _delta
+            _released = tuple(_name for _bit, _name in enumerate(self._keys) if _flipped & _held & (1 << _bit))
+            _pressed = tuple(_name for _bit, _name in enumerate(self._keys) if _flipped & ~_held & (1 << _bit))
+            _held ^= _flipped
+            self._changes.append((_frame_offset, _released, _pressed))
+
+        (_steps,), _offset = unpack_from('<I', _log, _offset), _offset + 4
+        self._hashes: array = array('I')
+        self._hashes.frombytes(_log[_offset:_offset + 4 * _steps])
+
+        self._next: int = 0
+        self._mismatch: Optional[int] = None
+
+    @classmethod
+    def load(cls, _path: str) -> "InputReplayer":
+        with open(_path, 'rb') as _file:
+            return cls(_file.read())
+
+    def restart(self):
+        Clock.restart(*self._clock)
+        self._next = 0
+        self._mismatch = None
+
+    def apply(self):
+        """
+        Called at the start of a fixed step, before the clock ticks. Keys which changed on the same step are
+        released before any are pressed.
+        """
+        _frame = Clock.frame - self._clock[0]
+        while self._next < len(self._changes) and self._changes[self._next][0] <= _frame:
+            _, _released, _pressed = self._changes[self._next]
+            for _name in _released:
+                if _name in Mouse.key_str:
+                    Input.p_mouse_release(Mouse.key_str[_name])
+                else:
+                    Input.p_key_release(Keyboard.key_str[_name])
+            for _name in _pressed:
+                if _name in Mouse.key_str:
+                    Input.p_mouse_press(Mouse.key_str[_name])
+                else:
+                    Input.p_key_press(Keyboard.key_str[_name])
+            self._next += 1
+
+    def check(self, _player: "PlayerCharacter") -> bool:
+        """
+        Called at the end of a fixed step. Returns False, and keeps the frame, the first time a hash differs.
+        """
+        _step = Clock.frame - self._clock[0] - 1
+        if _step >= len(self._hashes) or self._hashes[_step] == state_hash(_player):
+            return True
+        if self._mismatch is None:
+            self._mismatch = Clock.frame
+        return False
+
+    @property
+    def start(self) -> Tuple[str, str]:
+        return self._start
+
+    @property
+    def position(self) -> Tuple[float, float]:
+        return self._position
+
+    @property
+    def start_frame(self) -> int:
+        return self._clock[0]
+
+    @property
+    def steps(self) -> int:
+        return len(self._hashes)
+
+    @property
+    def finished(self) -> bool:
+        return Clock.frame - self._clock[0] >= len(self._hashes)
+
+    @property
+    def mismatch(self) -> Optional[int]:
+        """
+        The first frame whose state hash didn't match the recording, None while in sync.
+        """
+        return self._mismatch
@@ -0,0 +1,160 @@
+from typing import Dict, Iterator, List, Optional, Tuple, Union
+from os import path, makedirs, replace, fdopen, remove
+from tempfile import mkstemp
+from json import loads, dumps
+
+from PIL import Image
+
+from src.room_cache import RoomData, FLIPPED_HORIZONTALLY, FLIPPED_VERTICALLY, FLIPPED_DIAGONALLY
+from src.util import cache_root
+
+
+def _tile_image(_data: RoomData, _gid: int, _images: Dict[str, Image.Image]) -> Image.Image:
+    # Flips are applied in the same order as arcade.load_texture so baked tiles match the tile sprites
+    _image, _x, _y, _width, _height = _data.tile(_gid)
+    if _image not in _images:
+        _images[_image] = Image.open(_data.image_path(_image)).convert("RGBA")
+
+    _tile = _images[_image].crop((_x, _y, _x + _width, _y + _height))
+    if _gid & FLIPPED_DIAGONALLY:
+        _tile = _tile.transpose(Image.Transpose.TRANSPOSE)
+    if _gid & FLIPPED_HORIZONTALLY:
+        _tile = _tile.transpose(Image.Transpose.FLIP_LEFT_RIGHT)
+    if _gid & FLIPPED_VERTICALLY:
+        _tile = _tile.transpose(Image.Transpose.FLIP_TOP_BOTTOM)
+    return _tile
+
+
+class ChunkBaker:
+    """
+    Composites the static tile layers of a room into fixed size chunk images, so a room draws a handful of chunk
+    sprites instead of one sprite per tile. Chunks are saved as pngs under the content hash of the room and only
+    baked again when the room changes. Like the room cache it does not import arcade.
+
+    Chunks are laid out from the bottom left of the room, and fully transparent chunks are skipped. When the cache
+    can't be written the chunks are handed out as images instead, made again each time the room loads.
+    """
+    # Under the cache root unless a directory is given
+    c_cache_dir: str = "chunks"
+    c_version: int = 1
+    c_chunk_size: int = 512
+
+    def __init__(self, _cache_dir: str = None):
+        self._cache_dir: Optional[str] = _cache_dir
+        self._baked: int = 0
+        self._loaded: int = 0
+        self._unbaked: int = 0
+
+    def chunk_dir(self, _data: RoomData) -> str:
+        return path.join(self.cache_dir, f"{_data.hash}.{self.c_version}")
+
+    def chunks(self, _data: RoomData, _layer: str) -> List[Tuple[Union[str, Image.Image], int, int, int, int]]:
+        """
+        The chunks of a layer as (png path, left, bottom, width, height) in world pixels, baking them if the
+        room has not been baked before. If the cache can't be written or read, the png path is the chunk image.
+        """
+        _manifest = path.join(self.chunk_dir(_data), f"{_layer}.json")
+        try:
+            if not path.exists(_manifest):
+                self.bake(_data, _layer)
+            else:
+                self._loaded += 1
+
+            with open(_manifest, 'r') as _file:
+                return [(path.join(self.chunk_dir(_data), _chunk[0]), *_chunk[1:])
+                        for _chunk in loads(_file.read())]
+        except OSError:
+            self._unbaked += 1
+            return [_chunk[1:] for _chunk in self._split(self.composite(_data, _layer), _layer)]
+
+    def composite(self, _data: RoomData, _layer: str) -> Image.Image:
+        """
+        The whole layer as one image. Tiles larger than the grid are anchored to the bottom left of their cell,
+        the same as the tile sprites, and anything past the edge of the room is cut off.
+        """
+        _px_width, _px_height = _data.width * _data.tile_width, _data.height * _data.tile_height
+        _canvas = Image.new("RGBA", (_px_width, _px_height))
+        _images: Dict[str, Image.Image] = dict()
+
+        for _index, _gid in enumerate(_data.layer(_layer)):
+            if not _gid:
+                continue
+            _row, _column = divmod(_index, _data.width)
+            _tile = _tile_image(_data, _gid, _images)
+
+            # Image.alpha_composite won't take a destination off the canvas, so crop the part above the room
+            _left, _top = _column * _data.tile_width, (_row + 1) * _data.tile_height - _tile.height
+            if _top < 0:
+                _tile = _tile.crop((0, -_top, _tile.width, _tile.height))
+                _top = 0
+            _canvas.alpha_composite(_tile, dest=(_left, _top))
+        return _canvas
+
+    def _split(self, _canvas: Image.Image, _layer: str) -> Iterator[Tuple[str, Image.Image, int, int, int, int]]:
+        # The chunks of a composited layer which aren't fully transparent, as (png name, image, left, bottom,
+        # width, height)
+        _size = self.c_chunk_size
+        for _bottom in range(0, _canvas.height, _size):
+            for _left in range(0, _canvas.width, _size):
+                _width, _height = min(_size, _canvas.width - _left), min(_size, _canvas.height - _bottom)
+                _top = _canvas.height - _bottom - _height
+                _chunk = _canvas.crop((_left, _top, _left + _width, _top + _height))
+                if _chunk.getbbox() is None:
+                    continue
+                yield f"{_layer}_{_left // _size}_{_bottom // _size}.png", _chunk, _left, _bottom, _width, _height
+
+    @staticmethod
+    def _write(_target: str, _write_to):
+        # Written to a file of its own next to the target and swapped in, so a loader thread baking the same room
+        # never reads a half written file
+        _temp = None
+        try:
+            _handle, _temp = mkstemp(suffix=".tmp", dir=path.dirname(_target))
+            with fdopen(_handle, 'wb') as _file:
+                _write_to(_file)
+            replace(_temp, _target)
+        except OSError:
+            if _temp is not None and path.exists(_temp):
+                remove(_temp)
+            raise
+
+    def bake(self, _data: RoomData, _layer: str):
+        _canvas = self.composite(_data, _layer)
+        _chunk_dir = self.chunk_dir(_data)
+        makedirs(_chunk_dir, exist_ok=True)
+
+        _chunks = []
+        for _name, _chunk, _left, _bottom, _width, _height in self._split(_canvas, _layer):
+            self._write(path.join(_chunk_dir, _name), lambda _file: _chunk.save(_file, format="PNG"))
+            _chunks.append((_name, _left, _bottom, _width, _height))
+
+        # The manifest is written last so an interrupted bake is redone
+        _manifest = dumps(_chunks).encode('utf-8')
+        self._write(path.join(_chunk_dir, f"{_layer}.json"), lambda _file: _file.write(_manifest))
+        self._baked += 1
+
+    @property
+    def cache_dir(self) -> str:
+        return self._cache_dir or path.join(cache_root(), self.c_cache_dir)
+
+    @cache_dir.setter
+    def cache_dir(self, _cache_dir: Optional[str]):
+        self._cache_dir = _cache_dir
+
+    @property
+    def baked(self):
+        return self._baked
+
+    @property
+    def loaded(self):
+        return self._loaded
+
+    @property
+    def unbaked(self):
+        """
+        How many layers were handed out as images because the cache couldn't be written.
+        """
+        return self._unbaked
+
+
+Baker: ChunkBaker = ChunkBaker()
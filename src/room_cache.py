@@ -0,0 +1,399 @@
+from typing import Dict, List, Optional, Tuple, Any
+from os import path, makedirs, replace, stat, fdopen, remove
+from tempfile import mkstemp
+from json import loads, dumps
+from xml.etree import ElementTree
+from hashlib import sha1
+from array import array
+from mmap import mmap, ACCESS_READ
+from struct import Struct
+
+from src.util import cache_root
+
+FLIPPED_HORIZONTALLY: int = 0x80000000
+FLIPPED_VERTICALLY: int = 0x40000000
+FLIPPED_DIAGONALLY: int = 0x20000000
+GID_MASK: int = 0x1FFFFFFF
+
+
+def _properties(_tiled: Dict[str, Any]) -> Dict[str, Any]:
+    return {_property['name']: _property['value'] for _property in _tiled.get('properties', ())}
+
+
+def _read_tileset(_src: str, _tileset: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Reads either an external .tsx tileset or a tileset embedded in the .tmj into a flat dict. Image paths are kept
+    relative to the directory of the map so the compiled room does not depend on where the project lives.
+    """
+    _map_dir = path.dirname(_src)
+
+    if 'source' not in _tileset:
+        _tile_dir = ""
+        _data = {'tilewidth': _tileset['tilewidth'], 'tileheight': _tileset['tileheight'],
+                 'columns': _tileset.get('columns', 0), 'margin': _tileset.get('margin', 0),
+                 'spacing': _tileset.get('spacing', 0), 'image': _tileset.get('image', None),
+                 'tiles': {_tile['id']: (_tile['image'], _tile['imagewidth'], _tile['imageheight'])
+                           for _tile in _tileset.get('tiles', ()) if 'image' in _tile}}
+    else:
+        _tile_dir = path.dirname(_tileset['source'])
+        _root = ElementTree.parse(path.join(_map_dir, _tileset['source'])).getroot()
+        _image = _root.find('image')
+        _data = {'tilewidth': int(_root.get('tilewidth')), 'tileheight': int(_root.get('tileheight')),
+                 'columns': int(_root.get('columns', 0)), 'margin': int(_root.get('margin', 0)),
+                 'spacing': int(_root.get('spacing', 0)),
+                 'image': _image.get('source') if _image is not None else None,
+                 'tiles': {int(_tile.get('id')): (_tile.find('image').get('source'),
+                                                  int(_tile.find('image').get('width')),
+                                                  int(_tile.find('image').get('height')))
+                           for _tile in _root.findall('tile') if _tile.find('image') is not None}}
+
+    if _data['image']:
+        _data['image'] = path.normpath(path.join(_tile_dir, _data['image']))
+    _data['tiles'] = {_id: (path.normpath(path.join(_tile_dir, _image)), _w, _h)
+                      for _id, (_image, _w, _h) in _data['tiles'].items()}
+    return _data
+
+
+def _tile_source(_gid: int, _tilesets: List[Tuple[int, Dict[str, Any]]]) -> Tuple[str, int, int, int, int]:
+    _gid &= GID_MASK
+    _first, _tileset = max((_set for _set in _tilesets if _set[0] <= _gid), key=lambda _set: _set[0])
+    _id = _gid - _first
+
+    if _tileset['image']:
+        _w, _h = _tileset['tilewidth'], _tileset['tileheight']
+        _x = _tileset['margin'] + (_id % _tileset['columns']) * (_w + _tileset['spacing'])
+        _y = _tileset['margin'] + (_id // _tileset['columns']) * (_h + _tileset['spacing'])
+        return _tileset['image'], _x, _y, _w, _h
+
+    _image, _w, _h = _tileset['tiles'][_id]
+    return _image, 0, 0, _w, _h
+
+
+def _greedy_mesh(_gids, _width: int, _height: int, _merge_rows: bool) -> List[Tuple[int, int, int, int]]:
+    """
+    Merges the filled cells of a tile layer into as few rectangles as possible. Each run of a row is grown
+    as far right as it goes, then up while every cell above is free. Returns (column, row, last column, last row)
+    with row 0 at the bottom of the room.
+    """
+    _filled = [[bool(_gids[(_height - 1 - _row) * _width + _column]) for _column in range(_width)]
+               for _row in range(_height)]
+    _rects = []
+    for _row in range(_height):
+        _column = 0
+        while _column < _width:
+            if not _filled[_row][_column]:
+                _column += 1
+                continue
+
+            _last_column = _column
+            while _last_column + 1 < _width and _filled[_row][_last_column + 1]:
+                _last_column += 1
+
+            _last_row = _row
+            while (_merge_rows and _last_row + 1 < _height and
+                   all(_filled[_last_row + 1][_column:_last_column + 1])):
+                _last_row += 1
+
+            for _used in range(_row, _last_row + 1):
+                _filled[_used][_column:_last_column + 1] = [False] * (_last_column + 1 - _column)
+
+            _rects.append((_column, _row, _last_column, _last_row))
+            _column = _last_column + 1
+    return _rects
+
+
+class RoomData:
+    """
+    The compiled form of a Tiled room. Tile layers are flat row-major GID arrays (top row first, as in Tiled),
+    object layers are lists of plain dicts, and every GID used in the room maps to the region of the image it
+    is drawn from. When loaded from the cache the GID arrays are views into a memory mapped file.
+    """
+
+    def __init__(self, _src: str, _hash: bytes, _width: int, _height: int, _tile_width: int, _tile_height: int,
+                 _layers: Dict[str, Any], _meta: Dict[str, Any], _buffer: Any = None):
+        self._src = _src
+        self._hash = _hash
+
+        self._width = _width
+        self._height = _height
+        self._tile_width = _tile_width
+        self._tile_height = _tile_height
+
+        self._layers = _layers
+        self._meta = _meta
+        self._tiles: Dict[int, Tuple[str, int, int, int, int]] = {int(_gid): tuple(_tile) for _gid, _tile
+                                                                   in _meta['tiles'].items()}
+
+        self._buffer = _buffer
+
+    def __repr__(self):
+        return f"RoomData({self._src})"
+
+    def __getstate__(self):
+        # The memory map can't cross a process boundary, so the GID views are copied into plain arrays.
+        _state = self.__dict__.copy()
+        _state['_layers'] = {_name: array('I', _gids) for _name, _gids in self._layers.items()}
+        _state['_buffer'] = None
+        return _state
+
+    def layer(self, _name: str):
+        return self._layers[_name]
+
+    def objects(self, _name: str) -> List[Dict[str, Any]]:
+        return self._meta['objects'].get(_name, [])
+
+    def properties(self, _name: str) -> Dict[str, Any]:
+        return self._meta['properties'].get(_name, {})
+
+    def colliders(self, _name: str) -> List[Tuple[int, int, int, int]]:
+        """
+        The greedy meshed rectangles of a collision layer, in cells with row 0 at the bottom.
+        """
+        return [tuple(_rect) for _rect in self._meta['colliders'].get(_name, ())]
+
+    def tile(self, _gid: int) -> Tuple[str, int, int, int, int]:
+        """
+        Returns the image path (relative to the map) and the x, y, width, height region of the tile.
+        """
+        return self._tiles[_gid & GID_MASK]
+
+    def image_path(self, _image: str) -> str:
+        return path.normpath(path.join(path.dirname(self._src), _image))
+
+    @property
+    def src(self):
+        return self._src
+
+    @property
+    def hash(self) -> str:
+        return self._hash.hex()
+
+    @property
+    def layer_names(self) -> List[str]:
+        return self._meta['order']
+
+    @property
+    def tile_layers(self) -> List[str]:
+        return list(self._layers.keys())
+
+    @property
+    def object_layers(self) -> List[str]:
+        return list(self._meta['objects'].keys())
+
+    @property
+    def width(self):
+        return self._width
+
+    @property
+    def height(self):
+        return self._height
+
+    @property
+    def tile_width(self):
+        return self._tile_width
+
+    @property
+    def tile_height(self):
+        return self._tile_height
+
+    @property
+    def tilesets(self) -> List[Tuple[int, str]]:
+        return [tuple(_tileset) for _tileset in self._meta['tilesets']]
+
+
+class CompiledRoomCache:
+    """
+    Compiles .tmj rooms into a compact binary file which is memory mapped on the next launch instead of parsing
+    the JSON again. It takes plain file paths and does not import arcade, so it can run in worker processes.
+    The file layout is:
+
+        header | json meta (layer order, properties, objects, tile sources, colliders) | padding | uint32 GID arrays
+
+    A cached room is valid while the source mtime matches, and if the mtime changed but the sha1 of the
+    source didn't the header is updated in place rather than recompiling. When the cache can't be written the
+    room is parsed in memory instead.
+    """
+    # Under the cache root unless a directory is given
+    c_cache_dir: str = "rooms"
+    c_magic: bytes = b"GFRM"
+    c_version: int = 2
+
+    # Collision layers which are meshed at compile time, and whether their rectangles may span several rows.
+    # One way tiles are only solid at their top so they are kept to single rows.
+    c_mesh_layers: Dict[str, bool] = {"ground": True, "one_way": False, "spikes": True}
+
+    # magic, version, source mtime ns, source sha1, width, height, tile width, tile height, meta length
+    c_header: Struct = Struct("<4sHq20sHHHHI")
+
+    def __init__(self, _cache_dir: str = None):
+        self._cache_dir: Optional[str] = _cache_dir
+        self._compiled: int = 0
+        self._loaded: int = 0
+        self._uncached: int = 0
+
+    def cache_path(self, _src: str) -> str:
+        _room = path.splitext(path.basename(_src))[0]
+        _region = path.basename(path.dirname(_src))
+        return path.join(self.cache_dir, _region, f"{_room}.room")
+
+    def load(self, _src: str) -> RoomData:
+        _cache = self.cache_path(_src)
+        _mtime = stat(_src).st_mtime_ns
+
+        _data = self._read(_src, _cache, _mtime)
+        if _data is None:
+            _data = self.compile(_src, _cache)
+            if _data is None:
+                _data = self._read(_src, _cache, _mtime)
+        return _data
+
+    def compile(self, _src: str, _cache: str = None) -> Optional[RoomData]:
+        """
+        Compiles a room into the cache. If the cache can't be written the room is returned parsed in memory,
+        otherwise None and the cache is read.
+        """
+        _cache = _cache or self.cache_path(_src)
+
+        with open(_src, 'rb') as _file:
+            _raw = _file.read()
+        _hash = sha1(_raw).digest()
+        _json = loads(_raw)
+
+        _tilesets = [(_tileset['firstgid'], _read_tileset(_src, _tileset)) for _tileset in _json['tilesets']]
+
+        _order: List[str] = []
+        _layer_properties: Dict[str, Dict[str, Any]] = dict()
+        _objects: Dict[str, List[Dict[str, Any]]] = dict()
+        _gids: Dict[str, array] = dict()
+        _used = set()
+
+        for _layer in _json['layers']:
+            _name = _layer['name']
+            _order.append(_name)
+            _layer_properties[_name] = _properties(_layer)
+
+            if _layer['type'] == 'tilelayer':
+                _gids[_name] = array('I', _layer['data'])
+                _used.update(_gid for _gid in _gids[_name] if _gid)
+            elif _layer['type'] == 'objectgroup':
+                _objects[_name] = [{'id': _object['id'], 'name': _object.get('name', ""),
+                                    'gid': _object.get('gid', 0),
+                                    'x': _object['x'], 'y': _object['y'],
+                                    'width': _object.get('width', 0), 'height': _object.get('height', 0),
+                                    'rotation': _object.get('rotation', 0),
+                                    'properties': _properties(_object)}
+                                   for _object in _layer['objects']]
+                _used.update(_object['gid'] for _object in _objects[_name] if _object['gid'])
+
+        _meta = {'order': _order, 'properties': _layer_properties, 'objects': _objects,
+                 'layers': list(_gids.keys()),
+                 'tilesets': [(_tileset['firstgid'], _tileset.get('source', "")) for _tileset in _json['tilesets']],
+                 'tiles': {_gid & GID_MASK: _tile_source(_gid, _tilesets) for _gid in _used},
+                 'colliders': {_name: _greedy_mesh(_gids[_name], _json['width'], _json['height'], _merge)
+                               for _name, _merge in self.c_mesh_layers.items() if _name in _gids}}
+        _meta_bytes = dumps(_meta, separators=(',', ':')).encode('utf-8')
+        _padding = -(self.c_header.size + len(_meta_bytes)) % 4
+
+        _header = self.c_header.pack(self.c_magic, self.c_version, stat(_src).st_mtime_ns, _hash,
+                                     _json['width'], _json['height'], _json['tilewidth'], _json['tileheight'],
+                                     len(_meta_bytes))
+
+        _temp = None
+        try:
+            makedirs(path.dirname(_cache), exist_ok=True)
+            # Written to a file of its own next to the target and swapped in, so a half written file is never
+            # mapped and parser processes compiling the same room don't write over each other.
+            _handle, _temp = mkstemp(suffix=".tmp", dir=path.dirname(_cache))
+            with fdopen(_handle, 'wb') as _file:
+                _file.write(_header)
+                _file.write(_meta_bytes)
+                _file.write(bytes(_padding))
+                for _name in _meta['layers']:
+                    _file.write(_gids[_name].tobytes())
+            replace(_temp, _cache)
+        except OSError:
+            if _temp is not None and path.exists(_temp):
+                remove(_temp)
+            self._uncached += 1
+            return RoomData(_src, _hash, _json['width'], _json['height'], _json['tilewidth'], _json['tileheight'],
+                            _gids, loads(_meta_bytes))
+
+        self._compiled += 1
+        return None
+
+    def _read(self, _src: str, _cache: str, _mtime: int):
+        if not path.exists(_cache) or not path.getsize(_cache) >= self.c_header.size:
+            return None
+
+        with open(_cache, 'rb') as _file:
+            _buffer = mmap(_file.fileno(), 0, access=ACCESS_READ)
+
+        _magic, _version, _cache_mtime, _hash, _w, _h, _tw, _th, _meta_len = self.c_header.unpack_from(_buffer)
+        if _magic != self.c_magic or _version != self.c_version:
+            _buffer.close()
+            return None
+
+        if _cache_mtime != _mtime:
+            with open(_src, 'rb') as _file:
+                _stale = sha1(_file.read()).digest() != _hash
+            if _stale:
+                _buffer.close()
+                return None
+            self._touch(_cache, _mtime)
+
+        _start = self.c_header.size
+        _meta = loads(_buffer[_start:_start + _meta_len])
+
+        _offset = _start + _meta_len
+        _offset += -_offset % 4
+        _size = _w * _h * 4
+        _view = memoryview(_buffer)
+        _layers = dict()
+        for _name in _meta['layers']:
+            _layers[_name] = _view[_offset:_offset + _size].cast('I')
+            _offset += _size
+
+        self._loaded += 1
+        return RoomData(_src, _hash, _w, _h, _tw, _th, _layers, _meta, _buffer)
+
+    def _touch(self, _cache: str, _mtime: int):
+        _header = bytearray(self.c_header.size)
+        with open(_cache, 'r+b') as _file:
+            _file.readinto(_header)
+            _values = list(self.c_header.unpack(_header))
+            _values[2] = _mtime
+            _file.seek(0)
+            _file.write(self.c_header.pack(*_values))
+
+    @property
+    def cache_dir(self) -> str:
+        return self._cache_dir or path.join(cache_root(), self.c_cache_dir)
+
+    @cache_dir.setter
+    def cache_dir(self, _cache_dir: Optional[str]):
+        self._cache_dir = _cache_dir
+
+    @property
+    def compiled(self):
+        return self._compiled
+
+    @property
+    def uncached(self):
+        """
+        How many rooms were parsed in memory because the cache couldn't be written.
+        """
+        return self._uncached
+
+    @property
+    def loaded(self):
+        return self._loaded
+
+
+RoomCache: CompiledRoomCache = CompiledRoomCache()
+
+
+def parse_room(_src: str) -> RoomData:
+    """
+    Process pool entry point, the returned RoomData is pickled with plain arrays instead of the memory map.
+    """
+    return RoomCache.load(_src)
@@ -0,0 +1,186 @@
+from typing import List, Optional, TYPE_CHECKING
+if TYPE_CHECKING:
+    from src.player.player import PlayerCharacter
+
+from array import array
+from struct import Struct, pack, unpack_from, calcsize
+from zlib import crc32
+
+from src.clock import Clock
+from src.input import Input
+
+c_magic: bytes = b'GFSS'
+c_version: int = 1
+c_header: str = '<4sBII'
+# The body, direction, last ground, position the player is drawn from, sprite position and velocity, then the flags,
+# the forgiveness frames and the state
+c_player: str = '8dd2d2d2d2d7?3iB'
+# When the last attack was, the attack out, when it was swung and if it struck
+c_weapon: str = 'qbq?'
+c_clock: str = '6d2q?'
+# Five seconds of fixed steps
+c_ring_capacity: int = 600
+
+
+def _value_count(_format: str) -> int:
+    return len(unpack_from('<' + _format, bytes(calcsize('<' + _format))))
+
+
+class Snapshotter:
+    """
+    Captures the whole game state a step changes, the player, its state and weapon, the Clock and Input, into one
+    fixed layout struct, and puts it back. The layout depends on the buttons Input has, so it is made once they are
+    processed, and a snapshot only restores with the same buttons.
+
+    The room, the enemies and the particles aren't captured, a rewind keeps them as they are.
+    """
+
+    def __init__(self, _player: "PlayerCharacter"):
+        self._player: "PlayerCharacter" = _player
+        self._input_format: str = Input.snapshot_format()
+        self._struct: Struct = Struct('<' + c_player + c_weapon + c_clock + self._input_format)
+        # Where the values of the weapon, Clock and Input start in the unpacked snapshot
+        self._weapon_at: int = _value_count(c_player)
+        self._clock_at: int = self._weapon_at + _value_count(c_weapon)
+        self._input_at: int = self._clock_at + _value_count(c_clock)
+
+    def capture_into(self, _buffer: bytearray, _offset: int = 0):
+        _player = self._player
+        _data = _player.p_data
+        _body, _sprite = _data.body, _data.source
+        _ground_x, _ground_y = _data.last_ground_pos
+        _previous_x, _previous_y = _player.previous_position
+        _sprite_x, _sprite_y = _sprite.position
+        _change_x, _change_y = _sprite.velocity
+        self._struct.pack_into(_buffer, _offset,
+                               _body.x, _body.y, _body.vel_x, _body.vel_y, _body.acc_x, _body.acc_y, _body.old_x,
+                               _body.old_y, _data.direction, _ground_x, _ground_y, _previous_x, _previous_y,
+                               _sprite_x, _sprite_y, _change_x, _change_y,
+                               _data.on_ground, _data.on_ciel, _data.on_left, _data.on_right, _data.in_spawn_zone,
+                               _data.at_ledge, _data.can_transition, _data.forgiven_jump_frames,
+                               _data.forgiven_edge_frames, _data.blocked_ledge_frames,
+                               _player.p_state_switch.state_id,
+                               *_player.p_weapon.snapshot(), *Clock.snapshot(), *Input.snapshot())
+
+    def capture(self) -> bytearray:
+        _buffer = bytearray(self._struct.size)
+        self.capture_into(_buffer)
+        return _buffer
+
+    def restore(self, _buffer: bytes, _offset: int = 0):
+        _values = self._struct.unpack_from(_buffer, _offset)
+        _player = self._player
+        _data = _player.p_data
+        _body, _sprite = _data.body, _data.source
+        (_body.x, _body.y, _body.vel_x, _body.vel_y, _body.acc_x, _body.acc_y, _body.old_x, _body.old_y,
+         _data.direction) = _values[:9]
+        _data.last_ground_pos = _values[9:11]
+        _player.previous_position = _values[11:13]
+        _sprite.position = _values[13:15]
+        _sprite.velocity = [_values[15], _values[16]]
+        (_data.on_ground, _data.on_ciel, _data.on_left, _data.on_right, _data.in_spawn_zone, _data.at_ledge,
+         _data.can_transition, _data.forgiven_jump_frames, _data.forgiven_edge_frames,
+         _data.blocked_ledge_frames) = _values[17:27]
+        _player.p_state_switch.restore_state(_values[27])
+
+        _player.p_weapon.restore(*_values[self._weapon_at:self._clock_at])
+        Clock.restore(*_values[self._clock_at:self._input_at])
+        Input.restore(_values[self._input_at:])
+
+    def save(self, _path: str, _snapshot: bytes = None):
+        """
+        Writes a snapshot, the current state if none is given, with a header naming its version and layout.
+        """
+        _snapshot = self.capture() if _snapshot is None else _snapshot
+        with open(_path, 'wb') as _file:
+            _file.write(pack(c_header, c_magic, c_version, crc32(self._struct.format.encode()), len(_snapshot)))
+            _file.write(_snapshot)
+
+    def load(self, _path: str) -> bytes:
+        """
+        Reads a snapshot written by save(), which restore() can put back.
+        """
+        with open(_path, 'rb') as _file:
+            _bytes = _file.read()
+        _magic, _version, _layout, _size = unpack_from(c_header, _bytes)
+        if _magic != c_magic or _version != c_version:
+            raise ValueError(f"{_path} is not a version {c_version} snapshot")
+        if _layout != crc32(self._struct.format.encode()) or _size != self._struct.size:
+            raise ValueError(f"{_path} was saved with other buttons or an older layout")
+        return _bytes[calcsize(c_header):]
+
+    @property
+    def size(self) -> int:
+        return self._struct.size
+
+
+class SnapshotRing:
+    """
+    The snapshots of the last _capacity steps in one buffer, the oldest overwritten by the newest. rewind() puts a
+    step back and drops the ones after it, so the game runs on from there and pushes again.
+    """
+
+    def __init__(self, _snapshotter: Snapshotter, _capacity: int = c_ring_capacity):
+        self._snapshotter: Snapshotter = _snapshotter
+        self._capacity: int = _capacity
+        self._size: int = _snapshotter.size
+        self._buffer: bytearray = bytearray(self._size * _capacity)
+        self._frames: array = array('q', [0] * _capacity)
+        # The slot the next push goes to, and how many slots are filled
+        self._head: int = 0
+        self._count: int = 0
+
+    def __len__(self):
+        return self._count
+
+    def push(self):
+        """
+        Captures the current state as the newest snapshot.
+        """
+        self._snapshotter.capture_into(self._buffer, self._head * self._size)
+        self._frames[self._head] = Clock.frame
+        self._head = (self._head + 1) % self._capacity
+        if self._count < self._capacity:
+            self._count += 1
+
+    def _slot(self, _back: int) -> int:
+        if not 0 <= _back < self._count:
+            raise IndexError(f"only {self._count} snapshots are kept, can't go {_back} back")
+        return (self._head - 1 - _back) % self._capacity
+
+    def snapshot(self, _back: int = 0) -> bytes:
+        _slot = self._slot(_back)
+        return bytes(self._buffer[_slot * self._size:(_slot + 1) * self._size])
+
+    def rewind(self, _back: int = 0) -> int:
+        """
+        Restores the snapshot _back before the newest, which is then the newest, and returns its frame.
+        """
+        _slot = self._slot(_back)
+        self._snapshotter.restore(self._buffer, _slot * self._size)
+        self._head = (_slot + 1) % self._capacity
+        self._count -= _back
+        return self._frames[_slot]
+
+    def find(self, _frame: int) -> Optional[int]:
+        """
+        How far back the snapshot of _frame is, None if it isn't kept.
+        """
+        for _back in range(self._count):
+            if self._frames[(self._head - 1 - _back) % self._capacity] == _frame:
+                return _back
+        return None
+
+    def clear(self):
+        self._head = self._count = 0
+
+    @property
+    def frames(self) -> List[int]:
+        """
+        The frame of every kept snapshot, oldest first.
+        """
+        return [self._frames[(self._head - self._count + _index) % self._capacity] for _index in range(self._count)]
+
+    @property
+    def capacity(self) -> int:
+        return self._capacity
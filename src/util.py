@@ -6,6 +6,30 @@ try:
 except TypeError:
     DEBUG = False
 
+# Path the input of a play session is recorded to, see src.replay
+RECORD = os.environ.get("RECORD", None)
+# Path the stage timings of a session are written to, setting it turns the profiler on, see src.profiler
+PROFILE = os.environ.get("PROFILE", None)
+# Path the player's state transitions and time in each state are written to, see src.player.player_states
+STATE_STATS = os.environ.get("STATE_STATS", None)
+# Directory the compiled rooms, baked chunks and navigation graphs are cached in, the repo's cache/ unless set
+CACHE_ROOT = os.environ.get("CACHE_ROOT", None) or os.path.join(os.path.dirname(os.path.dirname(
+    os.path.abspath(__file__))), "cache")
+
+
+def cache_root() -> str:
+    return CACHE_ROOT
+
+
+def set_cache_root(_root: str):
+    """
+    Moves every cache to _root from then on. It is passed on through the environment, so parser processes started
+    afterwards use it too.
+    """
+    global CACHE_ROOT
+    CACHE_ROOT = os.path.abspath(_root)
+    os.environ["CACHE_ROOT"] = CACHE_ROOT
+
 
 def dist(a, b):
     return sqrt((a[0] - b[0])**2 + (a[1] - b[1])**2)
@@ -1,7 +1,12 @@
-from arcade import View, Camera
+from typing import Tuple
 
+from arcade import View, Camera, Text
+
+from src.clock import Clock
 from src.worldmap import Map
 from src.player.player import PlayerCharacter
+from src.profiler import Profiler
+from src.util import DEBUG
 
 
 # TODO: Write actual primary game view
@@ -17,12 +22,16 @@ class PrimaryGameView(View):
 
         self._camera = Camera()
 
+        # The debug overlay keeps its text, so a line is only laid out again when it changes
+        self._drawn_text = Text("", 0, 0)
+        self._queries_text = Text("", 0, 0)
+
         Map.initialise()
 
     def on_show_view(self):
         if not Map.current:
-            # Map.set_room(Map['Test', 'platforming'])
-            Map.set_room(Map['JungleEdge', 'entrance'])
+            # Map.set_room(Map.get('Test', 'platforming'))
+            Map.set_room(Map.get(*Map.c_start))
 
         self._camera.viewport = (0, 0, self.window.width, self.window.height)
         self._camera.projection = (0, self.window.width, 0, self.window.height)
@@ -30,19 +39,50 @@ class PrimaryGameView(View):
         self._camera.use()
         # self._placeholder_camera.zoom = 0.5
 
-    def on_update(self, delta_time: float):
+    def on_fixed_update(self, delta_time: float):
+        with Profiler.scope("enemies"):
+            Map.current.enemies.update()
         self._player.update()
 
-        _target_pos = [self._player.p_data.x - self.window.width // 2,
-                       self._player.p_data.y - self.window.height // 2]
+    def on_update(self, delta_time: float):
+        Map.update()
+
+        _x, _y = self._player.draw_position(Clock.alpha)
+        _target_pos = [_x - self.window.width // 2, _y - self.window.height // 2]
         # _target_pos[0] = max(min(_target_pos[0], Map.current.px_width - self.window.width), 0.0)
         # _target_pos[1] = max(min(_target_pos[1], Map.current.px_height - self.window.height), 0.0)
 
-        self._camera.move_to(tuple(_target_pos), 0.05)
+        # Eases the same distance per second whatever the frame rate, 0.05 of the way each fixed step
+        self._camera.move_to(tuple(_target_pos), 1.0 - (1.0 - 0.05) ** (delta_time / Clock.c_fixed_step))
         self._camera.update()
 
+    @property
+    def player(self) -> PlayerCharacter:
+        return self._player
+
+    def camera_rect(self) -> Tuple[float, float, float, float]:
+        _x, _y = self._camera.position
+        return _x, _y, _x + self.window.width, _y + self.window.height
+
     def on_draw(self):
         self._camera.use()
         self.clear()
-        Map.draw()
-        self._player.draw()
+        _rect = self.camera_rect()
+        with Profiler.scope("draw.map"):
+            Map.draw(_rect)
+        with Profiler.scope("draw.player"):
+            self._player.draw(Clock.alpha)
+
+        if DEBUG:
+            _chunks, _sprites = Map.drawn
+            self._drawn_text.text = f"chunks: {_chunks} sprites: {_sprites}"
+            self._drawn_text.position = (_rect[0] + 8, _rect[3] - 24)
+            self._drawn_text.draw()
+            _queries = Map.current.queries
+            self._queries_text.text = (f"collision queries: {_queries.hit_rate:.0%} cached of "
+                                       f"{_queries.hits + _queries.misses}")
+            self._queries_text.position = (_rect[0] + 8, _rect[3] - 44)
+            self._queries_text.draw()
+
+        if Profiler.enabled:
+            Profiler.draw(_rect[0] + 8, _rect[3] - 72)
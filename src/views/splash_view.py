@@ -1,8 +1,9 @@
 from math import sin, pi
 
-from arcade import View, Sprite, load_texture
+from arcade import View, Sprite, load_texture, draw_lrtb_rectangle_filled
 
 from src.clock import Clock
+from src.worldmap import Map
 from src.views.screen_size_view import ScreenSizeView
 
 
@@ -14,10 +15,22 @@ class SplashView(View):
                                      center_x=self.window.width // 2, center_y=self.window.height // 2)
         self._splash_sprite.alpha = 0
 
-    def on_update(self, delta_time: float):
+        self._loaded, self._total = Map.progress
+
+    def on_show_view(self):
+        Map.register_load_observer(self.p_room_loaded)
+
+    def on_hide_view(self):
+        Map.deregister_load_observer(self.p_room_loaded)
+
+    def p_room_loaded(self, _loaded: int, _total: int):
+        self._loaded, self._total = _loaded, _total
+
+    def on_fixed_update(self, delta_time: float):
+        # On fixed steps so no frame count is skipped when a frame runs several
         if Clock.frame - 512 < 512:
             self._splash_sprite.alpha = sin(pi * Clock.frame / 512)**2 * 255
-        else:
+        elif Map.ready(*Map.c_start):
             self.window.show_view(ScreenSizeView())
         if Clock.frame == 512:
             self._splash_sprite.texture = load_texture(":assets:/textures/dragon-bakery-splash.png")
@@ -26,3 +39,9 @@ class SplashView(View):
         self.clear()
         if Clock.frame - 512 < 512:
             self._splash_sprite.draw()
+
+        if self._total:
+            _width = self.window.width // 3
+            _left = (self.window.width - _width) // 2
+            draw_lrtb_rectangle_filled(_left, _left + _width * self._loaded / self._total, 36, 32,
+                                       (255, 255, 255))
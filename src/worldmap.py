@@ -1,14 +1,24 @@
-from typing import Dict, Tuple, TYPE_CHECKING
+from typing import Deque, Dict, List, Set, Tuple, TYPE_CHECKING
 if TYPE_CHECKING:
     from src.player.player_data import PlayerData
-from os import listdir
+from os import listdir, path
+from functools import partial
+from collections import OrderedDict, deque
 
-from arcade import tilemap, Sprite, SpriteList
+from arcade import Sprite, SpriteList, Texture, load_texture
 from arcade.resources import resolve_resource_path
 
+from src.chunks import ChunkedLayer, TileLayer, tile_texture
+from src.collision import CollisionGrid, CollisionMesh, CollisionLayer, QueryCache, GROUND, ONE_WAY, SPIKES, SPAWN
+from src.enemies import Enemies
+from src.navigation import NavGraph, Navigation
+from src.room_bake import Baker
+from src.room_cache import RoomCache, RoomData, parse_room
 from src.util import TILE_SIZE, DEBUG
 
-from threading import Thread
+from threading import Lock
+from time import monotonic
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor, Future, wait
 
 
 class Transition:
@@ -27,11 +37,19 @@ class Transition:
     def __repr__(self):
         return f"{self._id} : {self._direction}"
 
+    @property
+    def target(self) -> Tuple[str, str]:
+        return self._target_region, self._target_room
+
+    @property
+    def target_gate(self) -> int:
+        return self._target_gate
+
     def check(self, sprite: Sprite):
         return sprite.collides_with_sprite(self._sprite)
 
     def transition(self, _player_data: "PlayerData"):
-        _next_room = Map[self._target_region, self._target_room]
+        _next_room = Map.get(self._target_region, self._target_room)
         _next_entrance = _next_room.gates[self._target_gate]
 
         _next_pos = (0, 0)
@@ -88,58 +106,175 @@ class Transition:
         return self._sprite.height
 
 
-class Room:
+def _tile_layer_sprites(_data: RoomData, _layer: str, _spatial_hash: bool = False) -> SpriteList:
+    _sprites = SpriteList(use_spatial_hash=_spatial_hash, lazy=True)
+    _map_height = _data.height
+    for _index, _gid in enumerate(_data.layer(_layer)):
+        if not _gid:
+            continue
+        _row, _column = divmod(_index, _data.width)
+        _sprite = Sprite(texture=tile_texture(_data, _gid))
+        _sprite.center_x = _column * _data.tile_width + _sprite.width / 2
+        _sprite.center_y = (_map_height - _row - 1) * _data.tile_height + _sprite.height / 2
+        _sprites.append(_sprite)
+    return _sprites
+
+
+def _object_layer_sprites(_data: RoomData, _layer: str) -> SpriteList:
+    # Only tile objects are drawn, rotation is not supported as no room uses it.
+    _sprites = SpriteList(lazy=True)
+    _px_height = _data.height * _data.tile_height
+    for _object in _data.objects(_layer):
+        if not _object['gid']:
+            continue
+        _sprite = Sprite(texture=tile_texture(_data, _object['gid']))
+        _sprite.width = _object['width']
+        _sprite.height = _object['height']
+        _sprite.position = (_object['x'] + _object['width'] / 2,
+                            _px_height - _object['y'] + _object['height'] / 2)
+        _sprite.properties.update(_object['properties'])
+        _sprites.append(_sprite)
+    return _sprites
+
+
+def _chunk_sprites(_data: RoomData, _layer: str) -> SpriteList:
+    _sprites = SpriteList(lazy=True)
+    for _file, _left, _bottom, _width, _height in Baker.chunks(_data, _layer):
+        if isinstance(_file, str):
+            _texture = load_texture(_file, hit_box_algorithm="None")
+        else:
+            # Not baked, the chunk is the image itself
+            _texture = Texture(f"{_data.hash}/{_layer}_{_left}_{_bottom}", _file, hit_box_algorithm="None")
+        _sprite = Sprite(texture=_texture)
+        _sprite.position = (_left + _width / 2, _bottom + _height / 2)
+        _sprites.append(_sprite)
+    return _sprites
 
-    def __init__(self, _name: str, _region: str, _map: tilemap.TileMap):
+
+class Room:
+    # Tile layers which never change, these are baked into chunk images rather than drawn tile by tile
+    c_static_layers: Tuple[str, ...] = ("background", "decorations")
+    # Tile layers kept as GID arrays, their sprites are only made for the chunks which are drawn
+    c_tile_layers: Tuple[str, ...] = ("ground", "one_way")
+    # Tile layers only used through the collision grid, these are never drawn
+    c_grid_layers: Tuple[str, ...] = ("spawn_zones",)
+    # Tile layers the player collides with as sprites every step, kept in a spatial hash
+    c_hashed_layers: Tuple[str, ...] = ("spikes",)
+    c_draw_layers: Tuple[str, ...] = ("background", "ground", "one_way", "spikes", "decorations")
+
+    # How far past the edge of the camera chunks are still drawn
+    c_cull_margin: float = 2 * TILE_SIZE
+
+    def __init__(self, _name: str, _region: str, _data: RoomData, _headless: bool = False):
         self._name = _name
         self._region = _region
+        # A headless room is never drawn, so the static layers are left empty rather than baked and loaded
+        self._headless = _headless
+
+        self._data = _data
+        self._layers: Dict[str, SpriteList] = dict()
+        self._tiles: Dict[str, TileLayer] = dict()
+        for _layer in _data.layer_names:
+            if _layer in self.c_grid_layers:
+                continue
+            elif _layer in self.c_tile_layers:
+                self._tiles[_layer] = TileLayer(_data, _layer)
+            elif _layer in self.c_static_layers and _headless:
+                self._layers[_layer] = SpriteList(lazy=True)
+            elif _layer in self.c_static_layers and _layer in _data.tile_layers:
+                self._layers[_layer] = _chunk_sprites(_data, _layer)
+            elif _layer in _data.tile_layers:
+                self._layers[_layer] = _tile_layer_sprites(_data, _layer, _layer in self.c_hashed_layers)
+            else:
+                self._layers[_layer] = _object_layer_sprites(_data, _layer)
 
-        # TODO: REMOVE MAP and ONLY STORE NECESSARY DATA
-        self._map = _map
-        self._layers = {_layer.name: (_layer, _map.sprite_lists.get(_layer.name, SpriteList(lazy=True)))
-                        for _index, _layer in enumerate(_map.tiled_map.layers)}
-
-        self._tile_width = _map.width
-        self._tile_height = _map.height
+        self._tile_width = _data.width
+        self._tile_height = _data.height
 
         self._transitions: Dict[int, Transition] = dict()
-        _transition_list = self._layers['transitions'][1]
-        for _index, _object in enumerate(self._layers['transitions'][0].tiled_objects):
-            _properties = _object.properties
-            self._transitions[_properties['entrance id']] = Transition(_properties, _transition_list[_index])
-
-        self._dangers: Dict[str, SpriteList] = {"spikes": self._layers['spikes'][1]}
-
-        self._ground: Dict[str, SpriteList] = {"ground": self._layers['ground'][1],
-                                               "one_way": self._layers['one_way'][1]}
-        _all_ground = SpriteList(use_spatial_hash=True)
-        _all_ground.extend(self._ground['ground'])
-        _all_ground.extend(self._ground['one_way'])
-        self._ground['all_ground'] = _all_ground
-
-        self._decorations: Dict[str, SpriteList] = {"background": self._layers['background'][1],
-                                                    "decorations": self._layers['decorations'][1]}
-
-        self._spawn_zones: SpriteList = self._layers['spawn_zones'][1]
+        _transition_objects = [_object for _object in _data.objects('transitions') if _object['gid']]
+        for _object, _sprite in zip(_transition_objects, self._layers['transitions']):
+            _properties = _object['properties']
+            self._transitions[_properties['entrance id']] = Transition(_properties, _sprite)
+
+        # Spikes stay as sprites, the player and weapon collide with their rotated triangular hit boxes
+        self._dangers: Dict[str, SpriteList] = {"spikes": self._layers['spikes']}
+
+        self._ground: Dict[str, TileLayer] = {"ground": self._tiles['ground'],
+                                              "one_way": self._tiles['one_way']}
+
+        self._collision_grid: CollisionGrid = CollisionGrid(_data)
+        self._collision_mesh: CollisionMesh = CollisionMesh(_data)
+        # Shared by every collider and danger of the room, whoever asks
+        self._queries: QueryCache = QueryCache()
+        _mesh, _queries = self._collision_mesh, self._queries
+        self._colliders: Dict[str, CollisionLayer] = {"ground": CollisionLayer(_mesh, GROUND, _queries),
+                                                      "one_way": CollisionLayer(_mesh, ONE_WAY, _queries),
+                                                      "all_ground": CollisionLayer(_mesh, GROUND | ONE_WAY, _queries),
+                                                      "spikes": CollisionLayer(_mesh, SPIKES, _queries),
+                                                      "spawn_zones": CollisionLayer(self._collision_grid, SPAWN,
+                                                                                    _queries)}
+
+        self._decorations: Dict[str, SpriteList] = {"background": self._layers['background'],
+                                                    "decorations": self._layers['decorations']}
+
+        self._spawn_zones: CollisionLayer = self._colliders['spawn_zones']
+        self._enemies: Enemies = Enemies(_data.objects('enemies'), self.px_width, self.px_height,
+                                         self._layers.get('enemies'))
+        # Built or loaded the first time something asks for a path
+        self._navigation: NavGraph = None
+
+        self._chunks: Dict[str, ChunkedLayer] = {_layer: self._tiles[_layer] if _layer in self._tiles
+                                                 else ChunkedLayer(self._layers[_layer])
+                                                 for _layer in self.c_draw_layers}
 
     def __repr__(self):
         return f"{self._region}: {self._name}"
 
     def initialise(self):
-        for _list in self._dangers.values():
-            _list.initialize()
-
-        for _list in self._ground.values():
-            _list.initialize()
-
-        self._spawn_zones.initialize()
-
-    def draw(self):
-        self._decorations['background'].draw(pixelated=True)
-        self._ground["all_ground"].draw(pixelated=True)
-        for danger in self._dangers.values():
-            danger.draw(pixelated=True)
-        self._decorations['decorations'].draw(pixelated=True)
+        for _layer in self._chunks.values():
+            _layer.initialize()
+
+    def prepare(self, _rect: Tuple[float, float, float, float] = None) -> List[Tuple[ChunkedLayer, Tuple[int, int]]]:
+        """
+        Makes the sprites of every chunk drawn for a camera at _rect, or of the whole room, and returns the
+        chunks which still need initialising on the main thread.
+        """
+        if _rect is not None:
+            _margin = self.c_cull_margin
+            _rect = (_rect[0] - _margin, _rect[1] - _margin, _rect[2] + _margin, _rect[3] + _margin)
+        return [(_layer, _key) for _layer in self._chunks.values() for _key in _layer.prepare(_rect)]
+
+    def release(self):
+        """
+        Drops the sprites made for the tile layers while the room was shown or warmed.
+        """
+        for _layer in self._chunks.values():
+            _layer.release()
+
+    def draw(self, _rect: Tuple[float, float, float, float] = None) -> Tuple[int, int]:
+        """
+        Draws the chunks of each layer near _rect, the whole room without one. Returns how many chunks and sprites
+        were submitted.
+        """
+        if _rect is not None:
+            _margin = self.c_cull_margin
+            _rect = (_rect[0] - _margin, _rect[1] - _margin, _rect[2] + _margin, _rect[3] + _margin)
+
+        _chunks, _sprites = 0, 0
+        for _layer in self.c_draw_layers:
+            _drawn = self._chunks[_layer].draw(_rect, pixelated=True)
+            _chunks += _drawn[0]
+            _sprites += _drawn[1]
+        self._enemies.draw()
+        return _chunks, _sprites + len(self._enemies)
+
+    def hit_dangers(self, _other: Sprite, _layer: str = "spikes") -> List[Sprite]:
+        """
+        The sprites of a danger layer _other collides with, through the query cache keyed by its hit box.
+        """
+        _key = (_layer, tuple(tuple(_point) for _point in _other.get_adjusted_hit_box()))
+        return self._queries.get(_key, lambda: _other.collides_with_list(self._dangers[_layer]))
 
     def should_transition(self, _other: Sprite):
         for transition in self._transitions.values():
@@ -155,10 +290,40 @@ class Room:
     def ground(self):
         return self._ground
 
+    @property
+    def colliders(self):
+        return self._colliders
+
+    @property
+    def chunks(self):
+        return self._chunks
+
+    @property
+    def collision_grid(self):
+        return self._collision_grid
+
+    @property
+    def collision_mesh(self):
+        return self._collision_mesh
+
     @property
     def dangers(self):
         return self._dangers
 
+    @property
+    def queries(self) -> QueryCache:
+        return self._queries
+
+    @property
+    def enemies(self) -> Enemies:
+        return self._enemies
+
+    @property
+    def navigation(self) -> NavGraph:
+        if self._navigation is None:
+            self._navigation = Navigation.graph(self._data, self._collision_grid.cells)
+        return self._navigation
+
     @property
     def decorations(self):
         return self._decorations
@@ -169,6 +334,22 @@ class Room:
 
     # map data
 
+    @property
+    def data(self) -> RoomData:
+        return self._data
+
+    @property
+    def headless(self) -> bool:
+        return self._headless
+
+    @property
+    def key(self) -> Tuple[str, str]:
+        return self._region, self._name
+
+    @property
+    def neighbours(self) -> Set[Tuple[str, str]]:
+        return {_transition.target for _transition in self._transitions.values()}
+
     @property
     def tile_width(self):
         return self._tile_width
@@ -189,48 +370,392 @@ class Room:
 class GameMap:
     c_src_base: str = ":assets:/tiled_maps"
     c_regions: Tuple[str, ...] = ("Test", "JungleEdge") # ("JungleEdge", "JungleBranches", "TempleHeart", "TempleDepths", "JungleFloor", "Test")
+    c_start: Tuple[str, str] = ("JungleEdge", "entrance")
+
+    c_max_loaders: int = 4
+    # How many rooms are kept loaded. The least recently used room is dropped past this, other than the current
+    # room and the rooms its transitions lead to, and is loaded again when it is next asked for.
+    c_room_budget: int = 12
+
+    # Rooms next to the current one are warmed in the background: the area a camera of c_warm_extent sees around
+    # each entrance gets its sprites made, and c_warm_per_frame of those chunks are initialised each frame.
+    c_prewarm: bool = True
+    c_warm_extent: Tuple[float, float] = (1280.0, 720.0)
+    c_warm_per_frame: int = 2
+    # When above zero the .tmj parsing runs in this many worker processes, and the loader threads only build
+    # the arcade objects from the returned RoomData.
+    c_max_parsers: int = 0
+    # Without a window nothing is drawn: rooms skip their static layers, and no chunk is initialised or warmed
+    c_headless: bool = False
 
     def __init__(self):
         self._regions: Dict[str, Dict[str, Room]] = {_region: dict() for _region in self.c_regions}
         self._current_room: Room = None
-
-    def initialise(self):
-        def load_rooms(region: str):
-            print("started:", region)
-            _src = resolve_resource_path(self.c_src_base + f"/{region}")
-            _rooms = listdir(_src)
-            for _room in _rooms:
-                if _room.endswith('.tmj'):
-                    _name: str = _room[:-4]
-                    print(_name)
-                    _map = tilemap.load_tilemap(f"{self.c_src_base}/{region}/{_room}", lazy=True)
-                    self._regions[region][_name] = Room(_name, region, _map)
-
-            print("finished loading region:", region)
+        self._headless: bool = self.c_headless
+
+        # Loaded rooms, least recently used first
+        self._budget: int = self.c_room_budget
+        self._resident: OrderedDict[Tuple[str, str], None] = OrderedDict()
+        self._pinned: Set[Tuple[str, str]] = set()
+        self._hits: int = 0
+        self._misses: int = 0
+        self._evictions: int = 0
+
+        # Chunks made off the main thread which still need initialising, (layer, chunk key)
+        self._warm_queue: Deque[Tuple[ChunkedLayer, Tuple[int, int]]] = deque()
+
+        self._lock: Lock = Lock()
+        self._executor: ThreadPoolExecutor = None
+        self._parsers: ProcessPoolExecutor = None
+        self._futures: Dict[Tuple[str, str], Future] = dict()
+        self._parsing: Dict[Tuple[str, str], Future] = dict()
+        self._shut_down: bool = False
+
+        self._loaded: int = 0
+        self._total: int = 0
+        # Queued rooms which haven't finished loading yet
+        self._pending: Set[Tuple[str, str]] = set()
+        self._load_observers: Set = set()
+
+        # Chunks and sprites submitted by the last draw
+        self._drawn: Tuple[int, int] = (0, 0)
+
+    def initialise(self, _start: Tuple[str, str] = None, _parsers: int = None, _budget: int = None,
+                   _headless: bool = None):
+        """
+        Queues rooms on a bounded pool of loader threads, as many as the room budget allows. The region of the
+        start room is queued first, and the start room leads its region, so the first playable room is ready as
+        soon as possible. Rooms past the budget are loaded when they are first asked for.
+        """
+        _start_region, _start_room = _start or self.c_start
+        _parsers = self.c_max_parsers if _parsers is None else _parsers
+        self._budget = self.c_room_budget if _budget is None else _budget
+        self._headless = self.c_headless if _headless is None else _headless
+
+        _queue = []
+        for _region in sorted(self._regions, key=lambda _name: _name != _start_region):
+            _rooms = [_room[:-4] for _room in listdir(self.room_src(_region)) if _room.endswith('.tmj')]
+            _rooms.sort(key=lambda _name: _name != _start_room)
+            _queue.extend((_region, _room) for _room in _rooms)
+
+        _queue = _queue[:self._budget]
+        self._shut_down = False
+        with self._lock:
+            self._pending = set(_queue)
+            self._loaded = 0
+        self._total = len(_queue)
+        if not DEBUG:
+            # The process pool is started before any loader thread exists so the workers are never forked while
+            # another thread holds a lock.
+            if _parsers:
+                self._parsers = ProcessPoolExecutor(max_workers=_parsers)
+            self._executor = ThreadPoolExecutor(max_workers=self.c_max_loaders, thread_name_prefix="room_loader")
+
+        for _region, _room in _queue:
+            self._futures[(_region, _room)] = self._submit(_region, _room)
+
+    def room_src(self, _region: str, _room: str = None) -> str:
+        _src = str(resolve_resource_path(f"{self.c_src_base}/{_region}"))
+        return _src if _room is None else path.join(_src, f"{_room}.tmj")
+
+    def _submit(self, _region: str, _room: str) -> Future:
+        if self._executor is None:
+            _future = self._load_inline(_region, _room)
+        elif self._parsers is not None:
+            _future = Future()
+            # Marked as running so only the parse can be cancelled, the build is never abandoned half way.
+            _future.set_running_or_notify_cancel()
+            _parse = self._parsers.submit(parse_room, self.room_src(_region, _room))
+            with self._lock:
+                self._parsing[(_region, _room)] = _parse
+            _parse.add_done_callback(partial(self._on_room_parsed, _region, _room, _future))
+        else:
+            _future = self._executor.submit(self._load_room, _region, _room)
+        _future.add_done_callback(partial(self._on_room_loaded, (_region, _room)))
+        return _future
+
+    def _load_into(self, _future: Future, _region: str, _room: str, _data: RoomData = None):
+        try:
+            _future.set_result(self._load_room(_region, _room, _data))
+        except Exception as _error:
+            _future.set_exception(_error)
+
+    def _load_inline(self, _region: str, _room: str) -> Future:
+        _future = Future()
+        self._load_into(_future, _region, _room)
+        return _future
+
+    def _load_room(self, _region: str, _room: str, _data: RoomData = None) -> Room:
+        _data = _data or RoomCache.load(self.room_src(_region, _room))
+        _loaded_room = Room(_room, _region, _data, self._headless)
+        with self._lock:
+            self._regions.setdefault(_region, dict())[_room] = _loaded_room
+            self._resident[(_region, _room)] = None
+            self._resident.move_to_end((_region, _room))
+            _evicted = self._evict((_region, _room))
+
+        for _evicted_room in _evicted:
+            _evicted_room.release()
+            Navigation.release(_evicted_room.data)
+        return _loaded_room
+
+    def _evict(self, _keep: Tuple[str, str]) -> List[Room]:
+        # Called with the lock held. Pinned rooms are skipped, so the budget can be overrun while they are needed.
+        _evicted = []
+        for _key in tuple(self._resident):
+            if len(self._resident) <= self._budget:
+                break
+            if _key == _keep or _key in self._pinned:
+                continue
+
+            del self._resident[_key]
+            self._futures.pop(_key, None)
+            _evicted.append(self._regions[_key[0]].pop(_key[1]))
+            self._evictions += 1
+        return _evicted
+
+    def _on_room_parsed(self, _region: str, _room: str, _future: Future, _parse: Future):
+        with self._lock:
+            # get() takes the parse out before cancelling it and then loads the room itself
+            _owned = self._parsing.pop((_region, _room), None) is _parse
+            _shut_down = self._shut_down
+
+        if _parse.cancelled() and not _owned:
+            return
+        if _parse.cancelled() or _shut_down:
+            _future.set_exception(RuntimeError(f"the map was shut down before {_region}/{_room} loaded"))
+            return
+        if _parse.exception() is not None:
+            _future.set_exception(_parse.exception())
+            return
+        try:
+            self._executor.submit(self._load_into, _future, _region, _room, _parse.result())
+        except RuntimeError as _error:
+            # Shut down between the check and the submit
+            _future.set_exception(_error)
+
+    def _on_room_loaded(self, _key: Tuple[str, str], _future: Future):
+        if _future.cancelled():
             return
 
-        for _region in self._regions:
-            if not DEBUG:
-                print("loading:", _region)
-                thread = Thread(target=load_rooms, args=(_region,))
-                thread.start()
+        with self._lock:
+            # Only the first load of each queued room counts, a room loaded again after its eviction doesn't
+            if _key not in self._pending:
+                return
+            self._pending.discard(_key)
+            self._loaded += 1
+            _loaded = self._loaded
+
+        # Called from the loader threads, so observers should only record the progress.
+        for observer_call in tuple(self._load_observers):
+            observer_call(_loaded, self._total)
+
+    def get(self, _region: str, _room: str, _timeout: float = None) -> Room:
+        """
+        Blocks until the requested room has loaded. A room still waiting in the queue, or one which was never
+        queued or has been evicted, is loaded on the calling thread, so only the needed room is waited on.
+        """
+        _key = (_region, _room)
+        with self._lock:
+            _future = self._futures.get(_key, None)
+            if _future is not None and _future.done():
+                self._hits += 1
+                if _key in self._resident:
+                    self._resident.move_to_end(_key)
+                return _future.result()
+
+            self._misses += 1
+            _parse = self._parsing.pop(_key, None) if _future is not None else None
+            # A load still queued on the loader threads is cancelled and its future swapped for a running one in
+            # the same hold of the lock, so no other thread ever finds the cancelled future. Its done callback
+            # returns straight away for a cancelled future and never takes the lock.
+            _queued = _future is not None and _parse is None and _future.cancel()
+            if _future is None or _queued:
+                _future = self._futures[_key] = Future()
+                _future.set_running_or_notify_cancel()
+                if _queued:
+                    _future.add_done_callback(partial(self._on_room_loaded, _key))
+                _inline = True
             else:
-                load_rooms(_region)
+                _inline = False
 
-    def __getitem__(self, item: Tuple[str, str]):
-        return self._regions[item[0]][item[1]]
+        if _inline:
+            self._load_into(_future, _region, _room)
+            return _future.result()
+
+        # Cancelling a parse runs its done callback straight away, which takes the lock. The room's future is
+        # already running, so threads asking for the room meanwhile wait on it.
+        if _parse is not None and _parse.cancel():
+            self._load_into(_future, _region, _room)
 
-    def draw(self):
+        return _future.result(_timeout)
+
+    def __getitem__(self, item: Tuple[str, str]):
+        return self.get(item[0], item[1])
+
+    def future(self, _region: str, _room: str) -> Future:
+        with self._lock:
+            return self._futures[(_region, _room)]
+
+    def wait(self, _timeout: float = None) -> bool:
+        """
+        Completion barrier for every queued room. Returns whether every room finished in time.
+        """
+        _end = None if _timeout is None else monotonic() + _timeout
+        while True:
+            with self._lock:
+                _futures = tuple(self._futures.values())
+            _done, _not_done = wait(_futures, timeout=None if _end is None else max(0.0, _end - monotonic()))
+            if _not_done:
+                return False
+            # A room get() loads itself replaces its queued future, so wait again until nothing was swapped
+            with self._lock:
+                if tuple(self._futures.values()) == _futures:
+                    return True
+
+    def ready(self, _region: str, _room: str) -> bool:
+        with self._lock:
+            _future = self._futures.get((_region, _room), None)
+        return _future is not None and _future.done()
+
+    def shutdown(self):
+        """
+        Stops loading. Queued rooms are cancelled, and a room whose parse is cancelled or finishes afterwards
+        fails with a RuntimeError, so nothing waiting on it blocks forever.
+        """
+        with self._lock:
+            self._shut_down = True
+        if self._parsers is not None:
+            self._parsers.shutdown(wait=False, cancel_futures=True)
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+
+    # register observers
+    def register_load_observer(self, observer_call):
+        self._load_observers.add(observer_call)
+
+    # de-register observers
+    def deregister_load_observer(self, observer_call):
+        self._load_observers.discard(observer_call)
+
+    def draw(self, _rect: Tuple[float, float, float, float] = None):
+        """
+        Draws the current room, culled to the camera rectangle (left, bottom, right, top) when one is given.
+        """
         if self._current_room:
-            self._current_room.draw()
+            self._drawn = self._current_room.draw(_rect)
 
     def set_room(self, _next: Room):
+        """
+        Swaps the current room. If the room was warmed this only initialises what is left, then the rooms next to
+        it start warming and any room no longer next door drops its sprites.
+        """
+        # Queries are only reused within a room, and the hit rate is reported per room
+        if self._current_room is not None:
+            self._current_room.queries.clear()
+        _next.queries.clear()
         self._current_room = _next
-        self._current_room.initialise()
+        if not self._headless:
+            self._current_room.initialise()
+
+        for _room in self.pin(_next):
+            _room.release()
+
+        if self.c_prewarm and not self._headless:
+            self.prewarm(_next)
+
+    def pin(self, _room: Room) -> List[Room]:
+        """
+        Keeps _room and the rooms its transitions lead to from being evicted, in place of the previous pins.
+        Returns the loaded rooms which are no longer pinned.
+        """
+        with self._lock:
+            _unpinned = self._pinned - ({_room.key} | _room.neighbours)
+            self._pinned = {_room.key} | _room.neighbours
+            return [self._regions[_region][_name] for _region, _name in _unpinned
+                    if _name in self._regions.get(_region, ())]
+
+    def prewarm(self, _room: Room):
+        """
+        Loads the rooms the transitions of _room lead to and makes the sprites around their entrances on the
+        loader threads, then the rest of _room. The chunks are initialised a few at a time by update().
+        """
+        for _transition in _room.gates.values():
+            self._in_background(self._warm_entrance, *_transition.target, _transition.target_gate)
+        self._in_background(self._warm_room, _room)
+
+    def _in_background(self, _call, *args):
+        if self._executor is None:
+            _call(*args)
+        else:
+            self._executor.submit(_call, *args)
+
+    def _warm_entrance(self, _region: str, _room: str, _gate: int):
+        _next = self.get(_region, _room)
+        _entrance = _next.gates[_gate]
+        _width, _height = self.c_warm_extent
+        self._warm_queue.extend(_next.prepare((_entrance.x - _width / 2, _entrance.y - _height / 2,
+                                               _entrance.x + _width / 2, _entrance.y + _height / 2)))
+
+    def _warm_room(self, _room: Room):
+        self._warm_queue.extend(_room.prepare())
+
+    def update(self):
+        """
+        Initialises a few of the chunks warmed in the background, called once a frame on the main thread.
+        """
+        for _ in range(min(self.c_warm_per_frame, len(self._warm_queue))):
+            _layer, _key = self._warm_queue.popleft()
+            _layer.initialize_chunk(_key)
 
     @property
     def current(self) -> Room:
         return self._current_room
 
+    @property
+    def headless(self) -> bool:
+        return self._headless
+
+    @property
+    def progress(self) -> Tuple[int, int]:
+        return self._loaded, self._total
+
+    @property
+    def drawn(self) -> Tuple[int, int]:
+        return self._drawn
+
+    @property
+    def budget(self) -> int:
+        return self._budget
+
+    @budget.setter
+    def budget(self, _budget: int):
+        self._budget = _budget
+
+    @property
+    def resident(self) -> Tuple[Tuple[str, str], ...]:
+        with self._lock:
+            return tuple(self._resident)
+
+    @property
+    def pinned(self) -> Set[Tuple[str, str]]:
+        return self._pinned
+
+    @property
+    def warming(self) -> int:
+        return len(self._warm_queue)
+
+    @property
+    def hits(self) -> int:
+        return self._hits
+
+    @property
+    def misses(self) -> int:
+        return self._misses
+
+    @property
+    def evictions(self) -> int:
+        return self._evictions
+
 
 Map: GameMap = GameMap()
@@ -0,0 +1,351 @@
+"""
+Microbenchmarks of the hot paths, run without a window:
+
+    python -m tests.benchmarks run --save baseline.json
+    python -m tests.benchmarks compare baseline.json [current.json] [--threshold 0.15]
+
+compare runs the suite itself when it isn't given a second file, and exits with 1 if any benchmark got slower than
+the baseline by more than the threshold.
+"""
+from typing import Callable, Dict, List, Optional, Tuple
+from glob import glob
+from json import dump, load
+from os import path
+from platform import node, platform, python_version
+from time import perf_counter_ns
+import sys
+
+from arcade import Sprite, key
+from arcade.resources import add_resource_handle
+
+c_root = path.dirname(path.dirname(path.abspath(__file__)))
+c_version: int = 1
+# Each run of a benchmark lasts at least this long, and the best of c_repeats runs is kept
+c_min_time: int = 50_000_000
+c_repeats: int = 5
+c_threshold: float = 0.15
+
+_engine = None
+
+
+def _player_engine():
+    # One player for every benchmark, another would register its states with Input a second time
+    global _engine
+    if _engine is None:
+        from src.headless import HeadlessEngine
+        _engine = HeadlessEngine(("Test", "platforming"), (144.0, 200.0))
+        _engine.run(0.5)
+    return _engine
+
+
+def _hitbox_sensors() -> Callable[[], None]:
+    from src.collision import CollisionLayer, GROUND, ONE_WAY
+    from src.worldmap import Map
+
+    _engine = _player_engine()
+    _hitbox = _engine.player.p_hitbox
+    # Without the room's query cache, so every call does the query
+    _ground = CollisionLayer(Map.current.collision_mesh, GROUND)
+    _all_ground = CollisionLayer(Map.current.collision_mesh, GROUND | ONE_WAY)
+
+    def _run():
+        _hitbox.hit_ground(_all_ground)
+        _hitbox.hit_ciel(_ground)
+        _hitbox.hit_left(_ground)
+        _hitbox.hit_right(_ground)
+        _hitbox.check_ledge_vertical_left(_ground)
+        _hitbox.check_ledge_vertical_right(_ground)
+    return _run
+
+
+def _resolve_collisions() -> Callable[[], None]:
+    from src.collision import CollisionLayer, GROUND, ONE_WAY
+    from src.worldmap import Map
+
+    _engine = _player_engine()
+    _data, _physics = _engine.player.p_data, _engine.player.p_physics
+    _ground = CollisionLayer(Map.current.collision_mesh, GROUND)
+    _layers = (CollisionLayer(Map.current.collision_mesh, GROUND | ONE_WAY), _ground, _ground, _ground)
+    _x, _y = _data.pos
+
+    def _run():
+        # Landing from a few pixels up, moving right
+        _data.old_pos = (_x - 1.0, _y + 2.0)
+        _data.pos = (_x, _y - 2.0)
+        _data.vel = (120.0, -240.0)
+        _physics.resolve_collisions(_layers)
+    return _run
+
+
+def _room(_src: str) -> Callable[[], None]:
+    from src.room_cache import RoomCache
+    from src.worldmap import Room
+
+    _region, _name = path.basename(path.dirname(_src)), path.basename(_src)[:-4]
+    # Compiles and bakes once, so the runs time a room being loaded again
+    Room(_name, _region, RoomCache.load(_src))
+
+    def _run():
+        Room(_name, _region, RoomCache.load(_src))
+    return _run
+
+
+def _animator() -> Callable[[], None]:
+    from src.animator import Animator
+    from src.clock import Clock
+
+    # Animator keeps the flip of its target in scale_xy, which a plain Sprite doesn't have until it is set
+    _target = Sprite()
+    _target.scale_xy = (1.0, 1.0)
+    _animator = Animator()
+    _animator.load(":assets:/textures/characters/enemies/animations/", "boar_animation", _target)
+
+    def _run():
+        Clock.tick(Clock.c_fixed_step)
+        _animator.animate()
+    return _run
+
+
+def _particles() -> Callable[[], None]:
+    from src.animator import TempAnimatorManager
+    from src.clock import Clock
+
+    _manager = TempAnimatorManager()
+    _manager.load(":assets:/textures/particles", "placeholder_particle_16px")
+
+    def _run():
+        # One puff a step, as running does, so as many expire as are added
+        Clock.tick(Clock.c_fixed_step)
+        _manager.add_new("puff", 0.0, 0.0)
+        _manager.update()
+        _manager.animate()
+    return _run
+
+
+def _input_dispatch() -> Callable[[], None]:
+    from src.input import Input
+
+    # The player's states are registered as observers, as in the game
+    _player_engine()
+
+    def _run():
+        Input.p_key_press(key.SPACE)
+        Input.p_key_held()
+        Input.p_key_release(key.SPACE)
+    return _run
+
+
+def _navigation(_region: str, _name: str) -> Callable[[], None]:
+    from random import Random
+    from src.collision import CollisionGrid
+    from src.navigation import NavGraph
+    from src.room_cache import RoomCache
+
+    _graph = NavGraph.build(CollisionGrid(RoomCache.load(path.join(c_root, "resources", "tiled_maps", _region,
+                                                                   f"{_name}.tmj"))).cells)
+    # The same queries every run, reachable or not, between nodes anywhere in the room
+    _random = Random(21)
+    _queries = [(_random.randrange(_graph.node_count), _random.randrange(_graph.node_count)) for _ in range(64)]
+
+    def _run():
+        for _start, _goal in _queries:
+            _graph.find_path(_start, _goal)
+    return _run
+
+
+def _enemies() -> Callable[[], None]:
+    from random import Random
+    from src.clock import Clock
+    from src.enemies import Enemies
+
+    # 500 enemies over a 4000 by 2000 room, a step of them with the checks the player makes
+    _random = Random(22)
+    _enemies = Enemies([{'gid': 1, 'x': _random.uniform(0, 4000), 'y': _random.uniform(0, 2000), 'width': 64,
+                         'height': 64, 'properties': {'type': _random.choice(("boar", "hornet", "snake")),
+                                                      'trot_left': 200.0, 'trot_right': 200.0}}
+                        for _ in range(500)], 4000.0, 2000.0)
+
+    def _run():
+        Clock.tick(Clock.c_fixed_step)
+        _enemies.update()
+        _enemies.contact_damage(1000.0, 500.0, 1032.0, 564.0)
+        _enemies.query(1000.0, 500.0, 1128.0, 596.0)
+    return _run
+
+
+def _ecs(_count: int) -> Callable[[], None]:
+    import numpy as np
+    from arcade import Texture
+    from PIL import Image
+    from src.clock import Clock
+    from src.ecs import World, SpriteSync
+
+    # A frame of _count moving entities, a tenth of them replaced, then pushed into their sprites
+    _world = World()
+    _world.register("position", np.float64, (2,))
+    _world.register("velocity", np.float64, (2,))
+    _world.register("texture", np.int32)
+    _sync = SpriteSync(_world, [Texture(f"ecs_{_index}", Image.new("RGBA", (8, 8))) for _index in range(4)])
+    _replaced = max(1, _count // 10)
+    _entities = list(_world.create_many(_count, position=(0.0, 0.0), velocity=(30.0, 10.0), texture=1))
+
+    def _run():
+        _world.destroy_many(np.array(_entities[:_replaced]))
+        del _entities[:_replaced]
+        _entities.extend(_world.create_many(_replaced, position=(0.0, 0.0), velocity=(30.0, 10.0), texture=2))
+        for _archetype in _world.query("position", "velocity"):
+            _archetype["position"] += _archetype["velocity"] * Clock.c_fixed_step
+        _sync.sync()
+    return _run
+
+
+def _snapshot() -> Callable[[], None]:
+    from src.snapshot import Snapshotter
+
+    # A step's snapshot taken and put straight back, as rolling back a frame does
+    _snapshotter = Snapshotter(_player_engine().player)
+    _buffer = _snapshotter.capture()
+
+    def _run():
+        _snapshotter.capture_into(_buffer)
+        _snapshotter.restore(_buffer)
+    return _run
+
+
+def _headless_step() -> Callable[[], None]:
+    return _player_engine().step
+
+
+def benchmarks() -> Dict[str, Callable[[], Callable[[], None]]]:
+    """
+    Every benchmark by name, each a function setting it up and returning what is timed.
+    """
+    _benchmarks = {"hitbox.sensors": _hitbox_sensors,
+                   "physics.resolve_collisions": _resolve_collisions,
+                   "animator.animate": _animator,
+                   "particles.update": _particles,
+                   "input.dispatch": _input_dispatch,
+                   "enemies.update": _enemies,
+                   "ecs.step/10": lambda: _ecs(10),
+                   "ecs.step/100": lambda: _ecs(100),
+                   "ecs.step/1000": lambda: _ecs(1000),
+                   "ecs.step/10000": lambda: _ecs(10000),
+                   "snapshot.capture_restore": _snapshot,
+                   "headless.step": _headless_step,
+                   "navigation.Test/platforming": lambda: _navigation("Test", "platforming"),
+                   "navigation.Test/combat": lambda: _navigation("Test", "combat")}
+    # Every room of every region, the maps loose in tiled_maps aren't rooms the game can load
+    for _src in sorted(glob(path.join(c_root, "resources", "tiled_maps", "*", "*.tmj"))):
+        _region, _name = path.basename(path.dirname(_src)), path.basename(_src)[:-4]
+        _benchmarks[f"room.{_region}/{_name}"] = lambda _src=_src: _room(_src)
+    return _benchmarks
+
+
+def time_call(_call: Callable[[], None], _min_time: int = c_min_time,
+              _repeats: int = c_repeats) -> Tuple[float, float]:
+    """
+    The best and median nanoseconds per call over _repeats runs, each long enough to last _min_time.
+    """
+    _number, _time = 1, 0
+    while True:
+        _start = perf_counter_ns()
+        for _ in range(_number):
+            _call()
+        _time = perf_counter_ns() - _start
+        if _time >= _min_time:
+            break
+        _number *= 2 if _time <= 0 else max(2, min(10, int(_min_time / _time) + 1))
+
+    _times = [_time / _number]
+    for _ in range(_repeats - 1):
+        _start = perf_counter_ns()
+        for _ in range(_number):
+            _call()
+        _times.append((perf_counter_ns() - _start) / _number)
+    _times.sort()
+    return _times[0], _times[len(_times) // 2]
+
+
+def run(_filter: str = None, _min_time: int = c_min_time) -> Dict:
+    add_resource_handle("assets", path.join(c_root, "resources"))
+    add_resource_handle("data", path.join(c_root, "data"))
+
+    _results = dict()
+    for _name, _setup in benchmarks().items():
+        if _filter and _filter not in _name:
+            continue
+        _best, _median = time_call(_setup(), _min_time)
+        _results[_name] = {"best_ns": _best, "median_ns": _median}
+        print(f"{_name:<36} {_best / 1000:10.2f}us  (median {_median / 1000:.2f}us)")
+
+    from src.worldmap import Map
+    Map.shutdown()
+    return {"version": c_version, "machine": node(), "platform": platform(), "python": python_version(),
+            "results": _results}
+
+
+def compare(_baseline: Dict, _current: Dict, _threshold: float = c_threshold) -> List[Tuple[str, float, float, bool]]:
+    """
+    (name, baseline ns, current ns, regressed) for every benchmark in both, comparing the best times. A benchmark
+    has regressed when it is slower than the baseline by more than _threshold.
+    """
+    _rows = []
+    for _name, _result in _current["results"].items():
+        if _name not in _baseline["results"]:
+            continue
+        _before, _after = _baseline["results"][_name]["best_ns"], _result["best_ns"]
+        _rows.append((_name, _before, _after, _after > _before * (1.0 + _threshold)))
+    return _rows
+
+
+def _save(_results: Dict, _path: str):
+    with open(_path, 'w') as _file:
+        dump(_results, _file, indent=2)
+
+
+def _load(_path: str) -> Dict:
+    with open(_path) as _file:
+        _results = load(_file)
+    if _results.get("version") != c_version:
+        raise ValueError(f"{_path} is not a benchmark baseline of version {c_version}")
+    return _results
+
+
+def main(_args: Optional[List[str]] = None) -> int:
+    from argparse import ArgumentParser
+
+    _parser = ArgumentParser(prog="python -m tests.benchmarks", description="Hot path microbenchmarks.")
+    _commands = _parser.add_subparsers(dest="command", required=True)
+    _run = _commands.add_parser("run", help="run the benchmarks")
+    _run.add_argument("--save", help="write the results to this .json as a baseline")
+    _run.add_argument("--filter", help="only run benchmarks with this in their name")
+    _compare = _commands.add_parser("compare", help="compare results against a baseline")
+    _compare.add_argument("baseline")
+    _compare.add_argument("current", nargs="?", help="results to compare, the suite is run when left out")
+    _compare.add_argument("--threshold", type=float, default=c_threshold,
+                          help="how much slower counts as a regression, 0.15 is 15%%")
+    _compare.add_argument("--filter", help="only run benchmarks with this in their name")
+    _args = _parser.parse_args(_args)
+
+    if _args.command == "run":
+        _results = run(_args.filter)
+        if _args.save:
+            _save(_results, _args.save)
+        return 0
+
+    _baseline = _load(_args.baseline)
+    _current = _load(_args.current) if _args.current else run(_args.filter)
+    if _baseline["machine"] != _current["machine"]:
+        print(f"baseline is from {_baseline['machine']}, timings from another machine may not compare")
+
+    _regressions = 0
+    for _name, _before, _after, _regressed in compare(_baseline, _current, _args.threshold):
+        _regressions += _regressed
+        print(f"{_name:<36} {_before / 1000:10.2f}us -> {_after / 1000:10.2f}us  {_after / _before - 1.0:+7.1%}"
+              f"{'  REGRESSED' if _regressed else ''}")
+    print(f"{_regressions} regression{'s' if _regressions != 1 else ''} beyond {_args.threshold:.0%}")
+    return 1 if _regressions else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
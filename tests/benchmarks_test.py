@@ -0,0 +1,39 @@
+from json import dump
+
+from tests.benchmarks import c_version, benchmarks, compare, main, time_call
+
+
+def _results(**_times):
+    return {"version": c_version, "machine": "test", "platform": "", "python": "",
+            "results": {_name: {"best_ns": _time, "median_ns": _time} for _name, _time in _times.items()}}
+
+
+def test_compare_flags_regressions():
+    _rows = compare(_results(a=100.0, b=100.0, c=100.0), _results(a=90.0, b=114.0, c=130.0, d=10.0), 0.15)
+    assert [(_name, _regressed) for _name, _, _, _regressed in _rows] == [("a", False), ("b", False), ("c", True)]
+
+
+def test_compare_command_exit_code(tmp_path):
+    for _name, _results_file in (("base", _results(a=100.0)), ("same", _results(a=105.0)),
+                                 ("slow", _results(a=200.0))):
+        with open(tmp_path / f"{_name}.json", 'w') as _file:
+            dump(_results_file, _file)
+    _base = str(tmp_path / "base.json")
+    assert main(["compare", _base, str(tmp_path / "same.json")]) == 0
+    assert main(["compare", _base, str(tmp_path / "slow.json")]) == 1
+    assert main(["compare", _base, str(tmp_path / "slow.json"), "--threshold", "1.5"]) == 0
+
+
+def test_time_call():
+    _calls = []
+    _best, _median = time_call(lambda: _calls.append(1), 1_000_000, 3)
+    assert 0 < _best <= _median
+    assert len(_calls) > 3
+
+
+def test_every_room_is_benchmarked():
+    _names = benchmarks()
+    assert "room.Test/platforming" in _names and "room.JungleEdge/entrance" in _names
+    assert {"hitbox.sensors", "physics.resolve_collisions", "animator.animate", "particles.update",
+            "input.dispatch", "enemies.update", "navigation.Test/platforming", "navigation.Test/combat",
+            "ecs.step/10", "ecs.step/10000", "snapshot.capture_restore"} <= set(_names)
@@ -0,0 +1,102 @@
+from os import path
+
+import pytest
+from arcade import SpriteSolidColor
+from arcade.resources import add_resource_handle
+
+from src.chunks import ChunkedLayer
+from src.room_cache import RoomCache
+from src.worldmap import Room, _tile_layer_sprites
+
+c_resources = path.join(path.dirname(path.dirname(path.abspath(__file__))), "resources")
+
+
+def tile(_x: float, _y: float, _size: int = 32):
+    _sprite = SpriteSolidColor(_size, _size, (255, 255, 255))
+    _sprite.position = (_x, _y)
+    return _sprite
+
+
+@pytest.fixture
+def layer():
+    # A 2048 x 1024 floor of 32px tiles, and one 96px decoration hanging over the right edge of chunk (0, 0)
+    _sprites = [tile(_x * 32 + 16, _y * 32 + 16) for _y in range(32) for _x in range(64)]
+    _sprites.append(tile(500, 200, 96))
+    return ChunkedLayer(_sprites)
+
+
+@pytest.mark.parametrize("rect, expected", [
+    ((0, 0, 100, 100), [(0, 0)]),
+    ((500, 0, 520, 10), [(0, 0), (1, 0)]),
+    ((1000, 500, 1100, 600), [(1, 0), (2, 0), (1, 1), (2, 1)]),
+    ((-1280, 0, 0, 720), []),
+    ((4000, 4000, 5280, 4720), []),
+    ((0, 1024, 2048, 2048), []),
+])
+def test_visible_chunks(layer, rect, expected):
+    assert layer.visible(*rect) == expected
+
+
+def test_overhanging_sprite_keeps_chunk_visible(layer):
+    # The decoration centred in chunk (0, 0) reaches x = 548, past the edge of its chunk
+    assert layer.bounds[(0, 0)] == [0, 0, 548, 512]
+    assert (0, 0) in layer.visible(530, 190, 540, 210)
+    assert (0, 0) not in layer.visible(530, 600, 540, 610)
+
+
+def test_every_chunk_without_rect(layer):
+    assert len(layer) == 64 * 32 + 1
+    assert sorted(layer.chunks.keys()) == sorted(layer.visible(-1e9, -1e9, 1e9, 1e9))
+
+
+@pytest.fixture
+def room():
+    add_resource_handle("assets", c_resources)
+    _data = RoomCache.load(path.join(c_resources, "tiled_maps", "Test", "platforming.tmj"))
+    return Room("platforming", "Test", _data)
+
+
+@pytest.mark.parametrize("camera", [(0, 0), (640, 320), (1500, 900), (-600, -300)])
+def test_room_culling_covers_viewport(room, camera):
+    _left, _bottom = camera
+    _rect = (_left, _bottom, _left + 1280, _bottom + 720)
+    _margin = Room.c_cull_margin
+
+    for _name, _layer in room.chunks.items():
+        _visible = set(_layer.visible(_rect[0] - _margin, _rect[1] - _margin, _rect[2] + _margin, _rect[3] + _margin))
+        for _key in _layer.keys:
+            _chunk = _layer.chunk(_key)
+            _on_screen = any(_sprite.center_x - _sprite.width / 2 < _rect[2] and
+                             _sprite.center_x + _sprite.width / 2 > _rect[0] and
+                             _sprite.center_y - _sprite.height / 2 < _rect[3] and
+                             _sprite.center_y + _sprite.height / 2 > _rect[1] for _sprite in _chunk)
+            if _on_screen:
+                assert _key in _visible, f"{_name} chunk {_key} is on screen but culled"
+
+    _culled = sum(len(_layer.visible(*_rect)) for _layer in room.chunks.values())
+    assert _culled < sum(len(_layer.keys) for _layer in room.chunks.values())
+
+
+@pytest.mark.parametrize("layer", Room.c_tile_layers)
+def test_tile_layer_matches_sprites(room, layer):
+    _tiles = room.chunks[layer]
+    _expected = sorted((_sprite.center_x, _sprite.center_y, _sprite.texture.name)
+                       for _sprite in _tile_layer_sprites(room.data, layer))
+
+    assert not _tiles.chunks
+    _made = sorted((_sprite.center_x, _sprite.center_y, _sprite.texture.name)
+                   for _key in _tiles.keys for _sprite in _tiles.chunk(_key))
+    assert _made == _expected
+    assert len(_tiles) == len(_expected)
+
+    _tiles.release()
+    assert not _tiles.chunks
+
+
+def test_tile_layer_only_makes_visible_chunks(room):
+    _tiles = room.chunks['ground']
+    _visible = _tiles.visible(0, 0, 1280, 720)
+    for _key in _visible:
+        _tiles.chunk(_key)
+    assert set(_tiles.chunks.keys()) == set(_visible)
+    assert len(_visible) < len(_tiles.keys)
@@ -0,0 +1,34 @@
+from random import Random
+
+import pytest
+
+from src.clock import GlobalClock
+
+
+@pytest.mark.parametrize("frame_rate", [30, 60, 144, 240])
+def test_steps_match_elapsed_time(frame_rate):
+    _clock = GlobalClock()
+    _steps = sum(_clock.advance(1 / frame_rate) for _ in range(frame_rate * 4))
+    # Four seconds at any frame rate is the same number of fixed steps, give or take the one still banked
+    assert abs(_steps - 4 / GlobalClock.c_fixed_step) <= 1
+    assert 0.0 <= _clock.alpha < 1.0
+
+
+def test_uneven_frames_keep_time():
+    _clock = GlobalClock()
+    _random = Random(2022)
+    _elapsed = 0.0
+    _steps = 0
+    for _ in range(1000):
+        _delta = _random.uniform(0.001, 0.03)
+        _elapsed += _delta
+        _steps += _clock.advance(_delta)
+    assert _steps * GlobalClock.c_fixed_step + _clock.alpha * GlobalClock.c_fixed_step == pytest.approx(_elapsed)
+
+
+def test_slow_frame_is_capped():
+    _clock = GlobalClock()
+    assert _clock.advance(1.0) == GlobalClock.c_max_steps
+    assert _clock.dropped_steps == int(1.0 / GlobalClock.c_fixed_step) - GlobalClock.c_max_steps
+    # The time past the cap is dropped rather than run over the next frames
+    assert _clock.advance(GlobalClock.c_fixed_step) <= 2
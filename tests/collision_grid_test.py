@@ -0,0 +1,108 @@
+from timeit import timeit
+from os import listdir, path
+from random import Random
+
+import pytest
+from arcade import SpriteList, SpriteSolidColor
+from arcade.resources import add_resource_handle
+
+from src.collision import GROUND, ONE_WAY
+from src.util import TILE_SIZE
+from src.worldmap import GameMap, Map
+
+c_root = path.dirname(path.dirname(path.abspath(__file__)))
+c_rooms = [(_region, _room[:-4]) for _region in GameMap.c_regions
+           for _room in sorted(listdir(path.join(c_root, "resources", "tiled_maps", _region)))
+           if _room.endswith(".tmj")]
+c_full_box = ((-16.0, -16.0), (16.0, -16.0), (16.0, 16.0), (-16.0, 16.0))
+# Ground tiles drawn as a thin lip, whose hit box doesn't fill their cell. The grid treats every ground tile as a
+# whole solid cell, so these are given a full hit box before comparing.
+c_partial_ground = {("JungleEdge", "snake"): {(7, 15)}}
+
+
+@pytest.fixture(scope="module")
+def game_map():
+    add_resource_handle("assets", path.join(c_root, "resources"))
+    _map = GameMap()
+    _map.initialise(_parsers=0, _budget=0, _headless=True)
+    yield _map
+    _map.shutdown()
+
+
+def cell(_sprite):
+    return int(_sprite.center_x // TILE_SIZE), int(_sprite.center_y // TILE_SIZE)
+
+
+def layer_sprites(_room, _layer: str) -> SpriteList:
+    _sprites = SpriteList(use_spatial_hash=True)
+    _tiles = _room.ground[_layer]
+    for _key in _tiles.keys:
+        _sprites.extend(_tiles.chunk(_key))
+    return _sprites
+
+
+@pytest.mark.parametrize("_region,_name", c_rooms)
+def test_grid_matches_sprites(game_map, _region, _name):
+    _room = game_map.get(_region, _name)
+    _ground, _one_way = layer_sprites(_room, "ground"), layer_sprites(_room, "one_way")
+    _partial = set()
+    for _sprite in _ground:
+        _xs, _ys = zip(*_sprite.get_hit_box())
+        if (min(_xs), min(_ys), max(_xs), max(_ys)) != (-16.0, -16.0, 16.0, 16.0):
+            _partial.add(cell(_sprite))
+            _sprite.set_hit_box(c_full_box)
+    assert _partial == c_partial_ground.get((_region, _name), set())
+    _all_ground = SpriteList(use_spatial_hash=True)
+    _all_ground.extend(_ground)
+    _all_ground.extend(_one_way)
+
+    _grid = _room.collision_grid
+    _random = Random(2022)
+    for _ in range(300):
+        _sensor = SpriteSolidColor(_random.choice((1, 8, 20, 32, 48)), _random.choice((1, 4, 20, 32, 64)),
+                                   (0, 255, 0))
+        _x, _y = _random.uniform(0.0, _room.px_width), _random.uniform(0.0, _room.px_height)
+        # Some boxes on whole pixels, so edges exactly touching a tile are tried as well
+        _sensor.position = (round(_x), round(_y)) if _random.random() < 0.3 else (_x, _y)
+        _box = (_sensor.left, _sensor.bottom, _sensor.right, _sensor.top)
+
+        for _mask, _sprites in ((GROUND, _ground), (ONE_WAY, _one_way), (GROUND | ONE_WAY, _all_ground)):
+            _hits = _sensor.collides_with_list(_sprites)
+            assert _grid.overlaps(*_box, _mask) == bool(_hits), (_box, _mask)
+            if _hits:
+                # Highest first, then leftmost
+                _column, _row = max(map(cell, _hits), key=lambda _cell: (_cell[1], -_cell[0]))
+                _tile = _grid.first_hit(*_box, _mask)
+                assert (_tile.column, _tile.row) == (_column, _row), (_box, _mask)
+
+if __name__ == '__main__':
+    add_resource_handle("assets", "resources")
+    _number = 20000
+
+    Map.initialise(('Test', 'platforming'))
+    _room = Map.get('Test', 'platforming')
+    _all_ground = SpriteList(use_spatial_hash=True)
+    _all_ground.extend(_room.ground['ground'])
+    _all_ground.extend(_room.ground['one_way'])
+    _grid = _room.collision_grid
+
+    _random = Random(2022)
+    _points = [(_random.randrange(0, int(_room.px_width)), _random.randrange(0, int(_room.px_height)))
+               for _ in range(256)]
+    _sensor = SpriteSolidColor(32, 1, (0, 255, 0))
+
+    def spatial_hash():
+        for _point in _points:
+            _sensor.position = _point
+            _collisions = _sensor.collides_with_list(_all_ground)
+            if len(_collisions):
+                _collisions.sort(key=lambda sprite: sprite.center_y, reverse=True)
+
+    def occupancy_grid():
+        for _x, _y in _points:
+            _grid.first_hit(_x - 16.0, _y - 0.5, _x + 16.0, _y + 0.5, GROUND | ONE_WAY)
+
+    _runs = _number // len(_points)
+    print(f"spatial hash sensor query: {timeit(spatial_hash, number=_runs) / (_runs * len(_points)) * 1e6:.3f}us")
+    print(f"occupancy grid query: {timeit(occupancy_grid, number=_runs) / (_runs * len(_points)) * 1e6:.3f}us")
+    Map.shutdown()
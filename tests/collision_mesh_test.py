@@ -0,0 +1,122 @@
+from timeit import timeit
+from random import Random
+from os import listdir, path
+
+import numpy as np
+import pytest
+from arcade.resources import add_resource_handle
+
+from src.collision import GROUND, ONE_WAY, SPIKES
+from src.worldmap import GameMap, Map
+
+c_root = path.dirname(path.dirname(path.abspath(__file__)))
+c_rooms = [(_region, _room[:-4]) for _region in GameMap.c_regions
+           for _room in sorted(listdir(path.join(c_root, "resources", "tiled_maps", _region)))
+           if _room.endswith(".tmj")]
+c_masks = (GROUND, ONE_WAY, SPIKES, GROUND | ONE_WAY, GROUND | ONE_WAY | SPIKES)
+
+
+@pytest.fixture(scope="module")
+def game_map():
+    add_resource_handle("assets", path.join(c_root, "resources"))
+    _map = GameMap()
+    _map.initialise(_parsers=0, _budget=0, _headless=True)
+    yield _map
+    _map.shutdown()
+
+
+def same_tile(_a, _b) -> bool:
+    if _a is None or _b is None:
+        return _a is _b
+    return (_a.column, _a.row, _a.bottom, _a.top) == (_b.column, _b.row, _b.bottom, _b.top)
+
+
+@pytest.mark.parametrize("_region,_name", c_rooms)
+def test_rects_cover_each_tile_once(game_map, _region, _name):
+    _room = game_map.get(_region, _name)
+    _cells = _room.collision_grid.cells
+    _rects = _room.collision_mesh.rects
+    # Spawn zones aren't meshed, they are only queried through the grid
+    for _flag in (GROUND, ONE_WAY, SPIKES):
+        _covered = np.zeros(_cells.shape, dtype=np.int64)
+        for _column, _row, _last_column, _last_row, _rect_flag in _rects:
+            if _rect_flag == _flag:
+                _covered[_row:_last_row + 1, _column:_last_column + 1] += 1
+        assert np.array_equal(_covered, ((_cells & _flag) != 0).astype(np.int64)), _flag
+
+
+@pytest.mark.parametrize("_region,_name", c_rooms)
+def test_queries_match_grid(game_map, _region, _name):
+    _room = game_map.get(_region, _name)
+    _grid, _mesh = _room.collision_grid, _room.collision_mesh
+    _random = Random(2022)
+    for _ in range(300):
+        _width, _height = _random.choice((1.0, 8.0, 20.0, 32.0, 48.0)), _random.choice((1.0, 4.0, 20.0, 64.0))
+        _left, _bottom = _random.uniform(-16.0, _room.px_width), _random.uniform(-16.0, _room.px_height)
+        if _random.random() < 0.3:
+            _left, _bottom = float(round(_left)), float(round(_bottom))
+        _box = (_left, _bottom, _left + _width, _bottom + _height)
+        _move = _random.uniform(-48.0, 48.0)
+        _dx, _dy = _random.uniform(-48.0, 48.0), _random.uniform(-48.0, 48.0)
+
+        for _mask in c_masks:
+            assert _mesh.overlaps(*_box, _mask) == _grid.overlaps(*_box, _mask), (_box, _mask)
+            assert same_tile(_mesh.first_hit(*_box, _mask), _grid.first_hit(*_box, _mask)), (_box, _mask)
+            for _along in ((_move, 0.0), (0.0, _move)):
+                assert same_tile(_mesh.first_along(*_box, *_along, _mask),
+                                 _grid.first_along(*_box, *_along, _mask)), (_box, _along, _mask)
+
+            _mesh_contact = _mesh.sweep(*_box, _dx, _dy, _mask)
+            _grid_contact = _grid.sweep(*_box, _dx, _dy, _mask)
+            assert (_mesh_contact is None) == (_grid_contact is None), (_box, _dx, _dy, _mask)
+            if _mesh_contact is not None:
+                assert _mesh_contact.time == pytest.approx(_grid_contact.time), (_box, _dx, _dy, _mask)
+            # Starting inside, the push out normal is that of the whole rectangle, not of the single cell
+            if _mesh_contact is not None and _mesh_contact.time > 0.0:
+                _normal = (_grid_contact.normal_x, _grid_contact.normal_y)
+                assert (_mesh_contact.normal_x, _mesh_contact.normal_y) == _normal, (_box, _dx, _dy, _mask)
+                assert same_tile(_mesh_contact.tile, _grid_contact.tile), (_box, _dx, _dy, _mask)
+
+
+if __name__ == '__main__':
+    add_resource_handle("assets", "resources")
+    _number = 20000
+
+    Map.initialise(_parsers=0)
+
+    print(f"{'room':<24}{'tiles':>8}{'rects':>8}{'ground':>12}{'one way':>12}{'spikes':>12}")
+    _rooms = [(_region, _room[:-4]) for _region in GameMap.c_regions
+              for _room in sorted(listdir(Map.room_src(_region))) if _room.endswith('.tmj')]
+    for _region, _name in _rooms:
+        _room = Map.get(_region, _name)
+        _cells = _room.collision_grid.cells
+        _rects = _room.collision_mesh.rects
+
+        _counts = []
+        for _flag in (GROUND, ONE_WAY, SPIKES):
+            _tiles = int(((_cells & _flag) != 0).sum())
+            _meshed = sum(1 for _rect in _rects if _rect[4] == _flag)
+            _counts.append(f"{_tiles:>5}/{_meshed:<6}")
+        _total = sum(int(((_cells & _flag) != 0).sum()) for _flag in (GROUND, ONE_WAY, SPIKES))
+        print(f"{_region + '/' + _name:<24}{_total:>8}{len(_rects):>8}" + "".join(f"{_c:>12}" for _c in _counts))
+
+    _room = Map.get('Test', 'platforming')
+    _grid = _room.collision_grid
+    _mesh = _room.collision_mesh
+
+    _random = Random(2022)
+    _points = [(_random.randrange(0, int(_room.px_width)), _random.randrange(0, int(_room.px_height)))
+               for _ in range(256)]
+
+    def occupancy_grid():
+        for _x, _y in _points:
+            _grid.first_hit(_x - 16.0, _y - 0.5, _x + 16.0, _y + 0.5, GROUND | ONE_WAY)
+
+    def collision_mesh():
+        for _x, _y in _points:
+            _mesh.first_hit(_x - 16.0, _y - 0.5, _x + 16.0, _y + 0.5, GROUND | ONE_WAY)
+
+    _runs = _number // len(_points)
+    print(f"occupancy grid query: {timeit(occupancy_grid, number=_runs) / (_runs * len(_points)) * 1e6:.3f}us")
+    print(f"collision mesh query: {timeit(collision_mesh, number=_runs) / (_runs * len(_points)) * 1e6:.3f}us")
+    Map.shutdown()
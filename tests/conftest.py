@@ -0,0 +1,58 @@
+import os
+
+import pytest
+
+from src.headless import HeadlessEngine
+from src.util import cache_root, set_cache_root
+
+
+def move_cache(_root: str):
+    """
+    Points every cache at _root, and returns a call which puts the cache root and its environment variable back.
+    """
+    _previous, _environ = cache_root(), os.environ.get("CACHE_ROOT", None)
+    set_cache_root(_root)
+
+    def restore():
+        set_cache_root(_previous)
+        if _environ is None:
+            del os.environ["CACHE_ROOT"]
+
+    return restore
+
+
+@pytest.fixture(scope="session", autouse=True)
+def session_cache(tmp_path_factory):
+    # Compiled rooms, baked chunks and navigation graphs of the tests are kept out of the repo's cache
+    _restore = move_cache(str(tmp_path_factory.mktemp("cache")))
+    yield
+    _restore()
+
+
+@pytest.fixture
+def fresh_cache(tmp_path):
+    """
+    An empty cache root for a single test, so nothing an earlier test cached is found.
+    """
+    _restore = move_cache(str(tmp_path / "cache"))
+    yield tmp_path / "cache"
+    _restore()
+
+
+@pytest.fixture(scope="module")
+def headless_engine():
+    """
+    Starts a HeadlessEngine with the arguments it is called with, shut down with the test module. Every engine
+    runs on the one Map, so starting another shuts down the engine before it.
+    """
+    _engines = []
+
+    def start(*_args, **_kwargs) -> HeadlessEngine:
+        if _engines:
+            _engines.pop().shutdown()
+        _engines.append(HeadlessEngine(*_args, **_kwargs))
+        return _engines[-1]
+
+    yield start
+    if _engines:
+        _engines.pop().shutdown()
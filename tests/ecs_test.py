@@ -0,0 +1,179 @@
+from os import path
+
+import numpy as np
+import pytest
+from arcade import Texture
+from arcade.resources import add_resource_handle
+from PIL import Image
+
+from src.animator import TempAnimatorManager
+from src.clock import Clock
+from src.ecs import World, SpriteSync
+
+c_root = path.dirname(path.dirname(path.abspath(__file__)))
+
+
+def world() -> World:
+    _world = World()
+    _world.register("position", np.float64, (2,))
+    _world.register("velocity", np.float64, (2,))
+    _world.register("health", np.int32)
+    _world.register("texture", np.int32)
+    return _world
+
+
+def textures(_count: int):
+    return [Texture(f"ecs_{_index}", Image.new("RGBA", (8, 8))) for _index in range(_count)]
+
+
+def consistent(_world: World):
+    # Every live entity is found at its row, with nothing else in the archetypes
+    _entities = np.concatenate([_archetype.entities for _archetype in _world.archetypes])
+    assert len(_entities) == len(_world) == len(set(_entities.tolist()))
+    for _archetype in _world.archetypes:
+        for _row, _entity in enumerate(_archetype.entities.tolist()):
+            assert _world.alive(_entity) and _world._locate(_entity) == (_archetype, _row)
+
+
+def test_create_and_destroy():
+    _world = world()
+    _first = _world.create(position=(1.0, 2.0), health=3)
+    _second = _world.create(position=(3.0, 4.0), health=5)
+    assert _world.get(_second, "health") == 5 and tuple(_world.get(_first, "position")) == (1.0, 2.0)
+
+    _world.destroy(_first)
+    assert not _world.alive(_first) and _world.alive(_second)
+    # The moved entity is still found after taking the destroyed one's row
+    assert _world.get(_second, "health") == 5
+    with pytest.raises(KeyError):
+        _world.get(_first, "health")
+
+    # The index is reused with a new generation, so the old id stays dead
+    _third = _world.create(position=(0.0, 0.0), health=1)
+    assert _third & 0xFFFFFFFF == _first & 0xFFFFFFFF and _third != _first
+    assert not _world.alive(_first) and _world.alive(_third)
+    consistent(_world)
+
+
+def test_many():
+    _world = world()
+    _entities = _world.create_many(100, position=np.arange(200.0).reshape(100, 2), health=7)
+    assert len(_world) == 100 and _world.count("position", "health") == 100
+
+    # Stale and repeated ids are skipped
+    _world.destroy_many(_entities[::3])
+    _world.destroy_many(np.concatenate((_entities[::3], _entities[1:4], _entities[1:4])))
+    assert len(_world) == 100 - 34 - 2
+    consistent(_world)
+    _alive = [_entity for _entity in _entities.tolist() if _world.alive(_entity)]
+    assert [tuple(_world.get(_entity, "position")) for _entity in _alive] == \
+        [(2.0 * _index, 2.0 * _index + 1) for _index, _entity in enumerate(_entities.tolist()) if _entity in _alive]
+
+    _again = _world.create_many(50, position=(0.0, 0.0), health=1)
+    assert len(_world) == 114 and all(_world.alive(_entity) for _entity in _again.tolist())
+    consistent(_world)
+
+
+def test_query_and_components():
+    _world = world()
+    _moving = _world.create_many(3, position=(0.0, 0.0), velocity=(1.0, 2.0))
+    _still = _world.create(position=(5.0, 5.0), health=2)
+    assert [len(_archetype) for _archetype in _world.query("position")] == [3, 1]
+    assert [len(_archetype) for _archetype in _world.query("position", "velocity")] == [3]
+
+    for _archetype in _world.query("position", "velocity"):
+        _archetype["position"] += _archetype["velocity"] * 2.0
+    assert tuple(_world.get(int(_moving[0]), "position")) == (2.0, 4.0)
+
+    _world.add_components(_still, velocity=(-1.0, 0.0))
+    assert _world.count("position", "velocity") == 4 and _world.get(_still, "health") == 2
+    _world.remove_components(int(_moving[1]), "velocity")
+    assert not _world.has(int(_moving[1]), "velocity") and _world.count("position", "velocity") == 3
+    assert tuple(_world.get(int(_moving[1]), "position")) == (2.0, 4.0)
+    consistent(_world)
+
+    with pytest.raises(KeyError):
+        _world.create(mass=1.0)
+
+
+def test_sprite_sync_uses_the_buffer():
+    # The fast path relies on SpriteList internals, this fails if an arcade update moves them
+    assert SpriteSync(world(), textures(1)).buffered
+
+
+@pytest.mark.parametrize("buffered", (True, False))
+def test_sprite_sync(buffered):
+    _world, _textures = world(), textures(3)
+    _sync = SpriteSync(_world, _textures)
+    _sync._buffered = buffered
+    _entities = _world.create_many(5, position=np.arange(10.0).reshape(5, 2), texture=np.arange(5) % 3)
+    _world.create(position=(1.0, 1.0), health=1)
+    _sync.sync()
+    assert len(_sync.sprites) == 5
+    assert _sync.positions.tolist() == [[0.0, 1.0], [2.0, 3.0], [4.0, 5.0], [6.0, 7.0], [8.0, 9.0]]
+    assert [_sprite.texture for _sprite in _sync.sprites] == [_textures[_index] for _index in (0, 1, 2, 0, 1)]
+
+    # Destroying shuffles the rows, each sprite still shows the entity in its slot
+    _world.destroy_many(_entities[:2])
+    _sync.sync()
+    _archetype = _world.query("position", "texture")[0]
+    assert len(_sync.sprites) == 3 and _sync.positions.tolist() == _archetype["position"].tolist()
+    assert sorted(_sync.positions.tolist()) == [[4.0, 5.0], [6.0, 7.0], [8.0, 9.0]]
+    assert [_sprite.texture for _sprite in _sync.sprites] == [_textures[_index]
+                                                              for _index in _archetype["texture"].tolist()]
+
+
+def test_particles_expire():
+    add_resource_handle("assets", path.join(c_root, "resources"))
+    _particles = TempAnimatorManager()
+    _particles.load(":assets:/textures/particles", "placeholder_particle_16px")
+    _frames = _particles._frames["puff"]
+    _particles.add_new("puff", 10.0, 20.0, 60.0, 0.0, 2, (-1.0, 1.0))
+
+    # Every frame is shown for its duration, twice through, then the particle is gone
+    _lifetime = 2 * sum(_frame['duration'] for _frame in _frames) / 1000
+    _steps = 0
+    while _particles.count:
+        Clock.tick(Clock.c_fixed_step)
+        _particles.update()
+        _particles.animate()
+        _steps += 1
+    assert _steps == pytest.approx(_lifetime / Clock.c_fixed_step, abs=len(_frames) * 2 + 1)
+
+    _particles.add_new("puff", 10.0, 20.0, 60.0, 0.0)
+    Clock.tick(Clock.c_fixed_step)
+    _particles.update()
+    _particles.sync.sync()
+    _sprite = _particles.sprites[0]
+    assert _particles.sync.positions[0].tolist() == pytest.approx([10.0 + 60.0 * Clock.delta_time, 20.0])
+    assert _sprite.texture is _frames[0]['texture'] and _sprite.scale_xy == (1.0, 1.0)
+
+
+if __name__ == '__main__':
+    from timeit import timeit
+
+    for _count in (10, 100, 1000, 10000):
+        _world, _textures = world(), textures(4)
+        _sync = SpriteSync(_world, _textures)
+        _number = max(10, 20000 // _count)
+
+        def _frame():
+            _entities = _world.create_many(_count, position=(0.0, 0.0), velocity=(30.0, 10.0), texture=1)
+            for _archetype in _world.query("position", "velocity"):
+                _archetype["position"] += _archetype["velocity"] * Clock.c_fixed_step
+            _sync.sync()
+            _world.destroy_many(_entities)
+
+        def _move():
+            for _archetype in _world.query("position", "velocity"):
+                _archetype["position"] += _archetype["velocity"] * Clock.c_fixed_step
+
+        _entities = _world.create_many(_count, position=(0.0, 0.0), velocity=(30.0, 10.0), texture=1)
+        # The sprites are made on the first sync, the rest only move them
+        _sync.sync()
+        _moved = timeit(_move, number=_number) / _number
+        _synced = timeit(_sync.sync, number=_number) / _number
+        _world.destroy_many(_entities)
+        _cycle = timeit(_frame, number=_number) / _number
+        print(f"{_count} entities: move {_moved / _count * 1e9:.0f}ns, sync {_synced / _count * 1e9:.0f}ns, "
+              f"create to destroy {_cycle / _count * 1e9:.0f}ns an entity")
@@ -0,0 +1,199 @@
+from os import path
+from random import Random
+
+import numpy as np
+import pytest
+from arcade import key
+
+from src.clock import Clock
+from src.enemies import Enemies, Boar, Hornet, Snake, EnemyType, IDLE, MOVE, HURT, DEAD
+from src.player.player_weapon import RightAttack
+from src.room_cache import RoomCache
+from src.worldmap import Map, Room
+
+c_maps = path.join(path.dirname(path.dirname(path.abspath(__file__))), "resources", "tiled_maps")
+
+
+@pytest.fixture(scope="module")
+def engine(headless_engine):
+    return headless_engine(("Test", "combat"), (600.0, 400.0))
+
+
+def enemy(_type: str, _x: float, _y: float, _size: float = 64.0, **_properties):
+    # A tile object as Tiled writes it, y is the bottom of the object counted down from the top of the room
+    return {'gid': 1, 'x': _x, 'y': _y, 'width': _size, 'height': _size,
+            'properties': {'type': _type, **_properties}}
+
+
+def scattered(_count: int, _seed: int = 0) -> Enemies:
+    _random = Random(_seed)
+    return Enemies([enemy(_random.choice(("boar", "snake", "hornet")), _random.uniform(0, 4000),
+                          _random.uniform(0, 2000), _random.uniform(16, 128), trot_left=200.0, trot_right=200.0)
+                    for _ in range(_count)], 4000.0, 2000.0)
+
+
+def brute_force(_enemies: Enemies, _box):
+    _left, _bottom, _right, _top = _box
+    _x, _y, _half_width, _half_height = _enemies.x, _enemies.y, _enemies.half_width, _enemies.half_height
+    return {_index for _index in range(len(_enemies)) if _enemies.alive[_index] and
+            _x[_index] - _half_width[_index] < _right and _x[_index] + _half_width[_index] > _left and
+            _y[_index] - _half_height[_index] < _top and _y[_index] + _half_height[_index] > _bottom}
+
+
+def test_loaded_from_room():
+    _data = RoomCache.load(path.join(c_maps, "Test", "combat.tmj"))
+    _enemies = Enemies(_data.objects('enemies'), _data.width * 32.0, _data.height * 32.0)
+    assert _enemies.types == [Boar, Hornet, Snake]
+    assert [_enemies.type_name(_index) for _index in range(3)] == ["boar", "hornet", "snake"]
+    # Health -1 in Tiled is the type's
+    assert _enemies.health.tolist() == [Boar.c_health, Hornet.c_health, Snake.c_health]
+    assert _enemies.state.tolist() == [MOVE, MOVE, IDLE]
+    # The boar is placed at x 512, y 1088 from the top, 128 square
+    assert (_enemies.x[0], _enemies.y[0]) == (576.0, _data.height * 32.0 - 1088.0 + 64.0)
+    # The hornet and snake are flipped
+    assert _enemies.direction.tolist() == [1.0, -1.0, -1.0]
+
+
+def test_boar_trots():
+    _enemies = Enemies([enemy("boar", 1000.0, 500.0, trot_left=100.0, trot_right=50.0)], 4000.0, 2000.0)
+    _xs = []
+    for _ in range(600):
+        Clock.tick(Clock.c_fixed_step)
+        _enemies.update()
+        _xs.append(float(_enemies.x[0]))
+    assert min(_xs) == 1032.0 - 100.0 and max(_xs) == 1032.0 + 50.0
+    assert len(set(_enemies.frame.tolist())) == 1 and 0 <= _enemies.frame[0] < Boar.c_frames
+
+
+@pytest.mark.parametrize("_count", [10, 500])
+def test_query_matches_brute_force(_count):
+    _enemies = scattered(_count)
+    _random = Random(_count)
+    for _step in range(20):
+        Clock.tick(Clock.c_fixed_step)
+        _enemies.update()
+        if _step == 10:
+            _enemies.damage(np.arange(0, _count, 3), 100)
+        for _ in range(20):
+            _x, _y = _random.uniform(-200, 4200), _random.uniform(-200, 2200)
+            _box = (_x, _y, _x + _random.uniform(1, 300), _y + _random.uniform(1, 300))
+            assert set(_enemies.query(*_box).tolist()) == brute_force(_enemies, _box)
+
+
+def test_damage():
+    _enemies = Enemies([enemy("snake", 100.0, 500.0), enemy("snake", 300.0, 500.0)], 4000.0, 2000.0)
+    _box = (0.0, 0.0, 4000.0, 2000.0)
+    assert _enemies.contact_damage(*_box) == 2 * Snake.c_contact_damage
+
+    assert _enemies.damage(np.array([0]), 1).tolist() == [0]
+    assert _enemies.state.tolist() == [HURT, IDLE] and _enemies.health[0] == Snake.c_health - 1
+    # Flinching, so it can't be hit again or hurt the player yet
+    assert not len(_enemies.damage(np.array([0]), 1))
+    assert _enemies.contact_damage(*_box) == Snake.c_contact_damage
+    for _ in range(Snake.c_hurt_frames):
+        Clock.tick(Clock.c_fixed_step)
+        _enemies.update()
+    assert _enemies.state[0] == IDLE
+
+    _enemies.damage(np.array([0, 1]), 100)
+    assert _enemies.state.tolist() == [DEAD, DEAD]
+    assert not len(_enemies.query(*_box)) and _enemies.contact_damage(*_box) == 0
+
+
+def test_unknown_type_stands_still():
+    _enemies = Enemies([enemy("dragon", 100.0, 500.0)], 4000.0, 2000.0)
+    _enemies.update()
+    assert _enemies.types == [EnemyType] and _enemies.x[0] == 132.0
+
+
+def test_player_and_enemies(engine):
+    _enemies, _player = Map.current.enemies, engine.player
+    _snake = _enemies.slices[_enemies.types.index(Snake)].start
+    _x, _y = float(_enemies.x[_snake]), float(_enemies.y[_snake])
+
+    # Touching the snake sends the player back to the last ground it stood on
+    _player.p_data.set_last_ground_instant()
+    _last_ground = _player.p_data.pos
+    _player.p_data.pos = (_x, _y)
+    engine.step(1)
+    assert _player.p_data.pos == _last_ground
+
+    # Swinging at it from beside it hits it once
+    _player.p_data.pos = (_x - 100.0, _y)
+    _health = int(_enemies.health[_snake])
+    engine.press(key.RIGHT)
+    engine.step(1)
+    engine.release(key.RIGHT)
+    engine.step(8)
+    assert _enemies.health[_snake] == _health - 1
+    assert _enemies.state[_snake] == HURT
+
+
+
+def test_pooled_attack_hits_again(engine):
+    _enemies, _player = Map.current.enemies, engine.player
+    _weapon = _player.p_weapon
+    _snake = _enemies.slices[_enemies.types.index(Snake)].start
+    _x, _y = float(_enemies.x[_snake]), float(_enemies.y[_snake])
+    _pool = _weapon.attacks[RightAttack]
+
+    _health = int(_enemies.health[_snake])
+    _attacks = []
+    for _ in range(2):
+        # Out lasts the snake's hurt frames and the delay before the next attack
+        engine.step(Snake.c_hurt_frames + _weapon.c_attack_delay + 2)
+        _player.p_data.pos = (_x - 100.0, _y)
+        engine.press(key.RIGHT)
+        engine.step(1)
+        engine.release(key.RIGHT)
+        _attacks.append(_weapon.current_attack)
+        engine.step(RightAttack.c_attack_max_age + 1)
+    # The struck enemies are cleared when the attack is taken from its pool again
+    assert _attacks[0] is _attacks[1] and isinstance(_attacks[0], RightAttack)
+    assert _enemies.health[_snake] == _health - 2 and _pool.in_use == 0
+
+
+def test_struck_enemies_follow_the_room(engine):
+    # Two copies of the room, so the snake is alive whatever the tests before did to it
+    _rooms = [Room("combat", "Test", RoomCache.load(path.join(c_maps, "Test", "combat.tmj")), True) for _ in range(2)]
+    _room, _player = Map.current, engine.player
+    _weapon = _player.p_weapon
+    _snake = _rooms[0].enemies.slices[_rooms[0].enemies.types.index(Snake)].start
+    _x, _y = float(_rooms[0].enemies.x[_snake]), float(_rooms[0].enemies.y[_snake])
+    _health = int(_rooms[0].enemies.health[_snake])
+
+    Map.set_room(_rooms[0])
+    try:
+        engine.step(Snake.c_hurt_frames + _weapon.c_attack_delay + 2)
+        _player.p_data.pos = (_x - 100.0, _y)
+        engine.press(key.RIGHT)
+        engine.step(1)
+        engine.release(key.RIGHT)
+        _attack = _weapon.current_attack
+        _attack.strike_enemies()
+        assert _rooms[0].enemies.health[_snake] == _health - 1
+
+        # The same swing in the other room hits the enemy at the same index there
+        Map.set_room(_rooms[1])
+        _attack.strike_enemies()
+        assert _rooms[1].enemies.health[_snake] == _health - 1
+    finally:
+        Map.set_room(_room)
+    engine.step(RightAttack.c_attack_max_age + 1)
+
+
+if __name__ == '__main__':
+    from timeit import timeit
+
+    for _count in (10, 100, 500, 1000):
+        _enemies = scattered(_count)
+        _number = 2000
+
+        def _step():
+            Clock.tick(Clock.c_fixed_step)
+            _enemies.update()
+            # One contact check and one attack a step, as the player makes
+            _enemies.contact_damage(1000.0, 500.0, 1032.0, 564.0)
+            _enemies.query(1000.0, 500.0, 1128.0, 596.0)
+        _time = timeit(_step, number=_number) / _number
+        print(f"{_count} enemies: {_time * 1e6:.0f}us a step, {_time / _count * 1e9:.0f}ns an enemy")
@@ -0,0 +1,36 @@
+from time import perf_counter
+
+import pytest
+from arcade import key
+
+from src.clock import Clock
+
+
+@pytest.fixture(scope="module")
+def engine(headless_engine):
+    return headless_engine(("Test", "platforming"), (144.0, 400.0))
+
+
+def test_player_lands(engine):
+    _frame = engine.frame
+    engine.run(2.0)
+    assert engine.frame - _frame == round(2.0 / Clock.c_fixed_step)
+    assert engine.player.p_data.on_ground
+    assert engine.player.p_data.bottom == 128.0
+
+
+def test_player_walks(engine):
+    _x = engine.player.p_data.x
+    engine.press(key.D)
+    engine.run(0.5)
+    engine.release(key.D)
+    engine.run(0.5)
+    assert engine.player.p_data.x > _x
+    assert engine.player.p_data.vel_x == 0.0
+    assert engine.player.p_data.on_ground
+
+
+def test_faster_than_real_time(engine):
+    _start = perf_counter()
+    _steps = engine.run(5.0)
+    assert perf_counter() - _start < _steps * Clock.c_fixed_step
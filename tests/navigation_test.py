@@ -0,0 +1,147 @@
+from math import inf
+from os import path
+from random import Random
+
+import numpy as np
+import pytest
+
+from src.collision import CollisionGrid, GROUND, ONE_WAY, SPIKES
+from src.navigation import NavGraph, NavigationCache, Navigation, WALK, FALL, JUMP
+from src.room_cache import RoomCache
+from src.util import TILE_SIZE
+from src.worldmap import Room
+
+c_maps = path.join(path.dirname(path.dirname(path.abspath(__file__))), "resources", "tiled_maps")
+c_flags = {"#": GROUND, "-": ONE_WAY, "^": SPIKES, ".": 0}
+
+
+def grid(*_rows: str) -> np.ndarray:
+    """
+    Collision flags drawn top row first, as the room looks.
+    """
+    return np.array([[c_flags[_cell] for _cell in _row] for _row in reversed(_rows)], dtype=np.uint8)
+
+
+def kinds(_graph: NavGraph, _path):
+    return [_graph.edge(_edge)[2] for _edge in _path]
+
+
+def test_walk():
+    _graph = NavGraph.build(grid("......",
+                                 "......",
+                                 "......",
+                                 "######"))
+    assert _graph.node_count == 6 and (_graph.index[1] >= 0).all()
+    _start, _goal = _graph.node_at(16.0, TILE_SIZE), _graph.node_at(6 * TILE_SIZE - 16.0, TILE_SIZE)
+    _path = _graph.find_path(_start, _goal)
+    assert kinds(_graph, _path) == [WALK] * 5
+    assert _graph.path_cost(_path) == pytest.approx(5 * TILE_SIZE / NavGraph.c_max_vel)
+    assert _graph.edge(_path[-1])[1] == _goal
+
+
+def test_jump_up_and_fall_down():
+    _graph = NavGraph.build(grid("........",
+                                 "........",
+                                 "........",
+                                 "....####",
+                                 "....####",
+                                 "########"))
+    _low, _high = _graph.node_at(16.0, TILE_SIZE), _graph.node_at(7 * TILE_SIZE, 3 * TILE_SIZE)
+    assert JUMP in kinds(_graph, _graph.find_path(_low, _high))
+    assert FALL in kinds(_graph, _graph.find_path(_high, _low))
+
+
+def test_too_high():
+    _graph = NavGraph.build(grid("........",
+                                 "........",
+                                 "....####",
+                                 "....####",
+                                 "....####",
+                                 "....####",
+                                 "....####",
+                                 "########"))
+    _low, _high = _graph.node_at(16.0, TILE_SIZE), _graph.node_at(7 * TILE_SIZE, 6 * TILE_SIZE)
+    assert _graph.find_path(_low, _high) is None
+    assert _graph.find_path(_high, _low) is not None
+
+
+def test_one_way_and_spikes():
+    _graph = NavGraph.build(grid("......",
+                                 "......",
+                                 "..--..",
+                                 "......",
+                                 "......",
+                                 "##^^##"))
+    # Nothing stands on or over spikes, and the one way platform is reached by jumping through it
+    assert _graph.index[1, 2] < 0 and _graph.index[1, 3] < 0
+    _start, _platform = _graph.node_at(16.0, TILE_SIZE), _graph.node_at(2.5 * TILE_SIZE, 4 * TILE_SIZE)
+    assert _graph.position(_platform) == (2.5 * TILE_SIZE, 4 * TILE_SIZE)
+    assert JUMP in kinds(_graph, _graph.find_path(_start, _platform))
+
+
+def test_matches_dijkstra():
+    _graph = NavGraph.build(CollisionGrid(RoomCache.load(path.join(c_maps, "Test", "combat.tmj"))).cells)
+    _dijkstra = NavGraph.build(CollisionGrid(RoomCache.load(path.join(c_maps, "Test", "combat.tmj"))).cells)
+    # Without a heuristic A* is Dijkstra
+    _dijkstra.c_max_vel = inf
+    _random = Random(3)
+    _found = 0
+    for _ in range(100):
+        _start, _goal = _random.randrange(_graph.node_count), _random.randrange(_graph.node_count)
+        _path, _expected = _graph.find_path(_start, _goal), _dijkstra.find_path(_start, _goal)
+        assert (_path is None) == (_expected is None)
+        if _path is not None:
+            _found += 1
+            assert _graph.path_cost(_path) == pytest.approx(_dijkstra.path_cost(_expected))
+            _node = _start
+            for _edge in _path:
+                assert _graph.edge(_edge)[0] == _node
+                _node = _graph.edge(_edge)[1]
+            assert _node == _goal
+    assert _found
+
+
+def test_cache(fresh_cache):
+    _data = RoomCache.load(path.join(c_maps, "Test", "platforming.tmj"))
+    _cells = CollisionGrid(_data).cells
+    _cache = NavigationCache()
+    _graph = _cache.graph(_data, _cells)
+    assert _cache.graph(_data, _cells) is _graph and _cache.built == 1
+
+    _loaded = NavigationCache().graph(_data, _cells)
+    for _name, _array in _graph.to_arrays().items():
+        assert np.array_equal(_loaded.to_arrays()[_name], _array)
+    assert path.exists(_cache.cache_path(_data)) and _cache.cache_path(_data).startswith(str(fresh_cache))
+
+
+def test_unwritable_cache(tmp_path):
+    # A file where the cache directory should be, so the graph can't be saved
+    (tmp_path / "file").write_bytes(b"")
+    _data = RoomCache.load(path.join(c_maps, "Test", "platforming.tmj"))
+    _cache = NavigationCache(str(tmp_path / "file" / "navigation"))
+    _graph = _cache.graph(_data, CollisionGrid(_data).cells)
+    assert _cache.graph(_data, CollisionGrid(_data).cells) is _graph
+    assert (_cache.built, _cache.unsaved) == (1, 1) and _data in _cache
+
+    _cache.release(_data)
+    assert _data not in _cache
+
+
+def test_room_graph():
+    _room = Room("combat", "Test", RoomCache.load(path.join(c_maps, "Test", "combat.tmj")), True)
+    assert _room.navigation is _room.navigation
+    assert _room.navigation is Navigation.graph(_room.data, _room.collision_grid.cells)
+
+
+if __name__ == '__main__':
+    from timeit import timeit
+
+    for _room in ("platforming", "combat"):
+        _cells = CollisionGrid(RoomCache.load(path.join(c_maps, "Test", f"{_room}.tmj"))).cells
+        _graph = NavGraph.build(_cells)
+        _random = Random(21)
+        _queries = [(_random.randrange(_graph.node_count), _random.randrange(_graph.node_count)) for _ in range(200)]
+        _build = timeit(lambda: NavGraph.build(_cells), number=5) / 5
+        _search = timeit(lambda: [_graph.find_path(*_query) for _query in _queries], number=5) / 5 / len(_queries)
+        print(f"Test/{_room}: {_graph.node_count} nodes, {_graph.edge_count} edges, built in {_build * 1000:.0f}ms, "
+              f"A* {_search * 1e6:.0f}us a query")
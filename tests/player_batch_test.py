@@ -0,0 +1,102 @@
+from random import Random
+
+import numpy as np
+import pytest
+from arcade import key
+
+from src.headless import HeadlessEngine
+from src.input import Input
+from src.player.player_batch import PlayerBatch
+from src.player.player_states import STATE_NAMES, FALL, STAND
+
+c_start = (600.0, 400.0)
+c_keys = (key.D, key.A, key.SPACE, key.LSHIFT, key.S)
+# Random key presses which keep the player clear of spikes and gates for the whole run
+c_seed, c_steps = 14, 1400
+
+
+@pytest.fixture(scope="module")
+def engine(headless_engine):
+    return headless_engine(("Test", "platforming"), c_start)
+
+
+def _held_inputs():
+    return (Input.get_axis("HORIZONTAL").value, bool(Input.get_button("JUMP")), bool(Input.get_button("DASH")),
+            bool(Input.get_button("CROUCH")))
+
+
+def test_matches_player_character(engine):
+    _batch = PlayerBatch(engine.room.collision_grid, [c_start])
+    _random, _held = Random(c_seed), set()
+    for _step in range(c_steps):
+        if _random.random() < 0.05:
+            _key = _random.choice(c_keys)
+            if _key in _held:
+                _held.discard(_key)
+                engine.release(_key)
+            else:
+                _held.add(_key)
+                engine.press(_key)
+
+        _batch.step(*_held_inputs())
+        engine.step()
+
+        _data = engine.player.p_data
+        assert (_batch.x[0], _batch.y[0]) == pytest.approx((_data.x, _data.y), abs=1e-6), _step
+        assert (_batch.vel_x[0], _batch.vel_y[0]) == pytest.approx((_data.vel_x, _data.vel_y), abs=1e-6), _step
+        assert STATE_NAMES[_batch.state[0]] == engine.player.p_state_switch.state.name, _step
+
+    for _key in _held:
+        engine.release(_key)
+
+
+def test_agents_are_independent(engine):
+    _grid = engine.room.collision_grid
+    _batch = PlayerBatch(_grid, [c_start] * 3)
+    _alone = [PlayerBatch(_grid, [c_start]) for _ in range(3)]
+    # Standing still, walking right and jumping left
+    _inputs = [(0.0, False), (1.0, False), (-1.0, True)]
+    for _step in range(240):
+        _horizontal = np.array([_input[0] for _input in _inputs])
+        _jump = np.array([_input[1] and _step > 120 for _input in _inputs])
+        _batch.step(_horizontal, _jump)
+        for _agent, _single in enumerate(_alone):
+            _single.step(_horizontal[_agent], _jump[_agent])
+
+    for _agent, _single in enumerate(_alone):
+        assert (_batch.x[_agent], _batch.y[_agent]) == (_single.x[0], _single.y[0])
+        assert _batch.state[_agent] == _single.state[0]
+    assert _batch.state[0] == STAND and _batch.x[1] > c_start[0] and _batch.x[2] < c_start[0]
+
+
+def test_identical_agents_stay_identical(engine):
+    _batch = PlayerBatch(engine.room.collision_grid, [c_start] * 64)
+    assert (_batch.state == FALL).all()
+    _random = Random(c_seed)
+    for _step in range(600):
+        _batch.step(_random.choice((-1.0, 0.0, 1.0)), _random.random() < 0.3, _random.random() < 0.1)
+    assert (_batch.x == _batch.x[0]).all() and (_batch.y == _batch.y[0]).all()
+
+
+if __name__ == '__main__':
+    from time import perf_counter
+
+    _engine = HeadlessEngine(("Test", "platforming"), c_start)
+    _steps = 600
+
+    _start = perf_counter()
+    _engine.step(_steps)
+    _time = perf_counter() - _start
+    print(f"PlayerCharacter: {_steps / _time:.0f} agent steps/s")
+
+    for _count in (1, 10, 100, 1000, 10000):
+        _random = np.random.default_rng(0)
+        _positions = np.column_stack((_random.uniform(200.0, 1000.0, _count), np.full(_count, c_start[1])))
+        _batch = PlayerBatch(_engine.room.collision_grid, _positions)
+        _horizontal = _random.choice((-1.0, 0.0, 1.0), _count)
+        _start = perf_counter()
+        for _step in range(_steps):
+            _batch.step(_horizontal, _random.random(_count) < 0.2)
+        _time = perf_counter() - _start
+        print(f"PlayerBatch of {_count}: {_steps / _time:.0f} steps/s, {_count * _steps / _time:.0f} agent steps/s")
+    _engine.shutdown()
@@ -0,0 +1,71 @@
+import pytest
+from arcade import key
+
+from src.headless import HeadlessEngine
+from src.player.player_data import PlayerBody
+
+
+@pytest.fixture(scope="module")
+def engine(headless_engine):
+    return headless_engine(("Test", "platforming"), (600.0, 400.0))
+
+
+def test_body_edges():
+    _body = PlayerBody(16.0, 32.0)
+    _body.x, _body.y = 100.0, 200.0
+    assert (_body.left, _body.right, _body.bottom, _body.top) == (84.0, 116.0, 168.0, 232.0)
+    _body.bottom = 64.0
+    _body.left = 32.0
+    assert (_body.x, _body.y) == (48.0, 96.0)
+    assert not hasattr(_body, '__dict__')
+
+
+def test_data_matches_hit_box(engine):
+    _data, _sprite = engine.player.p_data, engine.player.p_sprite
+    engine.step()
+    assert (_data.left, _data.right, _data.bottom, _data.top) == (_sprite.left, _sprite.right, _sprite.bottom,
+                                                                  _sprite.top)
+
+
+def test_sprite_synced_each_step(engine):
+    _data, _sprite = engine.player.p_data, engine.player.p_sprite
+    engine.press(key.D)
+    for _ in range(30):
+        engine.step()
+        assert tuple(_sprite.position) == _data.pos
+        assert (_sprite.change_x, _sprite.change_y) == (_data.vel_x, _data.vel_y)
+    engine.release(key.D)
+
+
+if __name__ == '__main__':
+    from time import perf_counter_ns
+
+    from src.clock import Clock
+    from src.input import Input
+
+    _engine = HeadlessEngine(("Test", "platforming"), (600.0, 400.0))
+    _player = _engine.player
+    _engine.step(120)
+
+    # PlayerCharacter.update alone, walking back and forth so every collision check runs
+    _ticks, _samples = 2000, []
+    for _tick in range(_ticks):
+        if _tick % 200 == 0:
+            _engine.press(key.D if _tick % 400 == 0 else key.A)
+        elif _tick % 200 == 100:
+            _engine.release(key.D if _tick % 400 == 100 else key.A)
+        Clock.tick(Clock.c_fixed_step)
+        Input.p_key_held()
+        _start = perf_counter_ns()
+        _player.update()
+        _samples.append(perf_counter_ns() - _start)
+    _samples.sort()
+    print(f"PlayerCharacter.update: mean {sum(_samples) / _ticks / 1000:.1f}us, "
+          f"median {_samples[_ticks // 2] / 1000:.1f}us over {_ticks} ticks")
+
+    _start = perf_counter_ns()
+    for _ in range(100000):
+        _data = _player.p_data
+        _data.bottom, _data.left, _data.top, _data.right, _data.x, _data.old_bottom, _data.vel_x
+    print(f"PlayerData edge reads: {(perf_counter_ns() - _start) / 100000 / 7:.0f}ns each")
+    _engine.shutdown()
@@ -0,0 +1,75 @@
+from json import load
+
+import pytest
+from arcade import key
+
+from src.clock import Clock
+from src.headless import HeadlessEngine
+from src.player.player_states import STATE_NAMES, STAND, RUN, FALL, JUMP
+
+
+@pytest.fixture(scope="module")
+def engine(headless_engine):
+    return headless_engine(("Test", "platforming"), (600.0, 400.0))
+
+
+def test_ids_index_states(engine):
+    _switch = engine.player.p_state_switch
+    assert _switch.stats is None
+    for _id, _name in enumerate(STATE_NAMES):
+        assert _switch._states[_id].c_id == _id and _switch._states[_id].name == _name
+    engine.run(1.0)
+    assert (_switch.state_id, _switch.state.name) == (STAND, "stand")
+
+
+def test_texture_swapped_on_transitions(engine):
+    _switch = engine.player.p_state_switch
+    engine.run(0.5)
+    _sprite = _switch._state_name
+    _sprite.texture = _switch._state_name_textures[FALL]
+    _switch.set_state(STAND)
+    assert _sprite.texture is _switch._state_name_textures[FALL]
+
+    engine.press(key.D)
+    engine.run(0.1)
+    engine.release(key.D)
+    assert _switch.state_id == RUN and _sprite.texture is _switch._state_name_textures[RUN]
+    engine.run(1.0)
+
+
+def test_stats(engine, tmp_path):
+    _switch = engine.player.p_state_switch
+    engine.run(0.5)
+    _switch.enable_stats()
+    _frame = Clock.frame
+    for _key in (key.D, key.SPACE):
+        engine.press(_key)
+        engine.run(0.25)
+        engine.release(_key)
+        engine.run(1.0)
+    _stats = _switch.stats
+    assert _stats.count(STAND, RUN) == 1 and sum(_stats.transitions[RUN]) == 1
+    assert _stats.count(STAND, JUMP) == 1 and _stats.count(JUMP, FALL) == 1
+    assert sum(_stats.frames(_state) for _state in range(len(STATE_NAMES))) == Clock.frame - _frame
+
+    _stats.save(str(tmp_path / "stats.json"))
+    with open(tmp_path / "stats.json") as _file:
+        _data = load(_file)
+    assert _data["transitions"]["stand"]["run"] == 1
+    assert _data["frames"]["stand"] == _stats.frames(STAND)
+    _switch.disable_stats()
+    assert _switch.stats is None
+
+
+if __name__ == '__main__':
+    from timeit import timeit
+
+    _engine = HeadlessEngine(("Test", "platforming"), (600.0, 400.0))
+    _engine.run(1.0)
+    _switch = _engine.player.p_state_switch
+
+    _number = 1000000
+    _time = timeit(lambda: _switch.set_state(STAND), number=_number)
+    print(f"set_state to the same state: {_time / _number * 1e9:.0f}ns")
+    print(f"state_update: {timeit(_switch.state_update, number=_number) / _number * 1e9:.0f}ns")
+    _engine.shutdown()
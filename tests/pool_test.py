@@ -0,0 +1,104 @@
+import pytest
+from arcade import key
+
+from src.player.player_weapon import PlayerHit, PlayerHits, RightAttack
+from src.pool import Pool, Pools
+
+
+class Bullet:
+
+    def __init__(self):
+        self.x = 0.0
+        self.resets = 0
+
+    def reset(self, _x: float = 0.0):
+        self.x = _x
+        self.resets += 1
+
+
+@pytest.fixture(scope="module")
+def engine(headless_engine):
+    return headless_engine(("Test", "combat"), (600.0, 400.0))
+
+
+def test_reuse_and_reset():
+    _pool = Pool(Bullet, Bullet.reset, 2)
+    assert (_pool.created, _pool.free, _pool.in_use) == (2, 2, 0)
+
+    _first, _second = _pool.acquire(4.0), _pool.acquire()
+    assert _first.x == 4.0 and _first.resets == 1 and _second.x == 0.0
+    _third = _pool.acquire()
+    assert _pool.created == 3 and _pool.misses == 1 and _pool.high_water == 3
+
+    _pool.release(_first)
+    assert _pool.acquire(7.0) is _first and _first.x == 7.0 and _first.resets == 2
+    for _bullet in (_first, _second, _third):
+        _pool.release(_bullet)
+    assert _pool.to_dict() == {'created': 3, 'acquired': 4, 'misses': 1, 'in_use': 0, 'free': 3, 'high_water': 3}
+
+
+def test_release_errors():
+    _pool = Pool(Bullet)
+    _bullet = _pool.acquire()
+    _pool.release(_bullet)
+    with pytest.raises(ValueError):
+        _pool.release(_bullet)
+    with pytest.raises(ValueError):
+        _pool.release(Bullet())
+
+
+def test_tracks_the_objects():
+    _pool = Pool(list)
+    # Unhashable objects, equal but not the same, are told apart
+    _first, _second = _pool.acquire(), _pool.acquire()
+    assert _first == _second and _pool.in_use == 2
+    _pool.release(_second)
+    with pytest.raises(ValueError):
+        _pool.release(_second)
+    _pool.release(_first)
+    with pytest.raises(ValueError):
+        _pool.release([])
+
+
+def test_max_size():
+    _pool = Pool(Bullet, _max_size=1)
+    _bullets = [_pool.acquire() for _ in range(3)]
+    for _bullet in _bullets:
+        _pool.release(_bullet)
+    assert _pool.free == 1 and _pool.high_water == 3
+
+
+def test_registry():
+    _pool = Pool(Bullet, _name="test.bullets")
+    _pool.acquire()
+    assert Pools.get("test.bullets") is _pool and Pools.stats()["test.bullets"]["in_use"] == 1
+
+
+def test_swings_reuse_attacks(engine):
+    _weapon = engine.player.p_weapon
+    _pool = _weapon.attacks[RightAttack]
+    _created = _pool.created
+    # Attacks are held off for a moment from the start
+    engine.step(_weapon.c_attack_delay + 1)
+
+    _attacks = []
+    for _ in range(3):
+        engine.press(key.RIGHT)
+        engine.step(1)
+        engine.release(key.RIGHT)
+        _attacks.append(_weapon.current_attack)
+        # Out lasts the attack and the delay before the next one
+        engine.step(RightAttack.c_attack_max_age + _weapon.c_attack_delay + 4)
+        assert _weapon.current_attack is None
+
+    assert all(isinstance(_attack, RightAttack) for _attack in _attacks)
+    assert _attacks[0] is _attacks[1] is _attacks[2]
+    assert _pool.created == _created and _pool.in_use == 0 and _pool.high_water == 1
+    assert PlayerHits.in_use == 0
+
+
+def test_hit_texture_shared(engine):
+    # The texture is loaded once onto the class, not onto each hit
+    _hit = PlayerHit()
+    assert PlayerHit.c_hit_texture is not None and 'c_hit_texture' not in vars(_hit)
+    assert _hit.texture is PlayerHit.c_hit_texture
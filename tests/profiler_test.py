@@ -0,0 +1,97 @@
+from json import load
+
+import pytest
+
+from src.clock import Clock
+from src.profiler import FrameProfiler
+
+
+def test_disabled_records_nothing():
+    _profiler = FrameProfiler()
+    with _profiler.scope("step"):
+        pass
+    assert _profiler.names == []
+    assert _profiler.scope("step") is _profiler.scope("other")
+
+
+def test_scope_records_time():
+    _profiler = FrameProfiler(True)
+    for _ in range(3):
+        with _profiler.scope("step"):
+            sum(range(1000))
+    assert _profiler.names == ["step"]
+    assert len(_profiler.samples("step")) == 3
+    assert (_profiler.samples("step") > 0).all()
+
+
+def test_ring_keeps_newest():
+    _profiler = FrameProfiler(True, 8)
+    _frame = Clock.frame
+    for _time in range(20):
+        _profiler.record("step", _time)
+    assert _profiler.samples("step").tolist() == list(range(12, 20))
+    assert (_profiler.frames("step") == _frame).all()
+    assert _profiler.summary("step")["count"] == 20
+
+
+def test_percentiles():
+    _profiler = FrameProfiler(True, 1000)
+    for _time in range(1, 1001):
+        _profiler.record("step", _time * 1000)
+    _summary = _profiler.summary("step")
+    assert (_summary["p50"], _summary["p95"], _summary["p99"]) == pytest.approx((500.5, 950.05, 990.01))
+    assert _summary["mean"] == pytest.approx(500.5)
+
+
+def test_export(tmp_path):
+    _profiler = FrameProfiler(True)
+    for _time in (100, 200, 300):
+        _profiler.record("player", _time)
+    _profiler.record("draw", 50)
+
+    _profiler.save(str(tmp_path / "times.csv"))
+    _lines = (tmp_path / "times.csv").read_text().splitlines()
+    assert _lines[0] == "scope,frame,ns"
+    assert [_line.split(",")[0] for _line in _lines[1:]] == ["player"] * 3 + ["draw"]
+    assert _lines[-1].endswith(",50")
+
+    _profiler.save(str(tmp_path / "times.json"))
+    with open(tmp_path / "times.json") as _file:
+        _data = load(_file)
+    assert _data["player"]["ns"] == [100, 200, 300]
+    assert _data["draw"]["summary"]["count"] == 1
+
+
+
+def test_overlay_lines_refresh_on_interval():
+    _profiler = FrameProfiler(True, 100)
+    _profiler.record("step", 1000)
+    _lines = _profiler.lines()
+    assert _lines == [("step", "step: 1 / 1 / 1 us")]
+
+    # Worked out once for the interval, however often it is drawn
+    _profiler.record("step", 9000)
+    _profiler.record("draw", 5000)
+    assert _profiler.lines() is _lines
+
+    _profiler.c_draw_interval = 0.0
+    assert _profiler.lines(["draw", "missing"]) == [("draw", "draw: 5 / 5 / 5 us")]
+
+
+if __name__ == '__main__':
+    from timeit import timeit
+
+    _number = 1000000
+    _profiler = FrameProfiler()
+
+    def _empty():
+        pass
+
+    def _scoped():
+        with _profiler.scope("step"):
+            pass
+
+    _base = timeit(_empty, number=_number)
+    print(f"disabled scope: {(timeit(_scoped, number=_number) - _base) / _number * 1e9:.0f}ns")
+    _profiler.enable()
+    print(f"enabled scope: {(timeit(_scoped, number=_number) - _base) / _number * 1e9:.0f}ns")
@@ -0,0 +1,75 @@
+import pytest
+from arcade import key
+
+from src.clock import Clock
+from src.collision import CollisionLayer, QueryCache, GROUND
+
+
+@pytest.fixture(scope="module")
+def engine(headless_engine):
+    return headless_engine(("Test", "platforming"), (600.0, 400.0))
+
+
+def test_repeats_within_a_frame():
+    _cache, _calls = QueryCache(True), []
+    for _ in range(3):
+        assert _cache.get(("a", 1.0), lambda: _calls.append(1) or len(_calls)) == 1
+    assert (_cache.hits, _cache.misses) == (2, 1)
+
+
+def test_kept_for_one_frame():
+    _cache, _calls = QueryCache(True), []
+    _query = lambda: _calls.append(1)
+    _cache.get("a", _query)
+    Clock.tick(Clock.c_fixed_step)
+    _cache.get("a", _query)
+    Clock.tick(Clock.c_fixed_step)
+    _cache.get("a", _query)
+    assert len(_calls) == 1
+    # Carried over each frame it's asked, but dropped after a frame it wasn't
+    Clock.tick(Clock.c_fixed_step)
+    Clock.tick(Clock.c_fixed_step)
+    _cache.get("a", _query)
+    assert len(_calls) == 2
+    assert _cache.hit_rate == 0.5
+
+
+def test_cached_layer_agrees(engine):
+    _grid = engine.room.collision_mesh
+    _plain, _cached = CollisionLayer(_grid, GROUND), CollisionLayer(_grid, GROUND, QueryCache(True))
+    for _x in range(0, 1200, 40):
+        for _y in range(0, 600, 40):
+            for _ in range(2):
+                assert _cached.overlaps(_x, _y, _x + 32, _y + 64) == _plain.overlaps(_x, _y, _x + 32, _y + 64)
+                assert _cached.first_hit(_x, _y, _x + 32, _y + 64) == _plain.first_hit(_x, _y, _x + 32, _y + 64)
+                _contact, _expected = _cached.sweep(_x, _y, _x + 32, _y + 1, 7.0, -30.0), \
+                    _plain.sweep(_x, _y, _x + 32, _y + 1, 7.0, -30.0)
+                assert (_contact is None) == (_expected is None)
+                if _contact is not None:
+                    assert (_contact.time, _contact.tile) == (_expected.time, _expected.tile)
+    assert _cached.cache.hits == _cached.cache.misses
+
+
+def test_uncounted():
+    _cache = QueryCache(False)
+    _cache.get("a", lambda: 1)
+    assert _cache.get("a", lambda: 2) == 1 and (_cache.hits, _cache.misses) == (0, 0)
+    _cache.counted = True
+    _cache.get("a", lambda: 2)
+    assert (_cache.hits, _cache.misses) == (1, 0)
+
+
+def test_player_reuses_queries(engine):
+    _queries = engine.room.queries
+    _queries.counted = True
+    engine.run(1.0)
+    _hits = _queries.hits
+    # Standing still asks the same questions every step
+    engine.run(0.5)
+    assert _queries.misses and _queries.hits - _hits >= 4 * round(0.5 / Clock.c_fixed_step)
+    # Walking asks new ones
+    _misses = _queries.misses
+    engine.press(key.D)
+    engine.run(0.25)
+    engine.release(key.D)
+    assert _queries.misses > _misses
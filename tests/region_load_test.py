@@ -0,0 +1,189 @@
+from concurrent.futures import wait
+from os import listdir, path
+from time import perf_counter
+from shutil import rmtree
+from threading import Event, Thread
+
+import pytest
+from arcade.resources import add_resource_handle
+
+from src.room_cache import RoomCache
+from src.worldmap import GameMap, Room
+
+c_root = path.dirname(path.dirname(path.abspath(__file__)))
+c_start = ("JungleEdge", "entrance")
+
+
+class GatedMap(GameMap):
+    """
+    A headless map with one loader thread, where a held room doesn't load until its gate is opened. Holding the
+    start room keeps every room queued after it waiting.
+    """
+    c_max_loaders = 1
+    c_headless = True
+
+    def __init__(self):
+        super().__init__()
+        self.gates = dict()
+        self.started = dict()
+
+    def hold(self, _region: str, _room: str):
+        self.gates[(_region, _room)] = Event()
+        self.started[(_region, _room)] = Event()
+
+    def open(self, _region: str, _room: str):
+        self.gates[(_region, _room)].set()
+
+    def _load_room(self, _region, _room, _data=None):
+        _key = (_region, _room)
+        if _key in self.gates:
+            self.started[_key].set()
+            self.gates[_key].wait(10.0)
+        return super()._load_room(_region, _room, _data)
+
+
+def queued(_map: GameMap):
+    """
+    The rooms of the start region initialise() queued behind the start room.
+    """
+    _queued = []
+    for _name in sorted(listdir(_map.room_src(c_start[0]))):
+        try:
+            _map.future(c_start[0], _name[:-4])
+        except KeyError:
+            continue
+        _queued.append((c_start[0], _name[:-4]))
+    return [_key for _key in _queued if _key != c_start]
+
+
+@pytest.fixture(autouse=True)
+def assets():
+    add_resource_handle("assets", path.join(c_root, "resources"))
+
+
+@pytest.fixture
+def gated():
+    _map = GatedMap()
+    _map.hold(*c_start)
+    _map.initialise(c_start, _parsers=0, _budget=3)
+    assert _map.started[c_start].wait(10.0)
+    yield _map
+    for _gate in _map.gates.values():
+        _gate.set()
+    _map.shutdown()
+
+
+def test_every_room_loads():
+    _map = GameMap()
+    _map.initialise(c_start, _parsers=0, _budget=4, _headless=True)
+    assert _map.wait(30.0)
+    assert len(queued(_map)) == 3
+    for _key in [c_start] + queued(_map):
+        assert _map.ready(*_key) and isinstance(_map.future(*_key).result(), Room)
+    assert _map.get(*c_start).key == c_start and _map.hits == 1
+    _map.shutdown()
+
+
+def test_get_loads_queued_room_inline(gated):
+    _key = queued(gated)[0]
+    _queued = gated.future(*_key)
+    assert not _queued.done()
+
+    # Loaded on this thread while the only loader is still held on the start room
+    _room = gated.get(*_key)
+    assert _room.key == _key and not gated.ready(*c_start)
+    assert _queued.cancelled() and gated.future(*_key).result() is _room
+    assert gated.misses == 1 and gated.get(*_key) is _room and gated.hits == 1
+
+
+def test_wait_barrier(gated):
+    assert not gated.wait(0.05)
+    gated.get(*queued(gated)[0])
+    # The room loaded by get() is done, the start room and the one behind it aren't
+    assert not gated.wait(0.05)
+
+    gated.open(*c_start)
+    assert gated.wait(10.0)
+    assert all(gated.ready(*_key) for _key in [c_start] + queued(gated))
+
+
+def test_observers(gated):
+    _calls = []
+    _finished = Event()
+
+    def observer(_loaded: int, _total: int):
+        _calls.append((_loaded, _total))
+        if _loaded == _total:
+            _finished.set()
+
+    _ignored = []
+    gated.register_load_observer(observer)
+    gated.register_load_observer(_ignored.append)
+    gated.deregister_load_observer(_ignored.append)
+
+    # A room loaded by get() is still counted once, its cancelled load isn't
+    gated.get(*queued(gated)[0])
+    gated.open(*c_start)
+    assert _finished.wait(10.0)
+    assert _calls == [(1, 3), (2, 3), (3, 3)] and not _ignored and gated.progress == (3, 3)
+
+
+def test_concurrent_get(gated):
+    _key = queued(gated)[0]
+    gated.hold(*_key)
+    _results = dict()
+
+    def get(_name: str):
+        try:
+            _results[_name] = gated.get(*_key, _timeout=10.0)
+        except Exception as _error:
+            _results[_name] = _error
+
+    _first = Thread(target=get, args=("first",))
+    _first.start()
+    # The first get() has cancelled the queued load and is loading the room itself
+    assert gated.started[_key].wait(10.0)
+    _second = Thread(target=get, args=("second",))
+    _second.start()
+    _second.join(0.1)
+    assert _second.is_alive()
+
+    gated.open(*_key)
+    _first.join(10.0)
+    _second.join(10.0)
+    assert isinstance(_results["first"], Room) and _results["second"] is _results["first"]
+    assert gated.future(*_key).result() is _results["first"]
+
+
+def test_shutdown_settles_parsed_rooms():
+    _map = GameMap()
+    _map.initialise(c_start, _parsers=1, _budget=4, _headless=True)
+    _futures = [_map.future(*_key) for _key in [c_start] + queued(_map)]
+    _map.shutdown()
+    # Every room either loaded or failed, none is left running with nothing to finish it
+    _done, _not_done = wait(_futures, timeout=10.0)
+    assert not _not_done
+
+
+def load_regions(_parsers: int, _cold: bool):
+    if _cold:
+        rmtree(RoomCache.cache_dir, ignore_errors=True)
+
+    _map = GameMap()
+    _start = perf_counter()
+    _map.initialise(_parsers=_parsers)
+    _map.wait()
+    _time = perf_counter() - _start
+    _map.shutdown()
+    return _time
+
+
+if __name__ == '__main__':
+    add_resource_handle("assets", "resources")
+    _repeats = 5
+
+    for _cold in (True, False):
+        for _parsers in (0, 1, 2, 4, 8):
+            _best = min(load_regions(_parsers, _cold) for _ in range(_repeats))
+            _mode = "threads only" if not _parsers else f"{_parsers} parser processes"
+            print(f"{'cold' if _cold else 'warm'} cache, {_mode}: {_best * 1000:.3f}ms")
@@ -0,0 +1,58 @@
+import pytest
+from arcade import key
+
+from src.replay import InputReplayer, _read_varint, _write_varint
+
+# (seconds to wait, key, pressed) for a walk right with a few jumps and a dash, then back left
+c_script = [(0.5, key.D, True), (0.4, key.SPACE, True), (0.2, key.SPACE, False), (0.3, key.LSHIFT, True),
+            (0.1, key.LSHIFT, False), (0.6, key.D, False), (0.1, key.A, True), (0.2, key.W, True),
+            (0.5, key.W, False), (0.8, key.A, False), (0.5, key.S, True), (0.3, key.S, False)]
+
+
+@pytest.fixture(scope="module")
+def recording(headless_engine):
+    _engine = headless_engine(("Test", "platforming"), (144.0, 160.0))
+    _recorder = _engine.record()
+    for _wait, _key, _pressed in c_script:
+        _engine.run(_wait)
+        if _pressed:
+            _engine.press(_key)
+        else:
+            _engine.release(_key)
+    _engine.run(1.0)
+    _end = tuple(_engine.player.position)
+    return _recorder, _end
+
+
+@pytest.mark.parametrize("value", [0, 1, 127, 128, 300, 2 ** 21, 2 ** 32 - 1])
+def test_varint_round_trip(value):
+    _log = bytearray()
+    _write_varint(_log, value)
+    assert _read_varint(bytes(_log), 0) == (value, len(_log))
+
+
+def test_log_is_compact(recording):
+    _recorder, _end = recording
+    assert _recorder.changes == len(c_script)
+    # Past the header and the hashes, each change is a step count and one byte per eight keys
+    _log = _recorder.to_bytes()
+    assert len(_log) - 4 * _recorder.steps < 256
+
+
+def test_replay_is_in_sync(recording, headless_engine):
+    _recorder, _end = recording
+    _replayer = InputReplayer(_recorder.to_bytes())
+    _engine = headless_engine(_replay=_replayer)
+    assert _engine.replay() is None
+    assert _replayer.finished
+    assert tuple(_engine.player.position) == _end
+
+
+def test_replay_finds_divergence(recording, headless_engine):
+    _recorder, _end = recording
+    _replayer = InputReplayer(_recorder.to_bytes())
+    _engine = headless_engine(_replay=_replayer)
+    # Nudging the player part way through throws every hash after it off
+    _engine.step(200)
+    _engine.player.p_data.x += 1.0
+    assert _engine.replay() == _replayer.start_frame + 201
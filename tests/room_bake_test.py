@@ -0,0 +1,106 @@
+from os import listdir, path
+
+import numpy as np
+import pytest
+from PIL import Image
+
+from src.room_bake import ChunkBaker
+from src.room_cache import RoomCache, FLIPPED_HORIZONTALLY, FLIPPED_VERTICALLY, FLIPPED_DIAGONALLY
+
+c_maps = path.join(path.dirname(path.dirname(path.abspath(__file__))), "resources", "tiled_maps")
+c_rooms = [path.join(c_maps, _region, _room) for _region in ("Test", "JungleEdge")
+           for _room in sorted(listdir(path.join(c_maps, _region))) if _room.endswith('.tmj')]
+c_layers = ("background", "decorations")
+
+
+def reference_chunk(_data, _layer, _left, _bottom, _width, _height):
+    """
+    Composites a single chunk straight from the tileset pngs, one tile at a time, on a canvas with enough margin
+    that no tile needs clipping.
+    """
+    _margin = 4 * max(_data.tile_width, _data.tile_height)
+    _canvas = Image.new("RGBA", (_width + 2 * _margin, _height + 2 * _margin))
+    _px_height = _data.height * _data.tile_height
+
+    for _index, _gid in enumerate(_data.layer(_layer)):
+        if not _gid:
+            continue
+        _image, _x, _y, _w, _h = _data.tile(_gid)
+        with Image.open(_data.image_path(_image)) as _source:
+            _tile = _source.convert("RGBA").crop((_x, _y, _x + _w, _y + _h))
+        if _gid & FLIPPED_DIAGONALLY:
+            _tile = _tile.transpose(Image.Transpose.TRANSPOSE)
+        if _gid & FLIPPED_HORIZONTALLY:
+            _tile = _tile.transpose(Image.Transpose.FLIP_LEFT_RIGHT)
+        if _gid & FLIPPED_VERTICALLY:
+            _tile = _tile.transpose(Image.Transpose.FLIP_TOP_BOTTOM)
+
+        # World position of the tile sprite, bottom left anchored to its cell and clipped to the room
+        _row, _column = divmod(_index, _data.width)
+        _tile_left = _column * _data.tile_width
+        _tile_bottom = (_data.height - _row - 1) * _data.tile_height
+        _tile_top = min(_tile_bottom + _tile.height, _px_height)
+        _tile = _tile.crop((0, _tile.height - (_tile_top - _tile_bottom), _tile.width, _tile.height))
+
+        if (_tile_left >= _left + _width or _tile_left + _tile.width <= _left or
+                _tile_bottom >= _bottom + _height or _tile_top <= _bottom):
+            continue
+        _canvas.alpha_composite(_tile, dest=(_margin + _tile_left - _left, _margin + _bottom + _height - _tile_top))
+
+    return _canvas.crop((_margin, _margin, _margin + _width, _margin + _height))
+
+
+@pytest.fixture
+def baker(tmp_path):
+    return ChunkBaker(str(tmp_path / "chunks"))
+
+
+@pytest.mark.parametrize("src", c_rooms, ids=[path.basename(_room) for _room in c_rooms])
+@pytest.mark.parametrize("layer", c_layers)
+def test_chunks_match_reference(baker, src, layer):
+    _data = RoomCache.load(src)
+    _chunks = baker.chunks(_data, layer)
+    _baked = {(_left, _bottom): (_file, _width, _height) for _file, _left, _bottom, _width, _height in _chunks}
+
+    _size = baker.c_chunk_size
+    _px_width, _px_height = _data.width * _data.tile_width, _data.height * _data.tile_height
+    for _bottom in range(0, _px_height, _size):
+        for _left in range(0, _px_width, _size):
+            _width, _height = min(_size, _px_width - _left), min(_size, _px_height - _bottom)
+            _reference = reference_chunk(_data, layer, _left, _bottom, _width, _height)
+
+            if (_left, _bottom) not in _baked:
+                assert _reference.getbbox() is None, f"skipped chunk {_left}, {_bottom} is not empty"
+                continue
+
+            _file, _baked_width, _baked_height = _baked[(_left, _bottom)]
+            assert (_baked_width, _baked_height) == (_width, _height)
+            with Image.open(_file) as _chunk:
+                assert np.array_equal(np.asarray(_chunk.convert("RGBA")), np.asarray(_reference))
+
+
+def test_chunks_cached_by_room_hash(baker):
+    _data = RoomCache.load(c_rooms[0])
+    _first = baker.chunks(_data, "background")
+    _second = baker.chunks(_data, "background")
+
+    assert _first == _second
+    assert baker.baked == 1 and baker.loaded == 1
+    assert all(path.dirname(_file) == baker.chunk_dir(_data) for _file, *_ in _first)
+    assert _data.hash in baker.chunk_dir(_data)
+
+
+def test_unwritable_cache_falls_back_to_images(tmp_path, baker):
+    # A file where the cache directory should be, so nothing can be written under it
+    (tmp_path / "file").write_bytes(b"")
+    _unwritable = ChunkBaker(str(tmp_path / "file" / "chunks"))
+    _data = RoomCache.load(c_rooms[0])
+
+    _images = _unwritable.chunks(_data, "background")
+    _baked = baker.chunks(_data, "background")
+    assert _unwritable.unbaked == 1 and _unwritable.baked == 0
+    assert [_chunk[1:] for _chunk in _images] == [_chunk[1:] for _chunk in _baked]
+    for (_image, *_), (_file, *_) in zip(_images, _baked):
+        with Image.open(_file) as _chunk:
+            assert np.array_equal(np.asarray(_image), np.asarray(_chunk.convert("RGBA")))
+    assert not [_name for _name in listdir(baker.chunk_dir(_data)) if _name.endswith(".tmp")]
@@ -0,0 +1,79 @@
+from timeit import timeit
+from json import load, dump
+from os import listdir, remove, path, stat, utime
+from shutil import copy
+
+from arcade.resources import add_resource_handle, resolve_resource_path
+
+from src.room_cache import RoomCache, CompiledRoomCache
+from src.worldmap import GameMap
+
+c_maps = path.join(path.dirname(path.dirname(path.abspath(__file__))), "resources", "tiled_maps")
+
+
+def copy_room(_to) -> str:
+    """
+    Test/platforming and the tilesets it uses, copied so the room can be edited.
+    """
+    (_to / "Test").mkdir()
+    for _tileset in ("placeholder_tileset.tsx", "96x96_decorations.tsx", "enemies.tsx"):
+        copy(path.join(c_maps, _tileset), _to / _tileset)
+    return str(copy(path.join(c_maps, "Test", "platforming.tmj"), _to / "Test" / "platforming.tmj"))
+
+
+def test_edit_invalidates(tmp_path):
+    _src = copy_room(tmp_path)
+    _cache = CompiledRoomCache(str(tmp_path / "cache"))
+    _ground = list(_cache.load(_src).layer("ground"))
+    assert _cache.compiled == 1 and _cache.cache_path(_src).startswith(str(tmp_path / "cache"))
+
+    # Touched without a change, the header is updated and the compiled room kept
+    _mtime = stat(_src).st_mtime_ns
+    utime(_src, ns=(_mtime + 10**9, _mtime + 10**9))
+    assert list(_cache.load(_src).layer("ground")) == _ground and _cache.compiled == 1
+
+    with open(_src) as _file:
+        _json = load(_file)
+    _layer = next(_layer for _layer in _json['layers'] if _layer['name'] == "ground")
+    _layer['data'][0] = 0 if _layer['data'][0] else 1
+    with open(_src, 'w') as _file:
+        dump(_json, _file)
+    utime(_src, ns=(_mtime + 2 * 10**9, _mtime + 2 * 10**9))
+
+    _edited = list(_cache.load(_src).layer("ground"))
+    assert _cache.compiled == 2 and _edited[0] == _layer['data'][0] and _edited[1:] == _ground[1:]
+    assert not [_name for _name in listdir(path.dirname(_cache.cache_path(_src))) if _name.endswith(".tmp")]
+
+
+def test_unwritable_cache_parses_in_memory(tmp_path):
+    _src = copy_room(tmp_path)
+    # A file where the cache directory should be, so it can't be made
+    (tmp_path / "cache").write_text("")
+    _cache = CompiledRoomCache(str(tmp_path / "cache" / "rooms"))
+    _data = _cache.load(_src)
+    assert _cache.compiled == 0 and _cache.uncached == 1
+    assert _data.width and list(_data.layer("ground")) == list(CompiledRoomCache(str(tmp_path / "other")).load(
+        _src).layer("ground"))
+
+
+if __name__ == '__main__':
+    add_resource_handle("assets", "resources")
+    _number = 50
+
+    for _region in GameMap.c_regions:
+        _src = resolve_resource_path(f"{GameMap.c_src_base}/{_region}")
+        _rooms = [path.join(_src, _room) for _room in listdir(_src) if _room.endswith('.tmj')]
+
+        def cold():
+            for _room in _rooms:
+                _cache = RoomCache.cache_path(_room)
+                if path.exists(_cache):
+                    remove(_cache)
+                RoomCache.load(_room)
+
+        def warm():
+            for _room in _rooms:
+                RoomCache.load(_room)
+
+        print(f"{_region} ({len(_rooms)} rooms) cold load: {timeit(cold, number=_number) / _number * 1000:.3f}ms")
+        print(f"{_region} ({len(_rooms)} rooms) warm load: {timeit(warm, number=_number) / _number * 1000:.3f}ms")
@@ -0,0 +1,57 @@
+import gc
+import tracemalloc
+from os import listdir, path
+
+from arcade.resources import add_resource_handle, resolve_resource_path
+
+from src.room_cache import RoomCache
+from src.worldmap import GameMap, Room, _tile_layer_sprites, _object_layer_sprites
+
+
+def traced(_build):
+    """
+    Memory still held by the result of _build, in KiB.
+    """
+    gc.collect()
+    tracemalloc.start()
+    _start = tracemalloc.get_traced_memory()[0]
+    _kept = _build()
+    gc.collect()
+    _size = tracemalloc.get_traced_memory()[0] - _start
+    tracemalloc.stop()
+    del _kept
+    return _size / 1024
+
+
+if __name__ == '__main__':
+    add_resource_handle("assets", "resources")
+
+    print(f"{'room':<24}{'tile sprites':>14}{'compact':>10}{'shown':>10}")
+    for _region in GameMap.c_regions:
+        _src = resolve_resource_path(f"{GameMap.c_src_base}/{_region}")
+        for _name in sorted(listdir(_src)):
+            if not _name.endswith('.tmj'):
+                continue
+            _data = RoomCache.load(path.join(_src, _name))
+
+            def tile_sprites():
+                # Every layer as one sprite per tile, how rooms were stored before
+                return {_layer: _tile_layer_sprites(_data, _layer) if _layer in _data.tile_layers
+                        else _object_layer_sprites(_data, _layer) for _layer in _data.layer_names}
+
+            def compact():
+                return Room(_name[:-4], _region, _data)
+
+            def shown():
+                # A room with the chunks of a 1280x720 view in its bottom left corner made
+                _room = Room(_name[:-4], _region, _data)
+                for _layer in _room.chunks.values():
+                    for _key in _layer.visible(0, 0, 1280, 720):
+                        _layer.chunk(_key)
+                return _room
+
+            # Build everything once first so shared textures and chunk bakes aren't counted
+            tile_sprites(), shown()
+
+            print(f"{_region + '/' + _name[:-4]:<24}{traced(tile_sprites):>11.0f}KiB{traced(compact):>7.0f}KiB"
+                  f"{traced(shown):>7.0f}KiB")
@@ -0,0 +1,104 @@
+from time import perf_counter
+from random import Random
+from os import path
+
+import pytest
+from arcade.resources import add_resource_handle
+
+from src.navigation import Navigation
+from src.worldmap import GameMap
+
+c_root = path.dirname(path.dirname(path.abspath(__file__)))
+
+
+def jungle(*_names: str):
+    return tuple(("JungleEdge", _name) for _name in _names)
+
+
+@pytest.fixture
+def make_map():
+    add_resource_handle("assets", path.join(c_root, "resources"))
+    _maps = []
+
+    def make(_budget: int) -> GameMap:
+        _map = GameMap()
+        _map.initialise(("JungleEdge", "entrance"), _parsers=0, _budget=_budget, _headless=True)
+        assert _map.wait(30.0)
+        _maps.append(_map)
+        return _map
+
+    yield make
+    for _map in _maps:
+        _map.shutdown()
+
+
+def test_budget_and_eviction_order(make_map):
+    _map = make_map(2)
+    for _key in jungle("entrance", "boar", "hornet", "snake"):
+        _map.get(*_key)
+        assert len(_map.resident) <= 2
+    assert _map.resident == jungle("hornet", "snake")
+
+    # Asking for a room makes it the most recently used, so the other one goes first
+    _map.get("JungleEdge", "hornet")
+    _evictions = _map.evictions
+    _map.get("JungleEdge", "entrance")
+    assert _map.resident == jungle("hornet", "entrance") and _map.evictions == _evictions + 1
+
+
+def test_pinned_rooms_stay(make_map):
+    _map = make_map(1)
+    _entrance = _map.get("JungleEdge", "entrance")
+    assert _map.pin(_entrance) == [] and _map.pinned == set(jungle("entrance", "boar"))
+
+    # Pinned rooms overrun the budget rather than being evicted
+    _map.get("JungleEdge", "boar")
+    _map.get("JungleEdge", "snake")
+    _map.get("JungleEdge", "hornet")
+    assert set(_map.resident) == set(jungle("entrance", "boar", "hornet"))
+
+    # Moving on to hornet unpins the entrance, which is then the first to go
+    _hornet = _map.get("JungleEdge", "hornet")
+    assert _map.pin(_hornet) == [_entrance]
+    _map.get("JungleEdge", "strike")
+    assert set(_map.resident) == set(jungle("boar", "hornet", "strike"))
+
+
+def test_reload_after_eviction(make_map):
+    _map = make_map(1)
+    _first = _map.get("JungleEdge", "entrance")
+    assert _first.navigation is not None and _first.data in Navigation
+    _map.get("JungleEdge", "boar")
+    assert not _map.ready("JungleEdge", "entrance") and _map.resident == jungle("boar")
+    # The graph of an evicted room goes with it
+    assert _first.data not in Navigation
+
+    _again = _map.get("JungleEdge", "entrance")
+    assert _again is not _first and _again.key == ("JungleEdge", "entrance")
+    assert _map.resident == jungle("entrance") and _map.evictions == 2
+    # Loading a room again doesn't count towards the progress of the queue
+    assert _map.progress == (1, 1)
+
+if __name__ == '__main__':
+    add_resource_handle("assets", "resources")
+    _steps = 200
+
+    for _budget in (2, 4, 6, 8, 12):
+        _map = GameMap()
+        _map.initialise(_parsers=0, _budget=_budget)
+        _map.wait()
+
+        # Walk through random transitions, the same walk for every budget
+        _random = Random(2022)
+        _room = _map.get(*GameMap.c_start)
+        _worst = 0.0
+        for _ in range(_steps):
+            _map.pin(_room)
+            _target = _random.choice(sorted(_room.neighbours))
+            _start = perf_counter()
+            _room = _map.get(*_target)
+            _worst = max(_worst, perf_counter() - _start)
+
+        print(f"budget {_budget:>2}: hits {_map.hits:>4} misses {_map.misses:>4} evictions {_map.evictions:>4} "
+              f"resident {len(_map.resident):>2} worst get {_worst * 1000:.1f}ms")
+        _map.shutdown()
@@ -0,0 +1,84 @@
+from time import perf_counter, sleep
+from os import path
+
+from arcade import Window
+from arcade.resources import add_resource_handle
+
+from src.worldmap import GameMap
+
+c_root = path.dirname(path.dirname(path.abspath(__file__)))
+
+
+def test_neighbours_ready_before_transition():
+    add_resource_handle("assets", path.join(c_root, "resources"))
+    _map = GameMap()
+    _map.initialise(("JungleEdge", "entrance"), _parsers=0, _budget=2, _headless=True)
+    _entrance = _map.get("JungleEdge", "entrance")
+    _map.set_room(_entrance)
+    assert _map.pinned == {("JungleEdge", "entrance"), ("JungleEdge", "boar")}
+
+    # A headless map never warms by itself, without a window nothing would initialise the chunks
+    _map.prewarm(_entrance)
+    _end = perf_counter() + 10.0
+    while not (_map.ready("JungleEdge", "boar") and _map.warming) and perf_counter() < _end:
+        sleep(0.01)
+    assert _map.ready("JungleEdge", "boar") and _map.warming
+
+    # Going through the gate only finds the loaded room
+    _misses = _map.misses
+    _boar = _map.get("JungleEdge", "boar")
+    _map.set_room(_boar)
+    assert _map.misses == _misses and _map.current is _boar
+    assert {("JungleEdge", "entrance"), ("JungleEdge", "boar")} <= set(_map.resident)
+    _map.shutdown()
+
+if __name__ == '__main__':
+    add_resource_handle("assets", "resources")
+    _window = Window(1280, 720, visible=False)
+    _frames_in_room = 60
+    _transitions = 12
+    _around = 5
+
+    for _prewarm in (False, True):
+        _map = GameMap()
+        _map.c_prewarm = _prewarm
+        _map.initialise(("JungleEdge", "entrance"), _parsers=0)
+        _map.wait()
+
+        def frame(_position, _next=None):
+            _start = perf_counter()
+            _map.update()
+            if _next is not None:
+                _map.set_room(_next)
+            _window.clear()
+            _map.draw((_position[0] - 640, _position[1] - 360, _position[0] + 640, _position[1] + 360))
+            _window.ctx.finish()
+            return perf_counter() - _start
+
+        # Always leave through the gate after the one we came in by, so the walk covers every room of the region
+        _room = _map.get("JungleEdge", "entrance")
+        _map.set_room(_room)
+        _gate = min(_room.gates)
+        _position = (_room.gates[_gate].x, _room.gates[_gate].y)
+        _times = []
+        _transition_frames = []
+        for _ in range(_transitions):
+            _times.extend(frame(_position) for _ in range(_frames_in_room))
+
+            _gates = sorted(_room.gates)
+            _exit = _room.gates[_gates[(_gates.index(_gate) + 1) % len(_gates)]]
+            _next = _map.get(*_exit.target)
+            _entrance = _next.gates[_exit.target_gate]
+            _position = (_entrance.x, _entrance.y)
+
+            _transition_frames.append(len(_times))
+            _times.append(frame(_position, _next))
+            _room, _gate = _next, _exit.target_gate
+
+        _times.extend(frame(_position) for _ in range(_frames_in_room))
+
+        _worst = [max(_times[_frame - _around:_frame + _around + 1]) for _frame in _transition_frames]
+        print(f"prewarm {'on ' if _prewarm else 'off'}: worst frame around transitions "
+              + " ".join(f"{_time * 1000:.1f}" for _time in _worst)
+              + f"ms, max {max(_worst) * 1000:.1f}ms, median frame {sorted(_times)[len(_times) // 2] * 1000:.2f}ms")
+        _map.shutdown()
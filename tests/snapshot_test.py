@@ -0,0 +1,125 @@
+import pytest
+from arcade import key
+
+from src.clock import Clock
+from src.headless import HeadlessEngine
+from src.input import Input
+from src.player.player_states import JUMP
+from src.player.player_weapon import RightAttack
+from src.replay import state_hash
+from src.snapshot import Snapshotter, SnapshotRing
+
+
+@pytest.fixture(scope="module")
+def engine(headless_engine):
+    _engine = headless_engine(("Test", "platforming"), (144.0, 200.0))
+    _engine.run(0.5)
+    return _engine
+
+
+def play(_engine: HeadlessEngine):
+    # Runs right, jumps, swings and lets go
+    _engine.press(key.D)
+    _engine.step(20)
+    _engine.press(key.SPACE)
+    _engine.step(10)
+    _engine.release(key.SPACE)
+    _engine.press(key.RIGHT)
+    _engine.step(3)
+    _engine.release(key.RIGHT)
+    _engine.step(30)
+    _engine.release(key.D)
+    _engine.step(20)
+    return state_hash(_engine.player), _engine.player.p_data.pos, _engine.frame
+
+
+def test_round_trip(engine):
+    _snapshotter = Snapshotter(engine.player)
+    _before = _snapshotter.capture()
+    _position, _frame, _time = engine.player.p_data.pos, Clock.frame, Clock.time
+
+    engine.press(key.SPACE)
+    engine.step(5)
+    assert engine.player.p_state_switch.state_id == JUMP and Input.get_button("JUMP")
+
+    _snapshotter.restore(_before)
+    assert engine.player.p_data.pos == _position and (Clock.frame, Clock.time) == (_frame, _time)
+    assert not Input.get_button("JUMP") and not Input.held_keys
+    assert _snapshotter.capture() == _before
+    engine.release(key.SPACE)
+    _snapshotter.restore(_before)
+
+
+def test_rewind_replays_the_same(engine):
+    _ring = engine.keep_snapshots()
+    _first = play(engine)
+    assert engine.rewind(len(_ring) - 1) == _ring.frames[0] and len(_ring) == 1
+    assert play(engine) == _first
+
+
+def test_attack_restored(engine):
+    _snapshotter = Snapshotter(engine.player)
+    _weapon = engine.player.p_weapon
+    engine.step(_weapon.c_attack_delay + 1)
+    engine.press(key.RIGHT)
+    engine.step(1)
+    engine.release(key.RIGHT)
+    _attack = _weapon.current_attack
+    _spawn_frame = _attack.spawn_frame
+    _during = _snapshotter.capture()
+
+    engine.step(RightAttack.c_attack_max_age + 2)
+    assert _weapon.current_attack is None
+    _snapshotter.restore(_during)
+    assert isinstance(_weapon.current_attack, RightAttack) and _weapon.current_attack.spawn_frame == _spawn_frame
+    assert _weapon.attacks[RightAttack].in_use == 1
+    engine.step(RightAttack.c_attack_max_age + 2)
+    assert _weapon.current_attack is None and _weapon.attacks[RightAttack].in_use == 0
+
+
+def test_ring(engine):
+    _ring = SnapshotRing(Snapshotter(engine.player), 4)
+    with pytest.raises(IndexError):
+        _ring.rewind()
+    _start = Clock.frame
+    for _ in range(6):
+        _ring.push()
+        engine.step(1)
+    # Only the last four are kept, oldest first
+    assert _ring.frames == [_start + 2, _start + 3, _start + 4, _start + 5] and _ring.find(_start + 1) is None
+
+    assert _ring.rewind(_ring.find(_start + 3)) == _start + 3 and Clock.frame == _start + 3
+    assert _ring.frames == [_start + 2, _start + 3]
+    _ring.push()
+    assert _ring.frames == [_start + 2, _start + 3, _start + 3]
+    with pytest.raises(IndexError):
+        _ring.rewind(3)
+
+
+def test_save_and_load(engine, tmp_path):
+    _snapshotter = Snapshotter(engine.player)
+    _snapshotter.save(str(tmp_path / "state.bin"))
+    assert _snapshotter.load(str(tmp_path / "state.bin")) == _snapshotter.capture()
+
+    with open(tmp_path / "state.bin", 'r+b') as _file:
+        _file.write(b'NOPE')
+    with pytest.raises(ValueError):
+        _snapshotter.load(str(tmp_path / "state.bin"))
+
+
+if __name__ == '__main__':
+    from timeit import timeit
+
+    _engine = HeadlessEngine(("Test", "platforming"), (144.0, 200.0))
+    _engine.run(0.5)
+    _snapshotter = Snapshotter(_engine.player)
+    _ring = SnapshotRing(_snapshotter)
+    _buffer = _snapshotter.capture()
+    _number = 20000
+    _capture = timeit(lambda: _snapshotter.capture_into(_buffer), number=_number) / _number
+    _restore = timeit(lambda: _snapshotter.restore(_buffer), number=_number) / _number
+    _push = timeit(_ring.push, number=_number) / _number
+    _step = timeit(_engine.step, number=_number // 10) / (_number // 10)
+    print(f"{_snapshotter.size} bytes a snapshot: capture {_capture * 1e6:.1f}us, restore {_restore * 1e6:.1f}us, "
+          f"ring push {_push * 1e6:.1f}us, a step {_step * 1e6:.1f}us")
+    _engine.shutdown()
@@ -0,0 +1,180 @@
+from array import array
+from math import dist
+from random import Random
+from timeit import timeit
+
+import pytest
+from arcade import SpriteSolidColor
+
+from src.collision import CollisionGrid, CollisionMesh, CollisionLayer, GROUND, ONE_WAY
+from src.player.player_data import PlayerData
+from src.player.player_hitbox import PlayerHitbox
+from src.room_cache import RoomData, _greedy_mesh
+
+c_width, c_height = 40, 30
+
+
+def synthetic_room() -> RoomData:
+    # A floor, a ceiling, a wall one tile thick at column 20 and a one way platform at row 12, row 0 at the bottom
+    _ground, _one_way = array('I', [0] * (c_width * c_height)), array('I', [0] * (c_width * c_height))
+
+    def fill(_gids: array, _column: int, _row: int):
+        _gids[(c_height - 1 - _row) * c_width + _column] = 1
+
+    for _column in range(c_width):
+        fill(_ground, _column, 0)
+        fill(_ground, _column, c_height - 1)
+    for _row in range(1, 11):
+        fill(_ground, 20, _row)
+    for _column in range(5, 16):
+        fill(_one_way, _column, 12)
+
+    _meta = {'order': ['ground', 'one_way'], 'properties': {}, 'objects': {}, 'tiles': {}, 'tilesets': [],
+             'colliders': {'ground': _greedy_mesh(_ground, c_width, c_height, True),
+                           'one_way': _greedy_mesh(_one_way, c_width, c_height, False)}}
+    return RoomData("synthetic.tmj", b'', c_width, c_height, 32, 32, {'ground': _ground, 'one_way': _one_way}, _meta)
+
+
+@pytest.fixture(params=[CollisionGrid, CollisionMesh])
+def collider(request):
+    return request.param(synthetic_room())
+
+
+# From a single frame up to a whole second, the one way band is only 4px and the wall 32px thick
+c_steps = [1 / 60, 1 / 15, 0.25, 1.0]
+
+
+@pytest.mark.parametrize("dt", c_steps)
+def test_falling_onto_one_way(collider, dt):
+    _drop = PlayerData.c_dash_jump_speed * dt
+    _contact = collider.sweep(300.0, 424.0, 332.0, 488.0, 0.0, -_drop, GROUND | ONE_WAY)
+    assert _contact is not None
+    assert (_contact.normal_x, _contact.normal_y) == (0, 1)
+    assert _contact.tile.top == 416.0 and _contact.tile.height == CollisionGrid.c_one_way_depth
+    assert _contact.time * _drop == pytest.approx(8.0)
+
+
+@pytest.mark.parametrize("dt", c_steps)
+def test_one_way_ignored_by_ground_mask(collider, dt):
+    _drop = min(PlayerData.c_dash_jump_speed * dt, 400.0)
+    _contact = collider.sweep(300.0, 424.0, 332.0, 488.0, 0.0, -_drop, GROUND)
+    assert _contact is None or _contact.tile.top == 32.0
+
+
+@pytest.mark.parametrize("dt", c_steps)
+def test_dashing_into_thin_wall(collider, dt):
+    _move = PlayerData.c_dash_jump_speed * dt
+    _contact = collider.sweep(580.0, 64.0, 612.0, 128.0, _move, 0.0, GROUND)
+    if _move <= 28.0:
+        assert _contact is None
+        return
+    assert (_contact.normal_x, _contact.normal_y) == (-1, 0)
+    assert _contact.tile.left == 640.0
+    assert _contact.time * _move == pytest.approx(28.0)
+
+
+@pytest.mark.parametrize("dt", c_steps)
+def test_jumping_into_ceiling(collider, dt):
+    _rise = PlayerData.c_dash_jump_speed * dt
+    _contact = collider.sweep(100.0, 800.0, 132.0, 864.0, 0.0, _rise, GROUND)
+    if _rise <= 64.0:
+        assert _contact is None
+        return
+    assert (_contact.normal_x, _contact.normal_y) == (0, -1)
+    assert _contact.tile.bottom == 928.0
+
+
+def test_diagonal_corner(collider):
+    # Drifts under the end of the platform after falling past its band, so lands on the floor instead of the corner
+    _contact = collider.sweep(520.0, 424.0, 552.0, 488.0, -40.0, -400.0, GROUND | ONE_WAY)
+    assert (_contact.normal_x, _contact.normal_y) == (0, 1)
+    assert _contact.tile.top == 32.0
+
+
+def test_grid_and_mesh_agree():
+    _data = synthetic_room()
+    _grid, _mesh = CollisionGrid(_data), CollisionMesh(_data)
+    _random = Random(2022)
+    for _ in range(2000):
+        _x, _y = _random.uniform(0, c_width * 32), _random.uniform(0, c_height * 32)
+        _dx, _dy = _random.uniform(-400, 400), _random.uniform(-400, 400)
+        _box = (_x - 16.0, _y - 32.0, _x + 16.0, _y + 32.0, _dx, _dy, GROUND | ONE_WAY)
+        _a, _b = _grid.sweep(*_box), _mesh.sweep(*_box)
+        assert (_a is None) == (_b is None)
+        if _a is not None:
+            assert _a.time == pytest.approx(_b.time)
+            assert (_a.tile.left, _a.tile.bottom, _a.tile.top) == (_b.tile.left, _b.tile.bottom, _b.tile.top)
+            if _a.time > 0.0:
+                assert (_a.normal_x, _a.normal_y) == (_b.normal_x, _b.normal_y)
+
+
+@pytest.fixture
+def player():
+    _sprite = SpriteSolidColor(32, 64, (255, 255, 255))
+    _data = PlayerData(_sprite)
+    return _data, PlayerHitbox(_sprite, _data)
+
+
+@pytest.mark.parametrize("dt", c_steps)
+def test_player_lands_on_one_way_at_dash_speed(player, dt):
+    _data, _hitbox = player
+    _layer = CollisionLayer(CollisionMesh(synthetic_room()), GROUND | ONE_WAY)
+    _data.old_pos = (316.0, 456.0)
+    _data.pos = (316.0, 456.0 - PlayerData.c_dash_jump_speed * dt)
+
+    _hit, _tile = _hitbox.hit_ground(_layer)
+    assert _hit
+    assert _tile.top == 416.0
+    assert _data.old_bottom >= _tile.top
+
+
+@pytest.mark.parametrize("dt", c_steps[1:])
+def test_player_stopped_by_thin_wall_at_dash_speed(player, dt):
+    _data, _hitbox = player
+    _layer = CollisionLayer(CollisionMesh(synthetic_room()), GROUND)
+    _data.old_pos = (596.0, 96.0)
+    _data.pos = (596.0 + PlayerData.c_dash_jump_speed * dt, 96.0)
+
+    _hit, _tile = _hitbox.hit_right(_layer)
+    assert _hit
+    assert _tile.left == 640.0
+    assert _data.old_right <= _tile.left
+    assert _hitbox.last_contact.normal_x == -1
+
+
+if __name__ == '__main__':
+    _number = 20000
+    _grid = CollisionGrid(synthetic_room())
+    _mesh = CollisionMesh(synthetic_room())
+
+    # Falling moves of the ground sensor, from a frame at dash speed up to a whole second of it
+    _random = Random(2022)
+    _moves = []
+    for _ in range(256):
+        _x, _y = _random.uniform(160, 500), _random.uniform(420, 900)
+        _moves.append(((_x, _y), (_x, _y - PlayerData.c_dash_jump_speed * _random.choice(c_steps))))
+
+    def sampled(_old, _new, _layer):
+        # The sensor stepped along the move at most 32px at a time, as PlayerHitbox did before sweeps
+        _length = int(dist(_old, _new) // 32) + 1
+        for _step in range(_length + 1):
+            _t = _step / _length
+            _x, _y = _old[0] + (_new[0] - _old[0]) * _t, _old[1] + (_new[1] - _old[1]) * _t
+            _tile = _layer.first_hit(_x - 16.0, _y - 0.5, _x + 16.0, _y + 0.5, GROUND | ONE_WAY)
+            if _tile is not None:
+                return _tile
+        return None
+
+    def swept(_old, _new, _layer):
+        return _layer.sweep(_old[0] - 16.0, _old[1] - 0.5, _old[0] + 16.0, _old[1] + 0.5,
+                            _new[0] - _old[0], _new[1] - _old[1], GROUND | ONE_WAY)
+
+    _missed = sum(sampled(_old, _new, _mesh) is None and swept(_old, _new, _mesh) is not None
+                  for _old, _new in _moves)
+    print(f"moves through a tile the sampled sensor missed: {_missed} of {len(_moves)}")
+
+    _runs = _number // len(_moves)
+    for _name, _layer in (("grid", _grid), ("mesh", _mesh)):
+        for _query in (sampled, swept):
+            _time = timeit(lambda: [_query(_old, _new, _layer) for _old, _new in _moves], number=_runs)
+            print(f"{_name} {_query.__name__} sensor: {_time / (_runs * len(_moves)) * 1e6:.3f}us")